@@ -0,0 +1,59 @@
+import copy
+
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import user_cache
+from .tokens import fingerprint
+
+
+# JWTAuthentication sin ir a la base en cada peticion.
+# El usuario (con su rol) sale del cache del proceso mientras su version no cambie;
+# la huella del token se compara con la del usuario cacheado, asi un token emitido
+# antes de un cambio de rol o de grupos deja de aceptarse.
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        current_version = user_cache.version(user_id)
+        cached = user_cache.get(user_id, current_version)
+        if cached is None:
+            user = self._load_user(user_id)
+            cached = (user, fingerprint(user))
+            user_cache.put(user_id, current_version, *cached)
+
+        user, user_fingerprint = cached
+        # los tokens emitidos antes de agregar la huella no la traen
+        token_fingerprint = validated_token.get('fp')
+        if token_fingerprint is not None and token_fingerprint != user_fingerprint:
+            raise AuthenticationFailed(
+                'Los permisos del usuario cambiaron, inicie sesión de nuevo', code='token_outdated')
+
+        # la misma comprobacion que JWTAuthentication.get_user; el cambio de contraseña guarda
+        # el usuario y la senal invalida su entrada, asi que el hash cacheado esta al dia
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # copia por peticion: lo que la vista cambie en request.user no llega al cache
+        user = copy.copy(user)
+        # el backend de permisos la usa para no volver a leerla (ver backends.py)
+        user._auth_version = current_version
+        return user
+
+    def _load_user(self, user_id):
+        try:
+            user = self.user_model.objects.select_related('role').get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
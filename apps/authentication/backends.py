@@ -0,0 +1,28 @@
+from django.contrib.auth.backends import ModelBackend
+
+from . import permission_cache, user_cache
+
+
+# ModelBackend con los permisos cacheados (ver permission_cache.py).
+# DjangoModelPermissions consulta has_perms en cada peticion y el usuario es un objeto
+# nuevo cada vez, asi que el _perm_cache propio de ModelBackend no alcanza: sin esto cada
+# peticion hace los joins de grupos, permisos y content types.
+class CachedModelBackend(ModelBackend):
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if hasattr(user_obj, '_perm_cache'):
+            return user_obj._perm_cache
+
+        # CachedJWTAuthentication deja la version que ya leyo para esta peticion
+        user_version = getattr(user_obj, '_auth_version', None)
+        if user_version is None:
+            user_version = user_cache.version(user_obj.pk)
+
+        global_version, perms = permission_cache.get(user_obj.pk, user_version)
+        if perms is None:
+            perms = super().get_all_permissions(user_obj)
+            permission_cache.put(user_obj.pk, user_version, global_version, perms)
+        user_obj._perm_cache = perms
+        return perms
@@ -0,0 +1,125 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+# Consulta de la lista negra de refresh tokens sin ir a la base en el caso comun.
+# Cada proceso mantiene un filtro de Bloom con los jti bloqueados y vigentes: si el filtro
+# dice que no esta, no esta. Si dice que quiza, se mira un LRU de respuestas recientes y
+# recien despues la tabla. Los bloqueos hechos en otros procesos llegan por el cache
+# compartido (una clave por jti hasta que vence) y por una sincronizacion periodica con la
+# tabla desde el ultimo id leido; el filtro se reconstruye cada tanto para olvidar los vencidos.
+
+SHARED_KEY = 'jwt:blacklisted:{}'
+
+
+class BloomFilter:
+
+    def __init__(self, bits, hashes):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray((bits + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=8 * self.hashes).digest()
+        for index in range(self.hashes):
+            yield int.from_bytes(digest[index * 8:(index + 1) * 8], 'little') % self.bits
+
+    def add(self, value):
+        for position in self._positions(value):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class TokenBlacklist:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._recent = OrderedDict()
+        self._last_id = 0
+        self._synced_at = 0
+        self._built_at = 0
+
+    def is_blacklisted(self, jti):
+        self._sync()
+
+        with self._lock:
+            if self._recent.get(jti):
+                return True
+        if cache.get(SHARED_KEY.format(jti)):
+            self._remember(jti, True)
+            return True
+
+        with self._lock:
+            if jti not in self._bloom:
+                return False
+            if jti in self._recent:
+                self._recent.move_to_end(jti)
+                return self._recent[jti]
+
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        self._remember(jti, blacklisted)
+        return blacklisted
+
+    def add(self, jti, expires_at):
+        timeout = max(int((expires_at - timezone.now()).total_seconds()), 1)
+        cache.set(SHARED_KEY.format(jti), 1, timeout=timeout)
+        self._remember(jti, True)
+
+    def _remember(self, jti, blacklisted):
+        size = getattr(settings, 'JWT_BLACKLIST_LRU_SIZE', 10000)
+        with self._lock:
+            if blacklisted and self._bloom is not None:
+                self._bloom.add(jti)
+            self._recent[jti] = blacklisted
+            self._recent.move_to_end(jti)
+            while len(self._recent) > size:
+                self._recent.popitem(last=False)
+
+    def _sync(self):
+        now = time.monotonic()
+        rebuild = self._bloom is None or now - self._built_at >= getattr(settings, 'JWT_BLACKLIST_REBUILD_INTERVAL', 3600)
+        if not rebuild and now - self._synced_at < getattr(settings, 'JWT_BLACKLIST_SYNC_INTERVAL', 5):
+            return
+
+        blacklisted = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        if rebuild:
+            bloom = BloomFilter(
+                getattr(settings, 'JWT_BLACKLIST_BLOOM_BITS', 1 << 23),
+                getattr(settings, 'JWT_BLACKLIST_BLOOM_HASHES', 7),
+            )
+            last_id = 0
+        else:
+            bloom = None
+            last_id = self._last_id
+
+        rows = blacklisted.filter(id__gt=last_id).order_by('id').values_list('id', 'token__jti')
+        jtis = []
+        for row_id, jti in rows.iterator(chunk_size=5000):
+            jtis.append(jti)
+            last_id = row_id
+
+        with self._lock:
+            if rebuild:
+                self._bloom = bloom
+                self._recent.clear()
+                self._built_at = now
+            for jti in jtis:
+                self._bloom.add(jti)
+                # una respuesta negativa guardada antes ya no vale
+                if self._recent.get(jti) is False:
+                    self._recent[jti] = True
+            self._last_id = max(self._last_id if not rebuild else 0, last_id)
+            self._synced_at = now
+
+
+token_blacklist = TokenBlacklist()
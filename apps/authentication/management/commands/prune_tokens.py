@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+# Alternativa a flushexpiredtokens para tablas grandes: en vez de un unico DELETE que
+# bloquea las tablas mientras dura, borra los tokens vencidos por bloques de ids, cada
+# bloque en su propia transaccion corta. El recorrido avanza por la clave primaria, asi
+# cada bloque usa el indice y no vuelve a leer lo ya revisado.
+class Command(BaseCommand):
+    help = 'Borra los refresh tokens vencidos (y su entrada en la lista negra) por bloques'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.0, help='Segundos de pausa entre bloques')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        last_id = 0
+        outstanding = blacklisted = 0
+        start = time.perf_counter()
+
+        while True:
+            ids = list(
+                OutstandingToken.objects.filter(id__gt=last_id, expires_at__lte=now)
+                .order_by('id')
+                .values_list('id', flat=True)[:options['batch_size']]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            with transaction.atomic():
+                # la lista negra primero, asi el borrado de tokens no depende del cascade
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+                outstanding += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{outstanding} tokens vencidos borrados ({blacklisted} en lista negra) '
+            f'en {time.perf_counter() - start:.2f}s'
+        ))
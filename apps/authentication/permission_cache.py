@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from gestion_cursos_back import metrics
+
+from .user_cache import seed
+
+
+# Permisos resueltos de cada usuario, en el cache compartido.
+# La clave lleva la version del usuario (ver user_cache.py), que ya cambia cuando se le
+# agregan o quitan grupos o permisos propios. Los cambios en los permisos de un grupo o en
+# la tabla de permisos afectan a muchos usuarios a la vez: mueven una version global que
+# se guarda junto a cada entrada, y las entradas con otra version global se descartan.
+# Ambas claves se leen en una sola ida al cache. Si la version global se pierde se siembra
+# de nuevo con un valor que no coincide con el de ninguna entrada guardada.
+
+GLOBAL_KEY = 'auth:perms:version'
+USER_KEY = 'auth:user:{}:perms:{}'
+
+
+def get(user_id, user_version):
+    key = USER_KEY.format(user_id, user_version)
+    values = cache.get_many([GLOBAL_KEY, key])
+    global_version = values.get(GLOBAL_KEY)
+    if global_version is None:
+        cache.add(GLOBAL_KEY, seed(), timeout=None)
+        global_version = cache.get(GLOBAL_KEY)
+    entry = values.get(key)
+    if entry is None or entry[0] != global_version:
+        metrics.cache_result('auth_permissions', False)
+        return global_version, None
+    metrics.cache_result('auth_permissions', True)
+    return global_version, entry[1]
+
+
+def put(user_id, user_version, global_version, perms):
+    cache.set(
+        USER_KEY.format(user_id, user_version),
+        (global_version, perms),
+        timeout=getattr(settings, 'AUTH_PERMISSION_CACHE_TIMEOUT', 3600),
+    )
+
+
+def bump():
+    transaction.on_commit(_bump)
+
+
+def _bump():
+    try:
+        cache.incr(GLOBAL_KEY)
+    except ValueError:
+        cache.add(GLOBAL_KEY, seed(), timeout=None)
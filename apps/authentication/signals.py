@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.models import User
+
+from . import permission_cache, user_cache
+
+
+# cualquier cambio del usuario (activo, rol, datos del perfil) invalida su entrada cacheada
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    user_cache.invalidate(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_groups(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            user_cache.invalidate(instance.pk)
+        return
+
+    # cambios hechos desde el grupo o el permiso (group.user_set...)
+    if action in ('post_add', 'post_remove'):
+        user_ids = pk_set or ()
+    elif action == 'pre_clear':
+        # en post_clear ya no se sabe que usuarios tenia
+        user_ids = instance.user_set.values_list('id', flat=True)
+    else:
+        return
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+
+
+# los permisos de un grupo o la tabla de permisos alcanzan a muchos usuarios:
+# se descartan todos los permisos cacheados
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        permission_cache.bump()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_permissions(sender, **kwargs):
+    permission_cache.bump()
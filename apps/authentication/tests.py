@@ -1,3 +1,158 @@
+from django.contrib.auth.models import Group, Permission
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.authentication import permission_cache, user_cache
+from apps.authentication.blacklist import BloomFilter, TokenBlacklist
+from apps.authentication.tokens import RoleRefreshToken
+from apps.users.models import Role, User
+
+
+class AuthCacheTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student@example.com', 'password', role=Role.objects.create(name='estudiante'))
+        cls.group = Group.objects.create(name='lectores')
+        cls.permission = Permission.objects.get(codename='view_course')
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+
+
+class UserCacheTests(AuthCacheTestCase):
+
+    def test_lost_version_is_seeded_with_a_new_value(self):
+        first = user_cache.version(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            user_cache.invalidate(self.user.pk)
+        second = user_cache.version(self.user.pk)
+        self.assertEqual(second, first + 1)
+
+        # sin la clave (desalojo o reinicio del cache) no se vuelve a una version ya usada
+        cache.delete(user_cache.VERSION_KEY.format(self.user.pk))
+        self.assertGreater(user_cache.version(self.user.pk), second)
+
+    def test_deactivated_user_is_rejected(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(self.user).access_token}')
+        self.user.user_permissions.add(self.permission)
+        self.assertEqual(client.get('/course/list/').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=['is_active'])
+        self.assertEqual(client.get('/course/list/').status_code, 401)
+
+    @mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True)
+    def test_password_change_revokes_tokens(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(self.user).access_token}')
+        self.user.user_permissions.add(self.permission)
+        self.assertEqual(client.get('/course/list/').status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('new-password')
+            self.user.save()
+        response = client.get('/course/list/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'password_changed')
+
+
+class PermissionCacheTests(AuthCacheTestCase):
+
+    def test_group_permission_change_reaches_cached_users(self):
+        self.user.groups.add(self.group)
+        self.assertFalse(User.objects.get(pk=self.user.pk).has_perm('course.view_course'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.permission)
+        self.assertTrue(User.objects.get(pk=self.user.pk).has_perm('course.view_course'))
+
+    def test_lost_global_version_discards_entries(self):
+        user_version = user_cache.version(self.user.pk)
+        global_version, perms = permission_cache.get(self.user.pk, user_version)
+        self.assertIsNone(perms)
+        permission_cache.put(self.user.pk, user_version, global_version, {'course.view_course'})
+        self.assertEqual(permission_cache.get(self.user.pk, user_version)[1], {'course.view_course'})
+
+        cache.delete(permission_cache.GLOBAL_KEY)
+        self.assertIsNone(permission_cache.get(self.user.pk, user_version)[1])
+
+
+class TokenBlacklistTests(AuthCacheTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # filtro y LRU nuevos: los del proceso guardan jti de otros tests
+        self.blacklist = TokenBlacklist()
+        patcher = mock.patch('apps.authentication.tokens.token_blacklist', self.blacklist)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def post(self, url, refresh):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, {'refresh': refresh}, format='json')
+
+    def test_refresh_after_logout_is_rejected(self):
+        refresh = str(RoleRefreshToken.for_user(self.user))
+        self.assertEqual(self.post('/auth/logout/', refresh).status_code, 205)
+        self.assertEqual(self.post('/auth/refresh/', refresh).status_code, 401)
+
+    def test_rotated_refresh_cannot_be_reused(self):
+        refresh = str(RoleRefreshToken.for_user(self.user))
+        response = self.post('/auth/refresh/', refresh)
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.post('/auth/refresh/', refresh).status_code, 401)
+        self.assertEqual(self.post('/auth/refresh/', response.data['refresh']).status_code, 200)
+
+    def test_bloom_false_positive_falls_through_to_database(self):
+        blacklisted = RoleRefreshToken.for_user(self.user)
+        blacklisted.blacklist()
+        self.assertFalse(self.blacklist.is_blacklisted('otro-jti'))
+
+        # el filtro dice "quiza" para todo: la tabla decide y la respuesta queda en el LRU
+        with mock.patch.object(BloomFilter, '__contains__', return_value=True):
+            with self.assertNumQueries(1):
+                self.assertFalse(self.blacklist.is_blacklisted('sin-bloquear'))
+            with self.assertNumQueries(0):
+                self.assertFalse(self.blacklist.is_blacklisted('sin-bloquear'))
+        cache.clear()
+        self.blacklist._recent.clear()
+        with self.assertNumQueries(1):
+            self.assertTrue(self.blacklist.is_blacklisted(blacklisted['jti']))
+
+
+class PruneTokensTests(AuthCacheTestCase):
+
+    def create_token(self, jti, expires_in, blacklisted=False):
+        now = timezone.now()
+        token = OutstandingToken.objects.create(
+            user=self.user, jti=jti, token=jti, created_at=now - timedelta(days=8), expires_at=now + expires_in,
+        )
+        if blacklisted:
+            BlacklistedToken.objects.create(token=token)
+
+    def test_only_expired_tokens_are_removed(self):
+        self.create_token('vencido', -timedelta(hours=1))
+        self.create_token('vencido-bloqueado', -timedelta(minutes=1), blacklisted=True)
+        self.create_token('vigente', timedelta(hours=1))
+        self.create_token('vigente-bloqueado', timedelta(days=1), blacklisted=True)
+
+        call_command('prune_tokens', batch_size=1, stdout=StringIO())
 
-# Create your tests here.
+        self.assertEqual(
+            set(OutstandingToken.objects.values_list('jti', flat=True)), {'vigente', 'vigente-bloqueado'})
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token__jti', flat=True)), ['vigente-bloqueado'])
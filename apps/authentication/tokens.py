@@ -0,0 +1,39 @@
+import hashlib
+
+from django.db import transaction
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import token_blacklist
+
+
+# Huella de lo que decide los permisos del usuario: rol, banderas y grupos.
+# Va dentro del token; si cambia, los tokens emitidos antes dejan de aceptarse.
+def fingerprint(user, group_ids=None):
+    if group_ids is None:
+        group_ids = user.groups.values_list('id', flat=True)
+    raw = f'{user.role_id}:{user.is_active}:{user.is_staff}:{user.is_superuser}:{sorted(group_ids)}'
+    return hashlib.md5(raw.encode()).hexdigest()[:16]
+
+
+class RoleRefreshToken(RefreshToken):
+
+    # el access token generado desde el refresh copia estos claims
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role.name
+        token['fp'] = fingerprint(user)
+        return token
+
+    # la consulta a la lista negra pasa por el filtro en memoria (ver blacklist.py)
+    def check_blacklist(self):
+        if token_blacklist.is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError('Token is blacklisted')
+
+    def blacklist(self):
+        blacklisted, created = super().blacklist()
+        jti, expires_at = self.payload[api_settings.JTI_CLAIM], blacklisted.token.expires_at
+        transaction.on_commit(lambda: token_blacklist.add(jti, expires_at))
+        return blacklisted, created
@@ -1,8 +1,10 @@
 from django.urls import path
-from .views import LoginView
+from .views import LoginView, LogoutView, RefreshView
 
 
 
 urlpatterns = [
     path('login/', LoginView.as_view()),
+    path('refresh/', RefreshView.as_view()),
+    path('logout/', LogoutView.as_view()),
 ]
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from gestion_cursos_back import metrics
+
+
+# Usuarios autenticados recientes, por proceso.
+# Cada entrada guarda la version del usuario en el cache compartido al momento de leerlo;
+# desactivar al usuario, cambiarle el rol o los grupos incrementa esa version y la entrada
+# deja de servir en todos los procesos. Si el cache compartido pierde la version se vuelve
+# a sembrar con la hora en nanosegundos, que no repite ninguna version anterior; el TTL
+# corto acota el desfase mientras tanto.
+
+VERSION_KEY = 'auth:user:{}:version'
+
+_entries = OrderedDict()
+_lock = threading.Lock()
+
+
+def version(user_id):
+    key = VERSION_KEY.format(user_id)
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, seed(), timeout=None)
+        value = cache.get(key)
+    return value
+
+
+def seed():
+    # valor inicial de una version perdida o nueva: mayor que cualquiera anterior
+    return time.time_ns()
+
+
+def get(user_id, current_version):
+    with _lock:
+        entry = _entries.get(user_id)
+        if entry is not None:
+            expires_at, entry_version, user, user_fingerprint = entry
+            if expires_at < time.monotonic() or entry_version != current_version:
+                del _entries[user_id]
+                entry = None
+            else:
+                _entries.move_to_end(user_id)
+    metrics.cache_result('auth_user', entry is not None)
+    if entry is None:
+        return None
+    return user, user_fingerprint
+
+
+def put(user_id, current_version, user, user_fingerprint):
+    ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+    size = getattr(settings, 'AUTH_USER_CACHE_SIZE', 10000)
+    with _lock:
+        _entries[user_id] = (time.monotonic() + ttl, current_version, user, user_fingerprint)
+        _entries.move_to_end(user_id)
+        while len(_entries) > size:
+            _entries.popitem(last=False)
+
+
+def invalidate(user_id):
+    with _lock:
+        _entries.pop(user_id, None)
+    # despues del commit, para que nadie vuelva a cachear el usuario de antes del cambio
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def _bump(user_id):
+    key = VERSION_KEY.format(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # una version recien sembrada ya es distinta de la que tenian las entradas viejas
+        cache.add(key, seed(), timeout=None)
+    with _lock:
+        _entries.pop(user_id, None)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
@@ -1,11 +1,16 @@
 from django.contrib.auth import authenticate
+from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
 
-from .serializers import LoginSerializer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.users.models import User
+from .serializers import LoginSerializer, LogoutSerializer, TokenRefreshSerializer
+from .tokens import RoleRefreshToken
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
@@ -56,7 +61,7 @@ class LoginView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
 
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
 
         return Response({
             "access": str(refresh.access_token),
@@ -70,3 +75,85 @@ class LoginView(APIView):
                 
             }
         })
+
+
+
+# Renovacion de tokens
+# El refresh usado queda en la lista negra y se emite uno nuevo con el rol y la huella
+# actuales, asi un cliente rechazado con token_outdated se recupera sin volver a loguearse.
+class RefreshView(APIView):
+
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Renovar tokens",
+        operation_description="Recibe un refresh token vigente y retorna un access y un refresh nuevos. El refresh recibido deja de servir",
+        request_body=TokenRefreshSerializer,
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'access': openapi.Schema(type=openapi.TYPE_STRING),
+                    'refresh': openapi.Schema(type=openapi.TYPE_STRING),
+                }
+            ),
+            401: "Token inválido, expirado o ya utilizado"
+        },
+        tags=["Auth"]
+    )
+    def post(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            refresh = RoleRefreshToken(serializer.validated_data['refresh'])
+        except TokenError:
+            return Response({"detail": "Token inválido o expirado"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        user = (
+            User.objects.select_related('role')
+            .filter(**{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}, is_active=True)
+            .first()
+        )
+        if user is None:
+            return Response({"detail": "Usuario no encontrado o inactivo"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        with transaction.atomic():
+            # si dos peticiones usan el mismo refresh a la vez, solo una lo pasa a la lista negra
+            _, created = refresh.blacklist()
+            if not created:
+                return Response({"detail": "Token inválido o expirado"}, status=status.HTTP_401_UNAUTHORIZED)
+            new_refresh = RoleRefreshToken.for_user(user)
+
+        return Response({
+            "access": str(new_refresh.access_token),
+            "refresh": str(new_refresh),
+        })
+
+
+# Cierre de sesion: el refresh token recibido pasa a la lista negra
+class LogoutView(APIView):
+
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="Logout de usuario",
+        operation_description="Invalida el refresh token recibido",
+        request_body=LogoutSerializer,
+        responses={
+            205: "Sesión cerrada",
+            401: "Token inválido o expirado"
+        },
+        tags=["Auth"]
+    )
+    def post(self, request):
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            refresh = RoleRefreshToken(serializer.validated_data['refresh'])
+        except TokenError:
+            return Response({"detail": "Token inválido o expirado"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        refresh.blacklist()
+        return Response(status=status.HTTP_205_RESET_CONTENT)
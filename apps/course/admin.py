@@ -1,5 +1,5 @@
 from django.contrib import admin
-from apps.course.models import Course, Category ,Lesson, LessonProgress, Enrollment, Review
+from apps.course.models import Course, Category ,Lesson, LessonProgress, Enrollment, Review, CourseStats, CourseDailyStats
 
 
 
@@ -9,5 +9,7 @@ admin.site.register(Lesson)
 admin.site.register(LessonProgress)
 admin.site.register(Enrollment)
 admin.site.register(Review)
+admin.site.register(CourseStats)
+admin.site.register(CourseDailyStats)
 
 
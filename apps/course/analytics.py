@@ -0,0 +1,144 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Exists, OuterRef
+from django.utils import timezone
+
+from .models import CourseDailyStats, LearnerActivity, Lesson, LessonProgress, RollupWatermark
+
+
+# Actividad diaria de los estudiantes.
+# Cada guardado de progreso registra (curso, estudiante, dia) una sola vez por dia y el
+# rollup cuenta esas filas por curso y dia en CourseDailyStats, de modo que las analiticas
+# leen filas ya agregadas y nunca recorren Enrollment ni LessonProgress.
+
+ACTIVITY_WATERMARK = 'learner_activity'
+
+# pares ya registrados hoy por este proceso, para no repetir el INSERT en cada latido
+_recorded = set()
+_recorded_day = None
+_recorded_lock = threading.Lock()
+
+
+def record_activity(pairs):
+    # pairs: [(student_id, lesson_id)] con progreso guardado ahora
+    global _recorded_day
+
+    today = timezone.localdate()
+    lesson_courses = dict(
+        Lesson.objects.filter(id__in={lesson_id for _, lesson_id in pairs}).values_list('id', 'course_id')
+    )
+    keys = {
+        (lesson_courses[lesson_id], student_id)
+        for student_id, lesson_id in pairs
+        if lesson_id in lesson_courses
+    }
+
+    with _recorded_lock:
+        if _recorded_day != today:
+            _recorded.clear()
+            _recorded_day = today
+        keys -= _recorded
+    if not keys:
+        return
+
+    LearnerActivity.objects.bulk_create(
+        [LearnerActivity(course_id=course_id, student_id=student_id, day=today) for course_id, student_id in keys],
+        ignore_conflicts=True,
+    )
+    transaction.on_commit(lambda: _remember(today, keys))
+
+
+def _remember(day, keys):
+    with _recorded_lock:
+        if _recorded_day == day:
+            _recorded.update(keys)
+
+
+def rollup_activity(batch_size=5000):
+    with transaction.atomic():
+        watermark, created = RollupWatermark.objects.get_or_create(name=ACTIVITY_WATERMARK)
+        # una sola ejecucion a la vez; la siguiente espera y vuelve a contar
+        watermark = RollupWatermark.objects.select_for_update().get(name=ACTIVITY_WATERMARK)
+
+        activity = LearnerActivity.objects.all()
+        if not created:
+            activity = activity.filter(day__gte=_recount_since(watermark))
+        active = (
+            activity.values('course_id', 'day')
+            .annotate(active=Count('id'))
+            .order_by()
+            .values_list('course_id', 'day', 'active')
+        )
+
+        processed = 0
+        course_days = set()
+        batch = []
+        for course_id, day, count in active.iterator(chunk_size=batch_size):
+            batch.append(CourseDailyStats(course_id=course_id, day=day, active_learners=count))
+            course_days.add((course_id, day))
+            processed += count
+            if len(batch) >= batch_size:
+                _save_active_learners(batch)
+                batch = []
+        if batch:
+            _save_active_learners(batch)
+        _refresh_average_progress(course_days)
+
+        # updated_at marca hasta donde quedo contado (ver _recount_since)
+        watermark.save(update_fields=['updated_at'])
+    return processed
+
+
+# Cada ejecucion vuelve a contar desde la fecha de la anterior menos ROLLUP_ACTIVITY_LAG_DAYS.
+# El conteo sale de las filas de actividad y reemplaza al anterior, asi que repetir un dia no
+# suma dos veces, y una transaccion que confirma tarde (con un id menor que otros ya contados)
+# entra en la ejecucion siguiente mientras su dia siga dentro de la ventana.
+def _recount_since(watermark):
+    lag = getattr(settings, 'ROLLUP_ACTIVITY_LAG_DAYS', 1)
+    return timezone.localdate(watermark.updated_at) - timedelta(days=lag)
+
+
+def _save_active_learners(rows):
+    # solo se pisa active_learners: inscripciones, bajas y completados los suma stats.bump_daily
+    CourseDailyStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['course', 'day'],
+        update_fields=['active_learners'],
+    )
+
+
+# Promedio de progreso de los estudiantes activos hoy en cada curso con actividad.
+# Solo se escribe el dia actual: los dias pasados conservan el ultimo valor que tuvieron, y
+# el promedio recorre solo el progreso de quienes tienen actividad hoy en el curso.
+def _refresh_average_progress(course_days):
+    today = timezone.localdate()
+    course_ids = {course_id for course_id, day in course_days if day == today}
+    if not course_ids:
+        return
+
+    active_today = LearnerActivity.objects.filter(
+        course_id=OuterRef('lesson__course_id'), student_id=OuterRef('student_id'), day=today)
+    averages = (
+        LessonProgress.objects.filter(lesson__course_id__in=course_ids)
+        .filter(Exists(active_today))
+        .values('lesson__course_id')
+        .annotate(average=Avg('progress'))
+        .values_list('lesson__course_id', 'average')
+    )
+    for course_id, average in averages:
+        if average is not None:
+            CourseDailyStats.objects.filter(course_id=course_id, day=today).update(
+                average_progress=round(average, 2))
+
+
+def prune_activity():
+    # los dias que ya quedaron fuera de la ventana de la ultima ejecucion no se vuelven a contar
+    watermark = RollupWatermark.objects.filter(name=ACTIVITY_WATERMARK).first()
+    if watermark is None:
+        return 0
+    deleted, _ = LearnerActivity.objects.filter(day__lt=_recount_since(watermark)).delete()
+    return deleted
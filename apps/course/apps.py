@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CourseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.course'
+
+    def ready(self):
+        from . import checks, signals
+        # registra el check de las replicas (ver gestion_cursos_back/replicas.py)
+        from gestion_cursos_back import replicas
@@ -0,0 +1,99 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from gestion_cursos_back import metrics
+
+
+# Cache de respuestas del catalogo publico.
+# Cada entrada se guarda bajo la version actual del catalogo; al escribir un curso o una
+# leccion se incrementa la version y las entradas viejas quedan inalcanzables (expiran solas).
+# Los cambios de estadisticas no cambian la version en el momento: marcan el catalogo como
+# desactualizado y la version se incrementa en la primera lectura pasados
+# CATALOG_STATS_MAX_AGE segundos, asi una racha de inscripciones invalida una sola vez.
+# Funciona con LocMemCache y con cualquier cache compartido (Redis, Memcached, base de datos).
+
+VERSION_KEY = 'catalog:version'
+STATS_CHANGED_KEY = 'catalog:stats-changed'
+HITS_KEY = 'catalog:hits'
+MISSES_KEY = 'catalog:misses'
+
+
+def get_version():
+    values = cache.get_many([VERSION_KEY, STATS_CHANGED_KEY])
+    version = values.get(VERSION_KEY)
+    if version is None:
+        # se parte de la hora actual: si la clave se pierde, la nueva version
+        # nunca coincide con una anterior que aun tenga entradas guardadas
+        cache.add(VERSION_KEY, int(time.time()), timeout=None)
+        version = cache.get(VERSION_KEY)
+
+    changed_at = values.get(STATS_CHANGED_KEY)
+    if changed_at is not None and time.time() - changed_at >= getattr(settings, 'CATALOG_STATS_MAX_AGE', 10):
+        # si dos procesos llegan a la vez la version sube dos veces, que no hace daño
+        cache.delete(STATS_CHANGED_KEY)
+        incr_version()
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    # despues del commit, para que nadie vuelva a guardar datos de antes de la escritura
+    transaction.on_commit(incr_version)
+
+
+def stats_changed():
+    # add: se conserva la marca del primer cambio pendiente
+    transaction.on_commit(lambda: cache.add(STATS_CHANGED_KEY, time.time(), timeout=None))
+
+
+def incr_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_version()
+
+
+def key_for(request):
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    return f'catalog:v{get_version()}:{digest}'
+
+
+def lookup(key):
+    data = cache.get(key)
+    _incr(MISSES_KEY if data is None else HITS_KEY)
+    metrics.cache_result('catalog', data is not None)
+    return data
+
+
+def store(key, data):
+    cache.set(key, data, timeout=getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300))
+
+
+def stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'version': get_version(),
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # la clave no existe todavia (o expiro en un cache con politica LRU)
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
@@ -0,0 +1,25 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+
+# Las versiones del catalogo, de los usuarios y sus permisos y la lista negra de tokens se
+# coordinan entre procesos a traves del cache 'default'. Con LocMemCache cada worker tiene
+# el suyo: un curso editado, un usuario desactivado o un token revocado en un proceso sigue
+# valiendo en los demas.
+
+
+def _local_cache():
+    return isinstance(caches['default'], LocMemCache)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if _local_cache():
+        return [Error(
+            'El cache por defecto es LocMemCache: las invalidaciones del catalogo, usuarios, '
+            'permisos y tokens no llegan a los demas workers.',
+            hint='Configure CACHE_URL (redis:// o dbcache://) para desplegar con varios workers.',
+            id='course.E001',
+        )]
+    return []
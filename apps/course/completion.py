@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from django.db.models import F
+from django.utils import timezone
+
+from . import stats
+from .models import CourseStats, Enrollment, Lesson, LessonProgress
+
+
+# Avance de cada inscripcion.
+# Enrollment.completed_lessons se mueve de a pasos (UPDATE ... SET x = x + n) cuando una
+# leccion pasa a completada o se borra una leccion ya completada, y el total del curso vive
+# en CourseStats.lesson_count. Nunca se recuenta el progreso de un estudiante: cuando el
+# contador alcanza el total, la inscripcion activa pasa sola a completada.
+# Las funciones se llaman dentro de la transaccion de la escritura que las origina.
+
+
+def lessons_completed(pairs):
+    # pairs: [(student_id, lesson_id)] que acaban de pasar a completed
+    if not pairs:
+        return
+
+    lesson_courses = dict(
+        Lesson.objects.filter(id__in={lesson_id for _, lesson_id in pairs}).values_list('id', 'course_id')
+    )
+    per_enrollment = defaultdict(int)
+    for student_id, lesson_id in pairs:
+        if lesson_id in lesson_courses:
+            per_enrollment[(lesson_courses[lesson_id], student_id)] += 1
+
+    # un UPDATE por curso y cantidad; en la practica casi siempre es 1 leccion por estudiante
+    groups = defaultdict(list)
+    for (course_id, student_id), count in per_enrollment.items():
+        groups[(course_id, count)].append(student_id)
+
+    now = timezone.now()
+    for (course_id, count), student_ids in groups.items():
+        Enrollment.objects.filter(course_id=course_id, student_id__in=student_ids).update(
+            completed_lessons=F('completed_lessons') + count, updated_at=now)
+
+    students_by_course = defaultdict(list)
+    for course_id, student_id in per_enrollment:
+        students_by_course[course_id].append(student_id)
+    for course_id, student_ids in students_by_course.items():
+        complete_reached(course_id, student_ids)
+
+
+def lessons_added(course_id, count=1):
+    stats.bump(course_id, lesson_count=count)
+
+
+def lesson_removed(lesson):
+    # antes de borrar la leccion, mientras aun existen sus filas de progreso
+    finished_by = LessonProgress.objects.filter(lesson=lesson, completed=True).values('student_id')
+    Enrollment.objects.filter(course_id=lesson.course_id, student_id__in=finished_by).update(
+        completed_lessons=F('completed_lessons') - 1, updated_at=timezone.now())
+    stats.bump(lesson.course_id, lesson_count=-1)
+
+    # con una leccion menos, quienes tenian todas las demas terminan el curso
+    complete_reached(lesson.course_id)
+
+
+def complete_reached(course_id, student_ids=None):
+    total = CourseStats.objects.filter(course_id=course_id).values_list('lesson_count', flat=True).first()
+    if not total:
+        return 0
+
+    enrollments = Enrollment.objects.filter(
+        course_id=course_id, status=Enrollment.STATUS_ACTIVE, completed_lessons__gte=total)
+    if student_ids is not None:
+        enrollments = enrollments.filter(student_id__in=student_ids)
+
+    # el filtro por status hace de compare-and-set: cada inscripcion se cuenta una sola vez
+    completed = enrollments.update(status=Enrollment.STATUS_COMPLETED, updated_at=timezone.now())
+    stats.enrollments_completed(course_id, completed)
+    return completed
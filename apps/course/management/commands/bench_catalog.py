@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.course.models import Category, Course, Lesson
+from apps.course.views import CourseListAPIView, CourseListByIntructorAPIView
+from apps.users.models import Role, User
+
+
+# Mide queries y latencia del catalogo para distintos tamaños.
+# Todo se crea dentro de una transaccion que se revierte al final,
+# asi que se puede correr contra cualquier base sin dejar datos.
+class Command(BaseCommand):
+    help = 'Benchmark de queries y latencia del listado de cursos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 10000])
+        parser.add_argument('--lessons', type=int, default=3, help='Lecciones por curso')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        try:
+            for size in options['sizes']:
+                with transaction.atomic():
+                    instructor = self._seed(size, options['lessons'])
+                    self._report(size, instructor, options['repeat'])
+                    transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+    def _seed(self, size, lessons_per_course):
+        role, _ = Role.objects.get_or_create(name='instructor')
+        instructor = User.objects.create(
+            email='bench-catalog@example.com', first_name='Bench', last_name='Catalog', role=role)
+        category = Category.objects.create(name='programacion')
+
+        courses = Course.objects.bulk_create(
+            Course(
+                title=f'Curso {i}',
+                description='Descripcion de prueba',
+                status='publicado',
+                category=category,
+                instructor=instructor,
+            )
+            for i in range(size)
+        )
+        Lesson.objects.bulk_create(
+            Lesson(course=course, title=f'Leccion {order}', content='x' * 200, order=order)
+            for course in courses
+            for order in range(1, lessons_per_course + 1)
+        )
+        return instructor
+
+    def _report(self, size, instructor, repeat):
+        factory = APIRequestFactory()
+        cases = [
+            ('list page=1', CourseListAPIView, {}),
+            ('list paginate=false', CourseListAPIView, {'paginate': 'false'}),
+            ('list_by_instructor page=1', CourseListByIntructorAPIView, {}),
+        ]
+        for label, view_class, params in cases:
+            view = view_class.as_view()
+            timings = []
+            queries = 0
+            for _ in range(repeat):
+                request = factory.get('/course/list/', params)
+                force_authenticate(request, user=instructor)
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    response = view(request)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    else:
+                        response.render()
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries = len(ctx.captured_queries)
+            timings.sort()
+            self.stdout.write(
+                f'{size:>7} cursos | {label:<26} | {queries:>3} queries | '
+                f'mediana {timings[len(timings) // 2]:8.2f} ms | max {timings[-1]:8.2f} ms'
+            )
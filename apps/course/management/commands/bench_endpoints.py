@@ -0,0 +1,98 @@
+import json
+import math
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from gestion_cursos_back.benchmark import BUDGET_DIR, Fixtures, Runner, api_routes, load_budgets, save_budget
+
+
+# Recorre todas las rutas de la API con los presupuestos de benchmarks/ contra la base
+# actual (cargada con seed_data; los presupuestos se tomaron con --users 5000 --courses 300)
+# y falla si alguna peticion supera su presupuesto de queries o de latencia, cambia de
+# status o si hay rutas sin presupuesto. Con --write-budgets guarda lo medido como nuevo
+# presupuesto.
+class Command(BaseCommand):
+    help = 'Benchmark de todos los endpoints contra sus presupuestos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budgets', default=str(BUDGET_DIR), help='Directorio de presupuestos')
+        parser.add_argument('--only', nargs='+', default=[], help='Nombres de presupuesto a correr')
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Margen sobre la latencia (0.2 = 20%%)')
+        parser.add_argument('--query-tolerance', type=int, default=0, help='Queries de mas permitidas')
+        parser.add_argument('--write-budgets', action='store_true')
+        parser.add_argument('--headroom', type=float, default=2.0, help='Factor sobre la latencia medida al guardar')
+        parser.add_argument('--min-latency', type=int, default=10, help='Presupuesto minimo de p95 al guardar (ms)')
+        parser.add_argument('--json', dest='json_output', help='Archivo donde guardar los resultados')
+
+    def handle(self, *args, **options):
+        budgets = load_budgets(options['budgets'])
+        covered = {budget['route'] for budget in budgets}
+        missing = [route for route in api_routes() if route not in covered]
+        if options['only']:
+            budgets = [budget for budget in budgets if budget['name'] in options['only']]
+        if not budgets:
+            raise CommandError('No hay presupuestos para correr')
+
+        setup_test_environment()
+        results = []
+        failures = []
+        try:
+            with transaction.atomic():
+                try:
+                    fixtures = Fixtures.prepare()
+                except ValueError as error:
+                    raise CommandError(str(error))
+                runner = Runner(fixtures, iterations=options['iterations'], warmup=options['warmup'])
+
+                for budget in budgets:
+                    measurement = runner.measure(budget)
+                    if options['write_budgets']:
+                        self._update(budget, measurement, options['headroom'], options['min_latency'])
+                        problems = []
+                    else:
+                        problems = measurement.violations(options['tolerance'], options['query_tolerance'])
+                        # una pausa del sistema puede inflar la latencia: se confirma midiendo de nuevo
+                        if problems:
+                            measurement = runner.measure(budget)
+                            problems = measurement.violations(options['tolerance'], options['query_tolerance'])
+
+                    summary = measurement.summary()
+                    results.append(summary)
+                    failures.extend(f'{budget["name"]}: {problem}' for problem in problems)
+                    self.stdout.write(self._line(summary, problems))
+
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        if options['json_output']:
+            with open(options['json_output'], 'w', encoding='utf-8') as handle:
+                json.dump(results, handle, indent=2)
+
+        failures.extend(f'{route}: sin presupuesto' for route in missing)
+        if failures:
+            raise CommandError('\n'.join(failures))
+
+    def _update(self, budget, measurement, headroom, min_latency):
+        # p99 con pocas iteraciones es el maximo y varia mucho: solo se guarda p95
+        summary = measurement.summary()
+        budget['status'] = summary['status']
+        budget['budget'] = {
+            'queries': summary['queries'],
+            'p95_ms': max(math.ceil(summary['p95_ms'] * headroom), min_latency),
+        }
+        save_budget(budget)
+
+    def _line(self, summary, problems):
+        line = (
+            f'{"FAIL" if problems else "OK  "} {summary["name"]:<34} {summary["status"]} '
+            f'p50={summary["p50_ms"]:.1f}ms p95={summary["p95_ms"]:.1f}ms p99={summary["p99_ms"]:.1f}ms '
+            f'queries={summary["queries"]} bytes={summary["bytes"]} peak={summary["peak_memory_kb"]}KB'
+        )
+        if problems:
+            line += '  <- ' + '; '.join(problems)
+        return line
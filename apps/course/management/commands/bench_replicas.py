@@ -0,0 +1,145 @@
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from apps.authentication.tokens import RoleRefreshToken
+from apps.users.models import User
+from gestion_cursos_back import replicas
+from gestion_cursos_back.benchmark import Fixtures, Runner, load_budgets
+
+
+# Reparto de queries entre default y las replicas con una mezcla de lecturas y escrituras.
+# Usa los presupuestos de benchmarks/ como peticiones: los GET se reparten entre el
+# estudiante de prueba y --readers estudiantes mas, y cada tanto una escritura de
+# WRITES. Corre la misma secuencia sin replicas y con replicas, cuenta las queries por alias
+# y verifica que quien acaba de escribir no lea de una replica.
+# Para probarlo con SQLite: copiar el archivo de la base, DB_REPLICA_URLS=sqlite:////ruta/copia
+# y un cache compartido que no pase por la base, p. ej. CACHE_URL=filecache:///ruta/cache.
+
+WRITES = ('course_update', 'enrollment_update', 'lesson_progress_heartbeat', 'review_update')
+
+
+class _AliasCounter:
+
+    def __init__(self, alias, counts):
+        self.alias = alias
+        self.counts = counts
+
+    def __call__(self, execute, sql, params, many, context):
+        # los savepoints que revierten cada peticion son del benchmark, no de la aplicacion
+        if not sql.startswith(('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')):
+            self.counts[self.alias] += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark de carga de la base principal con y sin replicas de lectura'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--write-ratio', type=float, default=0.1)
+        parser.add_argument('--readers', type=int, default=50, help='Estudiantes extra que solo leen')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        aliases = replicas.replicas()
+        if not aliases:
+            raise CommandError('No hay replicas configuradas (DATABASE_REPLICAS / DB_REPLICA_URLS)')
+
+        budgets = {budget['name']: budget for budget in load_budgets()}
+        reads = [budget for budget in budgets.values() if budget.get('method', 'GET') == 'GET' and budget.get('user')]
+        writes = [budgets[name] for name in WRITES if name in budgets]
+
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                try:
+                    fixtures = Fixtures.prepare()
+                except ValueError as error:
+                    raise CommandError(str(error))
+                readers = self._readers(fixtures, options['readers'])
+                writes = [budget for budget in writes if budget['user'] in fixtures.tokens]
+                plan = self._plan(reads, writes, readers, options)
+
+                with override_settings(DATABASE_REPLICAS=[]):
+                    # una pasada previa para que las dos mediciones arranquen con los caches llenos
+                    self._run(fixtures, plan)
+                    baseline, _, _ = self._run(fixtures, plan)
+                with_replicas, sticky_reads, stale_reads = self._run(fixtures, plan)
+
+                transaction.set_rollback(True)
+        finally:
+            teardown_test_environment()
+
+        self._report(baseline, with_replicas, aliases, sticky_reads, stale_reads, len(plan))
+        if stale_reads:
+            raise CommandError(f'{stale_reads} lecturas de replica justo despues de escribir')
+
+    def _readers(self, fixtures, count):
+        users = list(
+            User.objects.filter(is_active=True, role__name='estudiante')
+            .exclude(pk__in=[user.pk for user in fixtures.users.values()])
+            .order_by('id')[:count]
+        )
+        for user in users:
+            fixtures.tokens[f'reader_{user.pk}'] = str(RoleRefreshToken.for_user(user).access_token)
+            fixtures.users[f'reader_{user.pk}'] = user
+        return ['student'] + [f'reader_{user.pk}' for user in users]
+
+    def _plan(self, reads, writes, readers, options):
+        rng = random.Random(options['seed'])
+        plan = []
+        for _ in range(options['requests']):
+            if writes and rng.random() < options['write_ratio']:
+                budget = rng.choice(writes)
+                plan.append((budget, budget['user']))
+                continue
+            budget = rng.choice(reads)
+            user = rng.choice(readers) if budget['user'] == 'student' else budget['user']
+            plan.append((budget, user))
+        return plan
+
+    def _run(self, fixtures, plan):
+        for user in fixtures.users.values():
+            cache.delete(replicas.WROTE_KEY.format(user.pk))
+
+        runner = Runner(fixtures)
+        counts = Counter()
+        sticky = getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 10)
+        wrote = {}
+        sticky_reads = 0
+        stale_reads = 0
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(_AliasCounter(alias, counts)))
+            for budget, user in plan:
+                replica_queries = sum(counts[alias] for alias in replicas.replicas())
+                started = time.monotonic()
+                _, _, status, _ = runner.request({**budget, 'user': user})
+                if budget.get('method', 'GET') != 'GET':
+                    if status < 400:
+                        wrote[user] = time.monotonic()
+                elif started - wrote.get(user, -sticky) < sticky:
+                    sticky_reads += 1
+                    if sum(counts[alias] for alias in replicas.replicas()) > replica_queries:
+                        stale_reads += 1
+        return counts, sticky_reads, stale_reads
+
+    def _report(self, baseline, with_replicas, aliases, sticky_reads, stale_reads, total):
+        self.stdout.write(f'{total} peticiones')
+        for label, counts in (('sin replicas', baseline), ('con replicas', with_replicas)):
+            queries = sum(counts.values())
+            detail = ', '.join(f'{alias}={counts[alias]}' for alias in ['default', *aliases])
+            self.stdout.write(f'  {label:<13} queries={queries} ({detail})')
+
+        before, after = baseline['default'], with_replicas['default']
+        reduction = (before - after) / before * 100 if before else 0
+        self.stdout.write(f'  queries en default: {before} -> {after} ({reduction:.1f}% menos)')
+        self.stdout.write(f'  lecturas despues de escribir: {sticky_reads}, de una replica: {stale_reads}')
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.course import cache as catalog_cache
+
+
+class Command(BaseCommand):
+    help = 'Muestra la version y los aciertos/fallos del cache del catalogo'
+
+    def handle(self, *args, **options):
+        for name, value in catalog_cache.stats().items():
+            self.stdout.write(f'{name}: {value}')
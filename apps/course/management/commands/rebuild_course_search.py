@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.course.search import rebuild_search_documents
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el documento de busqueda de todos los cursos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = rebuild_search_documents(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} cursos reindexados'))
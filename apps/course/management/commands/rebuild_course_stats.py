@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.course.stats import rebuild_course_stats
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero las estadisticas de todos los cursos para corregir desfaces'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total = rebuild_course_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} cursos recalculados'))
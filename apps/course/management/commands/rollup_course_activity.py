@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.course.analytics import prune_activity, rollup_activity
+
+
+# Pensado para correr seguido (por ejemplo cada pocos minutos desde cron):
+# solo vuelve a contar los dias desde la ejecucion anterior (ver ROLLUP_ACTIVITY_LAG_DAYS).
+class Command(BaseCommand):
+    help = 'Suma la actividad nueva de estudiantes al resumen diario por curso'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--no-prune', action='store_true', help='No borrar la actividad de los dias que ya no se vuelven a contar')
+
+    def handle(self, *args, **options):
+        processed = rollup_activity(batch_size=options['batch_size'])
+        pruned = 0 if options['no_prune'] else prune_activity()
+        self.stdout.write(self.style.SUCCESS(f'{processed} registros de actividad procesados, {pruned} borrados'))
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.course.seeding import seed
+from apps.users.models import User
+
+
+# Ejemplo de un conjunto de ~10M de filas:
+#   manage.py seed_data --users 200000 --courses 5000 --lessons 20 --enrollments 5 --workers 8
+# Con SQLite siempre usa un solo proceso.
+class Command(BaseCommand):
+    help = 'Genera datos sinteticos (usuarios, cursos, lecciones, inscripciones, progreso y reseñas) para pruebas de rendimiento'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--courses', type=int, default=500)
+        parser.add_argument('--lessons', type=int, default=12, help='Lecciones promedio por curso')
+        parser.add_argument('--enrollments', type=float, default=3.0, help='Inscripciones promedio por estudiante')
+        parser.add_argument('--review-rate', type=float, default=0.15, help='Proporción de inscripciones con reseña')
+        parser.add_argument('--zipf', type=float, default=1.1, help='Exponente de la popularidad de los cursos')
+        parser.add_argument('--days', type=int, default=730, help='Días de historia')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=1, help='Procesos para generar inscripciones (solo PostgreSQL)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='seed', help='Prefijo de los emails generados')
+        parser.add_argument('--password', default='password123', help='Contraseña de todos los usuarios generados')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email__startswith=f'{options["prefix"]}-').exists():
+            raise CommandError(f'Ya hay usuarios con el prefijo "{options["prefix"]}", use otro con --prefix')
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stdout.write('SQLite no admite escrituras concurrentes: se usa un solo proceso')
+
+        def progress(phase, result):
+            self.stdout.write(f'{phase}: {result.rows} filas en {result.elapsed:.1f}s ({result.rows / max(result.elapsed, 1e-9):.0f} filas/s)')
+
+        result = seed(
+            users=options['users'],
+            courses=options['courses'],
+            lessons=options['lessons'],
+            enrollments=options['enrollments'],
+            review_rate=options['review_rate'],
+            zipf=options['zipf'],
+            days=options['days'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            random_seed=options['seed'],
+            prefix=options['prefix'],
+            password=options['password'],
+            progress=progress,
+        )
+
+        for name, total in sorted(result.counts.items()):
+            self.stdout.write(f'  {name}: {total}')
+        self.stdout.write(self.style.SUCCESS(f'{result.rows} filas generadas en {result.elapsed:.1f}s'))
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(choices=[('programacion', 'Programación y Desarrollo de Software'), ('data_science', 'Data Science e Inteligencia Artificial'), ('cloud_computing', 'Cloud Computing y DevOps'), ('ciberseguridad', 'Ciberseguridad'), ('diseno_ux_ui', 'Diseño y UX/UI'), ('startups', 'Startups'), ('finanzas', 'Finanzas e Inversiones'), ('ingles', 'Inglés'), ('habilidades_blandas', 'Habilidades Blandas'), ('videojuegos', 'Videojuegos'), ('hardware_robotica', 'Hardware, Robótica e IoT'), ('blockchain', 'Blockchain y Criptomonedas'), ('produccion_audiovisual', 'Producción Audiovisual y Contenido Digital'), ('marketing_digital', 'Marketing Digital')], default='programacion', max_length=50)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Enrollment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrolled_at', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(choices=[('activo', 'Activo'), ('completado', 'Completado'), ('cancelado', 'Cancelado')], default='activo', max_length=20)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Lesson',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LessonProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('progress', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Review',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveSmallIntegerField()),
+                ('comment', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('status', models.CharField(choices=[('borrador', 'Borrador'), ('archivado', 'Archivado'), ('publicado', 'Publicado')], default='borrador', max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('search_document', models.TextField(blank=True, default='', editable=False)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='course.category')),
+            ],
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('course', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='instructor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='courses_created', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to='course.course'),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollments', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to='course.course'),
+        ),
+        migrations.AddField(
+            model_name='lessonprogress',
+            name='lesson',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lessons_progress', to='course.lesson'),
+        ),
+        migrations.AddField(
+            model_name='lessonprogress',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='course.course'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='student',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='enrollment',
+            unique_together={('student', 'course')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='lessonprogress',
+            unique_together={('student', 'lesson')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='review',
+            unique_together={('student', 'course')},
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.course.operations import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('course', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True), ('status', 'publicado')), fields=['created_at', 'id'], name='course_published_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='course',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['instructor', 'created_at', 'id'], name='course_instructor_active_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='enrollment',
+            index=models.Index(fields=['student', '-enrolled_at', '-id'], name='enrollment_student_recent_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='enrollment',
+            index=models.Index(fields=['course', '-enrolled_at', '-id'], name='enrollment_course_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:07
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Renumera solo los cursos con orders repetidos y deja el contador de cada curso
+# en el mayor order existente, para poder crear la restriccion unica.
+def fix_lesson_orders(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    Lesson = apps.get_model('course', 'Lesson')
+
+    duplicated = (
+        Lesson.objects.values('course_id', 'order')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .values_list('course_id', flat=True)
+        .distinct()
+    )
+    for course_id in list(duplicated):
+        lessons = list(Lesson.objects.filter(course_id=course_id).order_by('order', 'id'))
+        for index, lesson in enumerate(lessons, start=1):
+            lesson.order = index
+        Lesson.objects.bulk_update(lessons, ['order'])
+
+    last_order = Lesson.objects.filter(course_id=OuterRef('pk')).values('course_id').annotate(last=Max('order')).values('last')
+    Course.objects.update(last_lesson_order=Coalesce(Subquery(last_order), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='last_lesson_order',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fix_lesson_orders, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lesson',
+            constraint=models.UniqueConstraint(fields=('course', 'order'), name='lesson_course_order_unique'),
+        ),
+    ]
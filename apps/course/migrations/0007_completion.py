@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:13
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Carga inicial de los contadores: total de lecciones por curso y lecciones
+# completadas por inscripcion. Los estados de las inscripciones no se tocan.
+def fill_counters(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    CourseStats = apps.get_model('course', 'CourseStats')
+    Enrollment = apps.get_model('course', 'Enrollment')
+    Lesson = apps.get_model('course', 'Lesson')
+    LessonProgress = apps.get_model('course', 'LessonProgress')
+
+    CourseStats.objects.bulk_create(
+        [CourseStats(course_id=course_id) for course_id in Course.objects.filter(stats__isnull=True).values_list('id', flat=True)],
+        ignore_conflicts=True,
+    )
+
+    lessons = Lesson.objects.filter(course_id=OuterRef('course_id')).values('course_id').annotate(total=Count('id')).values('total')
+    CourseStats.objects.update(lesson_count=Coalesce(Subquery(lessons), 0))
+
+    completed = (
+        LessonProgress.objects.filter(student_id=OuterRef('student_id'), lesson__course_id=OuterRef('course_id'), completed=True)
+        .values('student_id')
+        .annotate(total=Count('id'))
+        .values('total')
+    )
+    Enrollment.objects.update(completed_lessons=Coalesce(Subquery(completed), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0006_lesson_order_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='lesson_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+# Carga inicial del resumen diario con lo que se puede reconstruir de Enrollment:
+# inscripciones por fecha de alta y cancelaciones/completados por su ultima modificacion.
+# Desde aqui en adelante los contadores se suman en el momento.
+def fill_daily_stats(apps, schema_editor):
+    CourseDailyStats = apps.get_model('course', 'CourseDailyStats')
+    Enrollment = apps.get_model('course', 'Enrollment')
+
+    rows = {}
+
+    def add(queryset, date_field, counter):
+        grouped = (
+            queryset.annotate(day=TruncDate(date_field))
+            .values('course_id', 'day')
+            .annotate(total=Count('id'))
+        )
+        for row in grouped:
+            key = (row['course_id'], row['day'])
+            if key not in rows:
+                rows[key] = CourseDailyStats(course_id=row['course_id'], day=row['day'])
+            setattr(rows[key], counter, row['total'])
+
+    add(Enrollment.objects.all(), 'enrolled_at', 'new_enrollments')
+    add(Enrollment.objects.filter(status='cancelado'), 'updated_at', 'cancellations')
+    add(Enrollment.objects.filter(status='completado'), 'updated_at', 'completions')
+
+    CourseDailyStats.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0007_completion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('new_enrollments', models.IntegerField(default=0)),
+                ('cancellations', models.IntegerField(default=0)),
+                ('completions', models.IntegerField(default=0)),
+                ('active_learners', models.IntegerField(default=0)),
+                ('average_progress', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='course.course')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('course', 'day'), name='course_daily_stats_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='LearnerActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='course.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('course', 'student', 'day'), name='learner_activity_unique')],
+            },
+        ),
+        migrations.RunPython(fill_daily_stats, migrations.RunPython.noop),
+    ]
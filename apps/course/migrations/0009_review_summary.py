@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:17
+
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Carga inicial del histograma desde las reseñas existentes
+def fill_rating_histogram(apps, schema_editor):
+    CourseStats = apps.get_model('course', 'CourseStats')
+    Review = apps.get_model('course', 'Review')
+
+    def count(stars):
+        return Coalesce(Subquery(
+            Review.objects.filter(course_id=OuterRef('course_id'), rating=stars)
+            .values('course_id')
+            .annotate(total=Count('id'))
+            .values('total')
+        ), 0)
+
+    CourseStats.objects.update(**{f'rating_{stars}': count(stars) for stars in range(1, 6)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0008_daily_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_1',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_2',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_3',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_4',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_5',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='rating',
+            field=models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)]),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['course', '-created_at', '-id'], name='review_course_recent_idx'),
+        ),
+        migrations.RunPython(fill_rating_histogram, migrations.RunPython.noop),
+    ]
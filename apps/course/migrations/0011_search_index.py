@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:33
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from apps.course.operations import AddIndexConcurrentlyIfSupported
+
+
+FTS_TABLE = 'course_course_fts'
+
+
+# los indices de busqueda antes se creaban en post_migrate con estos mismos nombres
+def drop_post_migrate_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name in ('course_search_vector_gin', 'course_search_trgm_gin'):
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+# SQLite: tabla virtual FTS5 sobre search_document sincronizada con triggers
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    table = 'course_course'
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+        f"search_document, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document); END'
+    )
+    schema_editor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN '
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+        f"VALUES ('delete', old.id, old.search_document); END"
+    )
+    schema_editor.execute(
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_document ON {table} BEGIN '
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) "
+        f"VALUES ('delete', old.id, old.search_document); "
+        f'INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document); END'
+    )
+    # los cursos que ya existian
+    schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for suffix in ('ai', 'ad', 'au'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+    schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('course', '0010_coursestats_updated_at'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(drop_post_migrate_indexes, migrations.RunPython.noop),
+        AddIndexConcurrentlyIfSupported(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(models.Func(django.contrib.postgres.search.SearchConfig('spanish'), 'search_document', function='to_tsvector'), name='course_search_vector_gin'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='course',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('search_document', name='gin_trgm_ops'), name='course_search_trgm_gin'),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0011_search_index'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='rollupwatermark',
+            name='last_id',
+        ),
+    ]
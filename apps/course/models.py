@@ -1,5 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchConfig
+from django.core.validators import MaxValueValidator, MinValueValidator
+
+from .search import SEARCH_CONFIG
 
 
 class Category(models.Model):
@@ -30,6 +35,25 @@ class Category(models.Model):
     
     
 
+# Consultas reutilizables del catalogo: traen categoria, instructor y lecciones
+# ordenadas en un numero fijo de queries sin importar cuantos cursos haya
+class CourseQuerySet(models.QuerySet):
+
+    # search_document solo lo usa la base al buscar; content de las lecciones solo
+    # se lee si la respuesta lo muestra (?expand=lessons)
+    def with_list_relations(self, lessons=True, lesson_content=False):
+        queryset = self.select_related('category', 'instructor', 'stats').defer('search_document')
+        if not lessons:
+            return queryset
+
+        lesson_queryset = Lesson.objects.order_by('order', 'id')
+        if not lesson_content:
+            lesson_queryset = lesson_queryset.defer('content')
+        return queryset.prefetch_related(models.Prefetch('lessons', queryset=lesson_queryset))
+
+
+
+
 class Course(models.Model):
     
     STATUS_CHOICES = [
@@ -43,11 +67,135 @@ class Course(models.Model):
     status =  models.CharField(max_length=20, choices=STATUS_CHOICES, default='borrador')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     category = models.ForeignKey(Category, on_delete=models.PROTECT)
     instructor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='courses_created')
     
+    # texto precalculado para el motor de busqueda (apps/course/search.py)
+    search_document = models.TextField(blank=True, default='', editable=False)
+    # ultimo order asignado a una leccion del curso (ver allocate_lesson_orders)
+    last_lesson_order = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = CourseQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            # catalogo publico: is_active=True, status='publicado' ordenado por created_at
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(is_active=True, status='publicado'),
+                name='course_published_idx',
+            ),
+            # cursos activos del instructor ordenados por created_at
+            models.Index(
+                fields=['instructor', 'created_at', 'id'],
+                condition=models.Q(is_active=True),
+                name='course_instructor_active_idx',
+            ),
+            # busqueda (apps/course/search.py), solo en PostgreSQL: texto completo y trigramas
+            GinIndex(
+                models.Func(SearchConfig(SEARCH_CONFIG), 'search_document', function='to_tsvector'),
+                name='course_search_vector_gin',
+            ),
+            GinIndex(OpClass('search_document', name='gin_trgm_ops'), name='course_search_trgm_gin'),
+        ]
+    
     def __str__(self):
         return self.title
+    
+    
+    def build_search_document(self):
+        return ' '.join(filter(None, [
+            self.title,
+            self.description,
+            str(self.category),
+            self.instructor.first_name,
+            self.instructor.last_name,
+        ]))
+    
+    
+    # Reserva `count` posiciones consecutivas para nuevas lecciones y devuelve la primera.
+    # Es un UPDATE ... SET last_lesson_order = last_lesson_order + count: no recorre las
+    # lecciones del curso y la fila queda bloqueada solo hasta el final de la transaccion.
+    def allocate_lesson_orders(self, count=1):
+        with transaction.atomic():
+            Course.objects.filter(pk=self.pk).update(last_lesson_order=models.F('last_lesson_order') + count)
+            self.last_lesson_order = Course.objects.values_list('last_lesson_order', flat=True).get(pk=self.pk)
+        return self.last_lesson_order - count + 1
+    
+    
+    # columnas de las que sale search_document
+    SEARCH_SOURCE_FIELDS = ('title', 'description', 'category_id', 'instructor_id')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._search_source = instance._search_source_values()
+        return instance
+    
+    def _search_source_values(self):
+        # desde __dict__ para no cargar los campos diferidos
+        return {name: self.__dict__.get(name) for name in self.SEARCH_SOURCE_FIELDS}
+    
+    def _search_source_changed(self, update_fields):
+        loaded = getattr(self, '_search_source', None)
+        if self._state.adding or loaded is None:
+            return True
+        current = self._search_source_values()
+        names = self.SEARCH_SOURCE_FIELDS
+        if update_fields is not None:
+            # update_fields puede traer category o category_id
+            fields = {
+                field.attname for field in self._meta.concrete_fields
+                if field.name in update_fields or field.attname in update_fields
+            }
+            names = [name for name in names if name in fields]
+        return any(current[name] != loaded[name] for name in names)
+    
+    def save(self, *args, **kwargs):
+        # el documento lee categoria e instructor: solo se recalcula si cambio algo de lo que lo forma
+        update_fields = kwargs.get('update_fields')
+        if self._search_source_changed(update_fields):
+            self.search_document = self.build_search_document()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'search_document'}
+        super().save(*args, **kwargs)
+        self._search_source = self._search_source_values()
+
+
+
+# Contadores desnormalizados por curso, mantenidos en la misma transaccion que cada
+# inscripcion o reseña con incrementos F() (ver apps/course/stats.py)
+class CourseStats(models.Model):
+
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    enrollment_count = models.IntegerField(default=0)
+    completion_count = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    lesson_count = models.IntegerField(default=0)
+    # histograma de calificaciones, una columna por estrella
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    # validador de los listados que muestran estas estadisticas
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return round(self.rating_sum / self.rating_count, 2)
+
+    @property
+    def rating_histogram(self):
+        return {str(stars): getattr(self, f'rating_{stars}') for stars in range(1, 6)}
+
+    def __str__(self):
+        return f"{self.course_id} - {self.enrollment_count} inscritos"
+
 
 
 
@@ -57,8 +205,15 @@ class Lesson(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     order = models.PositiveIntegerField()
 
+    class Meta:
+        # el indice de lesson_course_order_unique sirve tambien para listar por (course, order)
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'order'], name='lesson_course_order_unique'),
+        ]
+
     def __str__(self):
         return f"{self.course.title} - {self.title}"
     
@@ -86,9 +241,19 @@ class Enrollment(models.Model):
         choices=STATUS_CHOICES,
         default=STATUS_ACTIVE
     )
+    # lecciones completadas del curso, mantenido por apps/course/completion.py
+    completed_lessons = models.IntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('student', 'course')
+        indexes = [
+            # inscripciones del estudiante mas recientes primero; el filtro por status
+            # se aplica recorriendo el indice ya ordenado
+            models.Index(fields=['student', '-enrolled_at', '-id'], name='enrollment_student_recent_idx'),
+            # inscripciones por curso mas recientes primero (listado del instructor)
+            models.Index(fields=['course', '-enrolled_at', '-id'], name='enrollment_course_recent_idx'),
+        ]
     
     def __str__(self):
         return f"{self.course.title} -- {self.student.first_name} {self.student.last_name}"
@@ -117,10 +282,68 @@ class Review(models.Model):
     
     student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
-    rating = models.PositiveSmallIntegerField()
+    rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('student', 'course')
+        indexes = [
+            # comentarios de un curso, mas recientes primero (paginacion keyset)
+            models.Index(fields=['course', '-created_at', '-id'], name='review_course_recent_idx'),
+        ]
+
+
+
+
+
+
+# Resumen diario por curso para las analiticas del instructor.
+# Inscripciones, cancelaciones y completados se suman en el momento (apps/course/stats.py);
+# estudiantes activos y progreso promedio los carga el comando rollup_course_activity.
+class CourseDailyStats(models.Model):
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    new_enrollments = models.IntegerField(default=0)
+    cancellations = models.IntegerField(default=0)
+    completions = models.IntegerField(default=0)
+    active_learners = models.IntegerField(default=0)
+    average_progress = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'day'], name='course_daily_stats_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} - {self.day}"
 
+
+
+
+# Un registro por estudiante, curso y dia con actividad; se escribe al guardar el progreso
+# y el rollup lo cuenta por curso y dia.
+class LearnerActivity(models.Model):
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE)
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'student', 'day'], name='learner_activity_unique'),
+        ]
+
+
+
+
+# Ultima ejecucion de cada proceso incremental; la fila tambien serializa las ejecuciones
+class RollupWatermark(models.Model):
+
+    name = models.CharField(max_length=50, primary_key=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} - {self.updated_at}"
@@ -0,0 +1,29 @@
+from django.contrib.postgres.indexes import PostgresIndex
+from django.db.migrations.operations import AddIndex
+
+
+# AddIndex que en PostgreSQL construye el indice con CREATE INDEX CONCURRENTLY
+# para no bloquear escrituras sobre tablas grandes. En otros motores es un AddIndex normal,
+# salvo los indices propios de PostgreSQL (GIN, GiST...), que ahi no se crean.
+# La migracion que lo use debe declarar atomic = False.
+class AddIndexConcurrentlyIfSupported(AddIndex):
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            if isinstance(self.index, PostgresIndex):
+                return
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor != 'postgresql':
+            if isinstance(self.index, PostgresIndex):
+                return
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
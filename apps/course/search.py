@@ -0,0 +1,96 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+# Motor de busqueda del catalogo.
+# Cada curso guarda en search_document el texto de titulo, descripcion, categoria
+# e instructor; ese texto se indexa segun el motor de base de datos:
+#   - PostgreSQL: GIN sobre to_tsvector + GIN trigram (pg_trgm) para errores de tipeo
+#   - SQLite: tabla virtual FTS5 sincronizada con triggers
+# Los indices, la tabla y los triggers los crea la migracion 0011_search_index.
+# Cualquier otro motor cae a icontains sobre el documento.
+
+SEARCH_CONFIG = 'spanish'
+FTS_TABLE = 'course_course_fts'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def search_courses(queryset, text):
+    terms = _TOKEN_RE.findall(text or '')
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return _search_postgresql(queryset, ' '.join(terms))
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, terms)
+
+    for term in terms:
+        queryset = queryset.filter(search_document__icontains=term)
+    return queryset.order_by('created_at', 'id')
+
+
+def _search_postgresql(queryset, text):
+    table = queryset.model._meta.db_table
+    vector = f"to_tsvector('{SEARCH_CONFIG}'::regconfig, \"{table}\".\"search_document\")"
+    query = f"websearch_to_tsquery('{SEARCH_CONFIG}'::regconfig, %s)"
+
+    match = RawSQL(
+        f'({vector} @@ {query} OR %s <%% "{table}"."search_document")',
+        [text, text],
+        output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f'ts_rank({vector}, {query}) + word_similarity(%s, "{table}"."search_document")',
+        [text, text],
+        output_field=FloatField(),
+    )
+    return queryset.filter(match).annotate(search_rank=rank).order_by('-search_rank', 'created_at', 'id')
+
+
+def _search_sqlite(queryset, terms):
+    table = queryset.model._meta.db_table
+    # cada termino como prefijo entre comillas, para que la entrada del usuario
+    # nunca se interprete como sintaxis de FTS5
+    match = ' '.join('"%s"*' % term.replace('"', '') for term in terms)
+
+    ids = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+    rank = RawSQL(
+        f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = "{table}"."id"',
+        [match],
+        output_field=FloatField(),
+    )
+    # bm25 devuelve valores mas bajos para los mejores resultados
+    return queryset.filter(Q(id__in=ids)).annotate(search_rank=rank).order_by(F('search_rank').asc(), 'created_at', 'id')
+
+
+# Recalcula el documento de todos los cursos por bloques (para corregir desfaces
+# o cargar datos insertados con bulk_create).
+def rebuild_search_documents(batch_size=1000):
+    from apps.course.models import Course
+
+    total = 0
+    batch = []
+    queryset = Course.objects.select_related('category', 'instructor').order_by('id')
+    for course in queryset.iterator(chunk_size=batch_size):
+        course.search_document = course.build_search_document()
+        batch.append(course)
+        if len(batch) >= batch_size:
+            Course.objects.bulk_update(batch, ['search_document'])
+            total += len(batch)
+            batch = []
+    if batch:
+        Course.objects.bulk_update(batch, ['search_document'])
+        total += len(batch)
+
+    connection = connections[Course.objects.db]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return total
@@ -0,0 +1,531 @@
+import math
+import random
+import time
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.utils import timezone
+
+from apps.users.models import Role, User
+
+from . import cache as catalog_cache
+from .models import Category, Course, CourseDailyStats, Enrollment, Lesson, LessonProgress, Review
+from .stats import rebuild_course_stats
+
+
+# Datos sinteticos a escala de produccion para medir rendimiento en local.
+# Los datos estan correlacionados como en produccion:
+#   - usuarios repartidos en roles y grupos, con fecha de alta a lo largo de `days` dias
+#   - cursos en todas las categorias, con descripciones y lecciones de tamaño log-normal
+#   - inscripciones en cursos publicados con popularidad Zipf; cada estudiante se inscribe
+#     despues de darse de alta y de que el curso exista
+#   - progreso por leccion coherente con el estado de la inscripcion (completed_lessons
+#     coincide con las filas completadas) y reseñas segun la calidad de cada curso
+# Todo se escribe con bulk_create por lotes. Los campos que el codigo mantiene al guardar
+# (search_document, last_lesson_order, completed_lessons) se calculan aqui; CourseStats
+# se recalcula al final con rebuild_course_stats y el resumen diario se suma en memoria.
+# Con workers > 1 las inscripciones se generan en varios procesos, cada uno con su conexion
+# y su rango de estudiantes (solo PostgreSQL: SQLite no admite escrituras concurrentes).
+
+FIRST_NAMES = [
+    'Ana', 'Luis', 'María', 'Carlos', 'Lucía', 'Jorge', 'Sofía', 'Diego', 'Valentina', 'Andrés',
+    'Camila', 'Mateo', 'Paula', 'Javier', 'Daniela', 'Sebastián', 'Elena', 'Tomás', 'Martina', 'Pablo',
+]
+LAST_NAMES = [
+    'García', 'Rodríguez', 'Martínez', 'López', 'González', 'Pérez', 'Sánchez', 'Ramírez', 'Torres', 'Flores',
+    'Rivera', 'Gómez', 'Díaz', 'Vargas', 'Castro', 'Romero', 'Herrera', 'Medina', 'Aguilar', 'Rojas',
+]
+LEVELS = ['Introducción a', 'Fundamentos de', 'Curso práctico de', 'Taller de', 'Avanzado:', 'Domina']
+SUBJECTS = {
+    'programacion': ['Python', 'JavaScript', 'Django', 'estructuras de datos', 'Go'],
+    'data_science': ['machine learning', 'pandas', 'estadística', 'deep learning', 'SQL analítico'],
+    'cloud_computing': ['AWS', 'Kubernetes', 'Docker', 'Terraform', 'CI/CD'],
+    'ciberseguridad': ['hacking ético', 'redes seguras', 'criptografía', 'análisis forense'],
+    'diseno_ux_ui': ['Figma', 'investigación de usuarios', 'diseño de interfaces', 'prototipado'],
+    'startups': ['validación de ideas', 'modelos de negocio', 'levantamiento de capital'],
+    'finanzas': ['finanzas personales', 'bolsa de valores', 'análisis financiero'],
+    'ingles': ['inglés conversacional', 'inglés técnico', 'gramática inglesa'],
+    'habilidades_blandas': ['comunicación efectiva', 'liderazgo', 'negociación'],
+    'videojuegos': ['Unity', 'Godot', 'diseño de niveles', 'arte pixel'],
+    'hardware_robotica': ['Arduino', 'Raspberry Pi', 'robótica móvil', 'IoT'],
+    'blockchain': ['Solidity', 'contratos inteligentes', 'DeFi'],
+    'produccion_audiovisual': ['edición de video', 'fotografía', 'producción de podcasts'],
+    'marketing_digital': ['SEO', 'redes sociales', 'email marketing', 'analítica web'],
+}
+WORDS = (
+    'el la de que y en un una para con por los las se del al como más pero sus le ya o este '
+    'sí porque esta entre cuando muy sin sobre también me hasta hay donde quien desde todo nos '
+    'durante todos uno les ni contra otros ese eso ante ellos esto antes algunos qué unos yo otro '
+    'datos código función proyecto ejemplo práctica módulo ejercicio concepto sistema modelo '
+    'servidor cliente diseño prueba resultado proceso herramienta aplicación método'
+).split()
+
+# estado de cada inscripcion y su probabilidad
+STATUS_WEIGHTS = [
+    (Enrollment.STATUS_ACTIVE, 0.65),
+    (Enrollment.STATUS_COMPLETED, 0.22),
+    (Enrollment.STATUS_CANCELLED, 0.13),
+]
+COURSE_STATUS_WEIGHTS = [('publicado', 0.8), ('borrador', 0.15), ('archivado', 0.05)]
+
+_catalog = None
+
+
+class SeedResult:
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.elapsed = 0.0
+
+    @property
+    def rows(self):
+        return sum(self.counts.values())
+
+
+@contextmanager
+def explicit_timestamps():
+    # auto_now / auto_now_add pisan las fechas generadas: se apagan mientras se carga
+    fields = [
+        field
+        for model in (User, Course, Lesson, Enrollment, LessonProgress, Review)
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class TextSource:
+
+    # un corpus fijo del que se cortan trozos: generar texto palabra por palabra seria lo mas lento
+    def __init__(self, rng, size=2_000_000):
+        words = [rng.choice(WORDS) for _ in range(size // 6)]
+        self.corpus = ' '.join(words)
+
+    def text(self, rng, median, sigma=0.8, maximum=60000):
+        size = min(maximum, max(20, int(rng.lognormvariate(math.log(median), sigma))))
+        start = rng.randrange(0, len(self.corpus) - size)
+        return self.corpus[start:start + size].strip().capitalize()
+
+
+def seed(users=10000, courses=500, lessons=12, enrollments=3.0, review_rate=0.15, zipf=1.1,
+         days=730, batch_size=5000, workers=1, random_seed=0, prefix='seed', password='password123',
+         progress=None):
+    result = SeedResult()
+    start = time.perf_counter()
+    rng = random.Random(random_seed)
+    now = timezone.now()
+    history_start = now - timedelta(days=days)
+
+    if connection.vendor == 'sqlite':
+        workers = 1
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous = OFF')
+
+    def report(phase):
+        result.elapsed = time.perf_counter() - start
+        if progress is not None:
+            progress(phase, result)
+
+    with explicit_timestamps():
+        instructors, students = _seed_users(
+            rng, users, history_start, now, batch_size, prefix, make_password(password), result)
+        report('usuarios')
+
+        catalog = _seed_courses(rng, courses, lessons, instructors, now, batch_size, result)
+        report('cursos')
+
+    catalog['options'] = {
+        'enrollments': enrollments, 'review_rate': review_rate, 'zipf': zipf,
+        'batch_size': batch_size, 'now': now, 'seed': random_seed,
+    }
+    partitions = _partitions(students, max(1, workers) * 4 if workers > 1 else 1)
+
+    daily = defaultdict(lambda: [0, 0, 0])
+    if workers > 1:
+        # cada proceso abre su propia conexion; las heredadas no se pueden compartir
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(settings.SETTINGS_MODULE, catalog)
+        ) as executor:
+            futures = [executor.submit(_seed_enrollments_in_worker, partition) for partition in partitions]
+            for future in as_completed(futures):
+                _merge(future.result(), result, daily)
+                report('inscripciones')
+    else:
+        _init_catalog(catalog)
+        for partition in partitions:
+            _merge(_seed_enrollments(partition), result, daily)
+            report('inscripciones')
+
+    rows = (
+        CourseDailyStats(
+            course_id=course_id, day=day,
+            new_enrollments=counters[0], cancellations=counters[1], completions=counters[2],
+        )
+        for (course_id, day), counters in daily.items()
+    )
+    result.counts['course_daily_stats'] += _insert(CourseDailyStats, rows, batch_size)
+    result.counts['course_stats'] += rebuild_course_stats()
+    catalog_cache.bump_version()
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    report('estadisticas')
+    return result
+
+
+def _insert(model, objects, batch_size):
+    # bulk_create por lotes sin materializar todo el generador; devuelve las filas escritas
+    total = 0
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batch_size))
+        if not batch:
+            return total
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=batch_size)
+        total += len(batch)
+
+
+def _created_ids(model, objects, field):
+    # SQLite anterior a 3.35 no devuelve los ids de bulk_create
+    if connection.features.can_return_rows_from_bulk_insert:
+        return [obj.pk for obj in objects]
+    ids = dict(
+        model.objects.filter(**{f'{field}__in': [getattr(obj, field) for obj in objects]}).values_list(field, 'id')
+    )
+    return [ids[getattr(obj, field)] for obj in objects]
+
+
+def _random_time(rng, start, end):
+    return start + (end - start) * rng.random()
+
+
+def _seed_users(rng, total, history_start, now, batch_size, prefix, password_hash, result):
+    roles = {role.name: role for role in Role.objects.all()}
+    for name, _ in Role.ROLE_CHOICES:
+        if name not in roles:
+            roles[name] = Role.objects.create(name=name)
+    groups = dict(Group.objects.filter(name__in=[name.capitalize() for name in roles]).values_list('name', 'id'))
+
+    admins = max(1, total // 100000)
+    instructor_count = max(1, total // 50)
+    plan = (
+        [('admin', admins), ('instructor', instructor_count), ('estudiante', max(0, total - admins - instructor_count))]
+    )
+
+    instructors = []
+    students = (array('q'), array('d'))
+    for role_name, count in plan:
+        role = roles[role_name]
+        group_id = groups.get(role_name.capitalize())
+        for first in range(0, count, batch_size):
+            batch = []
+            for index in range(first, min(count, first + batch_size)):
+                joined = _random_time(rng, history_start, now)
+                batch.append(User(
+                    email=f'{prefix}-{role_name}-{index}@example.com',
+                    password=password_hash,
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    role=role,
+                    is_staff=role_name == 'admin',
+                    date_joined=joined,
+                    created_at=joined,
+                ))
+            with transaction.atomic():
+                User.objects.bulk_create(batch)
+                ids = _created_ids(User, batch, 'email')
+                if group_id is not None:
+                    User.groups.through.objects.bulk_create(
+                        [User.groups.through(user_id=user_id, group_id=group_id) for user_id in ids])
+            result.counts['users'] += len(batch)
+
+            for user_id, user in zip(ids, batch):
+                if role_name == 'instructor':
+                    instructors.append(User(id=user_id, first_name=user.first_name, last_name=user.last_name,
+                                            date_joined=user.date_joined))
+                elif role_name == 'estudiante':
+                    students[0].append(user_id)
+                    students[1].append(user.date_joined.timestamp())
+    return instructors, students
+
+
+def _weighted(rng, options):
+    value = rng.random()
+    for option, weight in options:
+        value -= weight
+        if value < 0:
+            return option
+    return options[-1][0]
+
+
+def _seed_courses(rng, total, mean_lessons, instructors, now, batch_size, result):
+    text = TextSource(rng)
+    categories = {}
+    for name, _ in Category.CATEGORY_CHOICES:
+        categories[name] = Category.objects.filter(name=name).first() or Category.objects.create(name=name)
+    category_names = list(categories)
+
+    # pocos instructores concentran muchos cursos
+    instructor_weights = _cumulative(1 / (rank + 1) ** 0.8 for rank in range(len(instructors)))
+
+    catalog = {'courses': array('q'), 'created': array('d'), 'quality': {}, 'lessons': {}}
+    lessons_per_batch = max(1, batch_size // max(1, mean_lessons))
+    for first in range(0, total, lessons_per_batch):
+        courses = []
+        lesson_counts = []
+        for _ in range(first, min(total, first + lessons_per_batch)):
+            instructor = rng.choices(instructors, cum_weights=instructor_weights)[0]
+            category = categories[rng.choice(category_names)]
+            created = _random_time(rng, instructor.date_joined, now)
+            count = max(1, int(rng.gammavariate(4, mean_lessons / 4)))
+            course = Course(
+                title=f'{rng.choice(LEVELS)} {rng.choice(SUBJECTS[category.name])}',
+                description=text.text(rng, 600),
+                status=_weighted(rng, COURSE_STATUS_WEIGHTS),
+                is_active=rng.random() < 0.95,
+                category=category,
+                instructor=instructor,
+                created_at=created,
+                updated_at=created,
+                last_lesson_order=count,
+            )
+            course.search_document = course.build_search_document()
+            courses.append(course)
+            lesson_counts.append(count)
+
+        with transaction.atomic():
+            Course.objects.bulk_create(courses)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                # sin ids devueltos: los cursos de este lote son los ultimos insertados
+                ids = list(Course.objects.order_by('-id').values_list('id', flat=True)[:len(courses)])[::-1]
+                for course, course_id in zip(courses, ids):
+                    course.pk = course_id
+
+            lessons = [
+                Lesson(
+                    course=course,
+                    title=f'Lección {order}',
+                    content=text.text(rng, 3000),
+                    order=order,
+                    created_at=course.created_at + timedelta(minutes=order),
+                    updated_at=course.created_at + timedelta(minutes=order),
+                )
+                for course, count in zip(courses, lesson_counts)
+                for order in range(1, count + 1)
+            ]
+            Lesson.objects.bulk_create(lessons, batch_size=batch_size)
+
+        if connection.features.can_return_rows_from_bulk_insert:
+            lesson_ids = defaultdict(list)
+            for lesson in lessons:
+                lesson_ids[lesson.course_id].append(lesson.pk)
+        else:
+            lesson_ids = defaultdict(list)
+            rows = Lesson.objects.filter(course__in=courses).order_by('course_id', 'order').values_list('course_id', 'id')
+            for course_id, lesson_id in rows:
+                lesson_ids[course_id].append(lesson_id)
+
+        result.counts['courses'] += len(courses)
+        result.counts['lessons'] += len(lessons)
+
+        for course in courses:
+            # solo los cursos publicados y activos reciben inscripciones
+            if course.status == 'publicado' and course.is_active:
+                catalog['courses'].append(course.pk)
+                catalog['created'].append(course.created_at.timestamp())
+                catalog['quality'][course.pk] = rng.uniform(2.8, 4.9)
+                catalog['lessons'][course.pk] = array('q', lesson_ids[course.pk])
+    return catalog
+
+
+def _partitions(students, count):
+    ids, joined = students
+    size = max(1, math.ceil(len(ids) / count))
+    return [
+        (index, ids[start:start + size], joined[start:start + size])
+        for index, start in enumerate(range(0, len(ids), size))
+    ]
+
+
+def _init_worker(settings_module, catalog):
+    import os
+
+    # con el metodo spawn los procesos hijos arrancan sin Django configurado
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+    _init_catalog(catalog)
+
+
+def _init_catalog(catalog):
+    global _catalog
+    courses = catalog['courses']
+    # popularidad Zipf sobre un orden al azar de los cursos
+    ranks = list(range(len(courses)))
+    random.Random(catalog['options']['seed']).shuffle(ranks)
+    cumulative = _cumulative(1 / (rank + 1) ** catalog['options']['zipf'] for rank in ranks)
+    _catalog = dict(catalog, cumulative=cumulative)
+
+
+def _cumulative(weights):
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+# columnas de las tablas grandes; se insertan con SQL directo (ver _insert_rows)
+ENROLLMENT_COLUMNS = ['student_id', 'course_id', 'status', 'completed_lessons', 'enrolled_at', 'updated_at']
+PROGRESS_COLUMNS = ['student_id', 'lesson_id', 'progress', 'completed', 'updated_at']
+REVIEW_COLUMNS = ['student_id', 'course_id', 'rating', 'comment', 'created_at', 'updated_at']
+
+
+def _insert_rows(model, columns, rows):
+    # INSERT de varias filas por sentencia con valores ya adaptados: en estas tablas el
+    # tiempo de bulk_create se va en construir modelos y compilar la consulta, no en la base
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    names = ', '.join(qn(column) for column in columns)
+    row_placeholder = '(%s)' % ', '.join(['%s'] * len(columns))
+    batch_size = connection.ops.bulk_batch_size(columns, rows) or len(rows)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            cursor.execute(
+                f'INSERT INTO {table} ({names}) VALUES {", ".join([row_placeholder] * len(batch))}',
+                [value for row in batch for value in row],
+            )
+
+
+def _seed_enrollments(partition):
+    index, student_ids, joined = partition
+    catalog = _catalog
+    options = catalog['options']
+    rng = random.Random(options['seed'] * 1000003 + index + 1)
+    text = TextSource(rng, size=200_000)
+    now_ts = options['now'].timestamp()
+    batch_size = options['batch_size']
+    course_ids = catalog['courses']
+    position = {course_id: offset for offset, course_id in enumerate(course_ids)}
+    extra_enrollments = max(0.0, options['enrollments'] - 1)
+    review_rates = {
+        Enrollment.STATUS_ACTIVE: options['review_rate'],
+        Enrollment.STATUS_COMPLETED: options['review_rate'] * 2,
+        Enrollment.STATUS_CANCELLED: options['review_rate'] / 2,
+    }
+
+    # `connection` es un proxy por hilo: en este bucle conviene resolverlo una sola vez
+    ops = connections[DEFAULT_DB_ALIAS].ops
+    progress_field = LessonProgress._meta.get_field('progress')
+
+    def decimal(value):
+        return ops.adapt_decimalfield_value(value, progress_field.max_digits, progress_field.decimal_places)
+
+    def moment(ts):
+        return ops.adapt_datetimefield_value(datetime.fromtimestamp(ts, dt_timezone.utc))
+
+    completed_progress = decimal(Decimal('100.00'))
+
+    counts = defaultdict(int)
+    daily = defaultdict(lambda: [0, 0, 0])
+    tables = (
+        (Enrollment, ENROLLMENT_COLUMNS, 'enrollments', []),
+        (LessonProgress, PROGRESS_COLUMNS, 'lesson_progress', []),
+        (Review, REVIEW_COLUMNS, 'reviews', []),
+    )
+    enrollments, progress_rows, reviews = (rows for _, _, _, rows in tables)
+
+    def flush(force=False):
+        for model, columns, name, rows in tables:
+            if rows and (force or len(rows) >= batch_size):
+                _insert_rows(model, columns, rows)
+                counts[name] += len(rows)
+                rows.clear()
+
+    if not course_ids:
+        return counts, {}
+
+    for student_id, joined_ts in zip(student_ids, joined):
+        wanted = 1 + (int(rng.expovariate(1 / extra_enrollments)) if extra_enrollments else 0)
+        picks = set(rng.choices(course_ids, cum_weights=catalog['cumulative'], k=min(wanted, len(course_ids))))
+        for course_id in picks:
+            start_ts = max(joined_ts, catalog['created'][position[course_id]])
+            enrolled_ts = start_ts + (now_ts - start_ts) * rng.random()
+            updated_ts = enrolled_ts + (now_ts - enrolled_ts) * rng.random()
+            updated_at = moment(updated_ts)
+
+            lessons = catalog['lessons'][course_id]
+            status = _weighted(rng, STATUS_WEIGHTS)
+            if status == Enrollment.STATUS_COMPLETED:
+                done = len(lessons)
+            elif status == Enrollment.STATUS_ACTIVE:
+                done = min(len(lessons) - 1, int(len(lessons) * rng.random() ** 1.5))
+            else:
+                done = min(len(lessons) - 1, int(len(lessons) * rng.random() * 0.3))
+
+            enrollments.append((student_id, course_id, status, done, moment(enrolled_ts), updated_at))
+            for lesson_id in lessons[:done]:
+                progress_rows.append((
+                    student_id, lesson_id, completed_progress, True,
+                    moment(enrolled_ts + (updated_ts - enrolled_ts) * rng.random()),
+                ))
+            if status == Enrollment.STATUS_ACTIVE and done < len(lessons) and rng.random() < 0.7:
+                progress = Decimal(rng.randint(1, 9900)) / 100
+                progress_rows.append((student_id, lessons[done], decimal(progress), False, updated_at))
+
+            if rng.random() < review_rates[status]:
+                rating = min(5, max(1, round(rng.gauss(catalog['quality'][course_id], 0.9))))
+                comment = text.text(rng, 120) if rng.random() < 0.6 else ''
+                reviews.append((student_id, course_id, rating, comment, updated_at, updated_at))
+
+            daily[(course_id, _local_day(enrolled_ts))][0] += 1
+            if status == Enrollment.STATUS_CANCELLED:
+                daily[(course_id, _local_day(updated_ts))][1] += 1
+            elif status == Enrollment.STATUS_COMPLETED:
+                daily[(course_id, _local_day(updated_ts))][2] += 1
+
+        flush()
+    flush(force=True)
+
+    return counts, dict(daily)
+
+
+def _local_day(ts):
+    return timezone.localdate(datetime.fromtimestamp(ts, dt_timezone.utc))
+
+
+def _seed_enrollments_in_worker(partition):
+    try:
+        return _seed_enrollments(partition)
+    finally:
+        connections.close_all()
+
+
+def _merge(partial, result, daily):
+    counts, partial_daily = partial
+    for name, total in counts.items():
+        result.counts[name] += total
+    for key, counters in partial_daily.items():
+        merged = daily[key]
+        for offset, value in enumerate(counters):
+            merged[offset] += value
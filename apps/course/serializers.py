@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from .models import Course, Lesson
+from .models import Course, CourseDailyStats, CourseStats, Lesson
 from django.db import transaction
+from gestion_cursos_back.fields import SparseFieldsMixin
 
 
 
@@ -13,15 +14,47 @@ class LessonSerializer(serializers.ModelSerializer):
         read_only_fields = ['order']
 
 
-class CourseListSerializer(serializers.ModelSerializer):
+# Proyeccion por defecto de las lecciones dentro del catalogo: sin el contenido
+class LessonOutlineSerializer(serializers.ModelSerializer):
+    
+    class Meta:
+        model = Lesson
+        fields = ['title', 'order']
+
+
+# Curso resumido para ?expand=course en lecciones e inscripciones
+class CourseOutlineSerializer(serializers.ModelSerializer):
+    
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'status']
+
+
+class CourseStatsSerializer(serializers.ModelSerializer):
+    
+    students_enrolled = serializers.IntegerField(source='enrollment_count')
+    completions = serializers.IntegerField(source='completion_count')
+    average_rating = serializers.FloatField()
+    rating_histogram = serializers.DictField(child=serializers.IntegerField())
+    
+    class Meta:
+        model = CourseStats
+        fields = ['students_enrolled', 'completions', 'rating_count', 'average_rating', 'rating_histogram']
+
+
+class CourseListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     
     category = serializers.StringRelatedField()
     instructor = serializers.StringRelatedField()
-    lessons = LessonSerializer(many=True)
+    lessons = LessonOutlineSerializer(many=True)
+    stats = CourseStatsSerializer(read_only=True)
+    
+    expandable_fields = {'lessons': lambda: LessonSerializer(many=True)}
+    deferrable_fields = {'description': ['description']}
     
     class Meta:
         model = Course
-        fields = ['id', 'title', 'description', 'status', 'is_active', 'created_at', 'category', 'instructor','lessons']
+        fields = ['id', 'title', 'description', 'status', 'is_active', 'created_at', 'category', 'instructor','lessons', 'stats']
 
 
 
@@ -45,14 +78,18 @@ class CourseLessonCreateSerializer(serializers.ModelSerializer):
         lessons_data = validated_data.pop('lessons', [])
 
         with transaction.atomic():
-            course = Course.objects.create(instructor=instructor, **validated_data)
-
-            for index, lesson_data in enumerate(lessons_data, start=1):
-                Lesson.objects.create(
-                    course=course,
-                    order=index,
-                    **lesson_data
-                )
+            course = Course.objects.create(
+                instructor=instructor,
+                last_lesson_order=len(lessons_data),
+                **validated_data
+            )
+            CourseStats.objects.create(course=course, lesson_count=len(lessons_data))
+
+            # todas las lecciones en un solo INSERT
+            Lesson.objects.bulk_create([
+                Lesson(course=course, order=index, **lesson_data)
+                for index, lesson_data in enumerate(lessons_data, start=1)
+            ])
 
         return course
 
@@ -62,4 +99,15 @@ class CourseUpdateSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Course
-        fields = ['title', 'description', 'status', 'category']
\ No newline at end of file
+        fields = ['title', 'description', 'status', 'category']
+
+
+
+class CourseDailyStatsSerializer(serializers.ModelSerializer):
+    
+    course_title = serializers.CharField(source='course.title')
+    average_progress = serializers.FloatField()
+    
+    class Meta:
+        model = CourseDailyStats
+        fields = ['course', 'course_title', 'day', 'new_enrollments', 'cancellations', 'completions', 'active_learners', 'average_progress']
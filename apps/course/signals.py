@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import cache as catalog_cache
+from . import completion
+from .models import Category, Course, Lesson
+
+
+# si cambia el nombre del instructor se recalcula el documento de busqueda de sus cursos
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_instructor_courses(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and not {'first_name', 'last_name'} & set(update_fields):
+        return
+
+    courses = list(Course.objects.select_related('category').filter(instructor=instance))
+    for course in courses:
+        course.instructor = instance
+        course.search_document = course.build_search_document()
+    if courses:
+        Course.objects.bulk_update(courses, ['search_document'])
+        catalog_cache.bump_version()
+
+
+# lo mismo con el nombre de la categoria, que tambien forma parte del documento
+@receiver(post_save, sender=Category)
+def refresh_category_courses(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and 'name' not in update_fields:
+        return
+
+    courses = list(Course.objects.select_related('instructor').filter(category=instance))
+    for course in courses:
+        course.category = instance
+        course.search_document = course.build_search_document()
+    if courses:
+        Course.objects.bulk_update(courses, ['search_document'])
+        catalog_cache.bump_version()
+
+
+# cualquier escritura de cursos o lecciones invalida el cache del catalogo
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_catalog(sender, **kwargs):
+    catalog_cache.bump_version()
+
+
+# las lecciones se muestran dentro del curso: tocar updated_at del curso
+# mantiene correcto el validador (ETag/Last-Modified) de los listados de cursos
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def touch_lesson_course(sender, instance, **kwargs):
+    Course.objects.filter(pk=instance.course_id).update(updated_at=timezone.now())
+    catalog_cache.bump_version()
+
+
+# total de lecciones del curso y avance de las inscripciones
+@receiver(post_save, sender=Lesson)
+def count_new_lesson(sender, instance, created, **kwargs):
+    if created:
+        completion.lessons_added(instance.course_id)
+
+
+@receiver(pre_delete, sender=Lesson)
+def uncount_lesson(sender, instance, origin=None, **kwargs):
+    # si se borra el curso (o su instructor) las inscripciones y estadisticas se van con el
+    if getattr(origin, 'model', type(origin)) is Lesson:
+        completion.lesson_removed(instance)
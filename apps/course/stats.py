@@ -0,0 +1,159 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from . import cache as catalog_cache
+from .models import Course, CourseDailyStats, CourseStats, Enrollment, Lesson, Review
+
+
+# Mantenimiento incremental de CourseStats y CourseDailyStats.
+# Las funciones se llaman dentro de la transaccion de la escritura que las origina;
+# cada cambio es un UPDATE ... SET x = x + n, sin leer la fila antes.
+# Los cambios de CourseStats tocan su updated_at (validador de los listados) y marcan
+# el catalogo cacheado como desactualizado (ver catalog_cache.stats_changed).
+
+COUNTED_STATUSES = (Enrollment.STATUS_ACTIVE, Enrollment.STATUS_COMPLETED)
+RATING_STARS = range(1, 6)
+
+
+def bump(course_id, **deltas):
+    if _bump(CourseStats, {'course_id': course_id}, deltas):
+        catalog_cache.stats_changed()
+
+
+def bump_daily(course_id, day=None, **deltas):
+    _bump(CourseDailyStats, {'course_id': course_id, 'day': day or timezone.localdate()}, deltas)
+
+
+def _bump(model, keys, deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return False
+
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    # update() no aplica auto_now
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        changes['updated_at'] = timezone.now()
+    if model.objects.filter(**keys).update(**changes):
+        return True
+
+    # primer movimiento de un curso (o del dia) sin fila de estadisticas
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **deltas)
+    except IntegrityError:
+        model.objects.filter(**keys).update(**changes)
+    return True
+
+
+def enrollment_status_changed(course_id, old_status, new_status):
+    bump(
+        course_id,
+        enrollment_count=_counted(new_status) - _counted(old_status),
+        completion_count=_completed(new_status) - _completed(old_status),
+    )
+    # una reactivacion cuenta como nueva inscripcion del dia
+    bump_daily(
+        course_id,
+        new_enrollments=int(new_status == Enrollment.STATUS_ACTIVE and old_status in (None, Enrollment.STATUS_CANCELLED)),
+        cancellations=int(new_status == Enrollment.STATUS_CANCELLED and old_status != new_status),
+        completions=int(new_status == Enrollment.STATUS_COMPLETED and old_status != new_status),
+    )
+
+
+def enrollments_completed(course_id, count):
+    # varias inscripciones activas que pasaron juntas a completadas
+    bump(course_id, completion_count=count)
+    bump_daily(course_id, completions=count)
+
+
+def review_changed(course_id, old_rating, new_rating):
+    # si cambia la calificacion se mueve una unidad del balde viejo al nuevo
+    buckets = {}
+    if old_rating is not None:
+        buckets[f'rating_{old_rating}'] = -1
+    if new_rating is not None:
+        buckets[f'rating_{new_rating}'] = buckets.get(f'rating_{new_rating}', 0) + 1
+
+    bump(
+        course_id,
+        rating_count=(new_rating is not None) - (old_rating is not None),
+        rating_sum=(new_rating or 0) - (old_rating or 0),
+        **buckets
+    )
+
+
+def _counted(status):
+    return int(status in COUNTED_STATUSES)
+
+
+def _completed(status):
+    return int(status == Enrollment.STATUS_COMPLETED)
+
+
+# Recalcula las estadisticas desde cero por bloques de cursos y las escribe con un upsert.
+def rebuild_course_stats(batch_size=1000):
+    total = 0
+    last_id = 0
+    while True:
+        course_ids = list(
+            Course.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not course_ids:
+            if total:
+                catalog_cache.bump_version()
+            return total
+
+        enrollments = {
+            row['course_id']: row
+            for row in Enrollment.objects.filter(course_id__in=course_ids)
+            .values('course_id')
+            .annotate(
+                enrolled=Count('id', filter=Q(status__in=COUNTED_STATUSES)),
+                completed=Count('id', filter=Q(status=Enrollment.STATUS_COMPLETED)),
+            )
+        }
+        reviews = {
+            row['course_id']: row
+            for row in Review.objects.filter(course_id__in=course_ids)
+            .values('course_id')
+            .annotate(
+                count=Count('id'),
+                total=Sum('rating'),
+                **{f'rating_{stars}': Count('id', filter=Q(rating=stars)) for stars in RATING_STARS}
+            )
+        }
+        lessons = dict(
+            Lesson.objects.filter(course_id__in=course_ids)
+            .values('course_id')
+            .annotate(total=Count('id'))
+            .values_list('course_id', 'total')
+        )
+
+        rows = []
+        for course_id in course_ids:
+            enrollment = enrollments.get(course_id, {})
+            review = reviews.get(course_id, {})
+            rows.append(CourseStats(
+                course_id=course_id,
+                enrollment_count=enrollment.get('enrolled', 0),
+                completion_count=enrollment.get('completed', 0),
+                rating_count=review.get('count', 0),
+                rating_sum=review.get('total') or 0,
+                lesson_count=lessons.get(course_id, 0),
+                **{f'rating_{stars}': review.get(f'rating_{stars}', 0) for stars in RATING_STARS}
+            ))
+
+        with transaction.atomic():
+            CourseStats.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=['course'],
+                update_fields=[
+                    'enrollment_count', 'completion_count', 'rating_count', 'rating_sum', 'lesson_count',
+                    *(f'rating_{stars}' for stars in RATING_STARS), 'updated_at',
+                ],
+            )
+
+        total += len(rows)
+        last_id = course_ids[-1]
@@ -1,3 +1,630 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import re
+import subprocess
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection, router
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from apps.course import analytics, cache as catalog_cache, checks, stats
+from apps.course.models import (
+    Category, Course, CourseDailyStats, CourseStats, Enrollment, LearnerActivity, Lesson, LessonProgress,
+)
+from apps.course.views import CourseAnalyticsAPIView, CourseListAPIView, CourseListByIntructorAPIView
+from apps.enrollment.views import EnrollmentListAPIView, InstructorEnrollmentListAPIView
+from apps.lesson.views import GetListLessonByInstructorListAPIView, GetListLessonListAPIView
+from apps.users.models import Role, User
+from apps.users.views import ListsUserAPIView
+from gestion_cursos_back import metrics, profiling, replicas, streaming
+
+
+class CatalogTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = Role.objects.create(name='instructor')
+        cls.category = Category.objects.create(name='programacion')
+        cls.instructor = User.objects.create_user(
+            'instructor@example.com', 'password', role=cls.role,
+            first_name='Ana', last_name='Pérez', is_superuser=True,
+        )
+        cls.courses = [
+            Course.objects.create(
+                title=f'Curso de python {index}', description='Introducción', status='publicado',
+                category=cls.category, instructor=cls.instructor,
+            )
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+
+class CourseListCursorTests(CatalogTestCase):
+
+    def test_cursor_pages_follow_creation_order(self):
+        response = self.client.get('/course/list/', {'cursor': '', 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([course['id'] for course in response.data['results']], [c.pk for c in self.courses[:2]])
+        self.assertNotIn('count', response.data)
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([course['id'] for course in response.data['results']], [self.courses[2].pk])
+        self.assertIsNone(response.data['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/course/list/', {'cursor': 'no-es-un-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_search_is_rejected(self):
+        response = self.client.get('/course/list/', {'cursor': '', 'search': 'python'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('cursor', response.data)
+
+        response = self.client.get('/course/list/', {'search': 'python'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+
+
+
+class CourseListFilterTests(CatalogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        other = User.objects.create(email='otro@example.com', role=cls.role, first_name='Luis', last_name='Gómez')
+        cls.other_course = Course.objects.create(
+            title='Analisis de datos', description='Con python y pandas', status='publicado',
+            category=cls.category, instructor=other,
+        )
+
+    def listed(self, **params):
+        response = self.client.get('/course/list/', params)
+        self.assertEqual(response.status_code, 200)
+        return {course['id'] for course in response.data['results']}
+
+    def test_scoped_filters_only_look_at_their_column(self):
+        python_courses = {course.pk for course in self.courses}
+        # la descripcion del otro curso menciona python, pero el filtro es sobre el titulo
+        self.assertEqual(self.listed(search_title='python'), python_courses)
+        self.assertEqual(self.listed(search_instructor='ana'), python_courses)
+        self.assertEqual(self.listed(search_instructor='gómez'), {self.other_course.pk})
+        self.assertEqual(self.listed(search_instructor='analisis'), set())
+
+    def test_search_looks_at_the_whole_document(self):
+        self.assertEqual(self.listed(search='python'), {course.pk for course in self.courses} | {self.other_course.pk})
+
+
+class CourseSparseFieldsTests(CatalogTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Lesson.objects.create(course=cls.courses[0], title='Leccion', content='Contenido', order=1)
+
+    def get(self, **params):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/course/list/', params)
+        self.assertEqual(response.status_code, 200)
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        return response.data['results'], sql
+
+    def test_fields_skip_unused_columns(self):
+        results, sql = self.get(fields='id,title')
+        self.assertEqual(set(results[0]), {'id', 'title'})
+        self.assertNotIn('"description"', sql)
+        # sin lessons en la respuesta no se consultan las lecciones
+        self.assertNotIn('course_lesson', sql)
+
+    def test_lessons_are_outlined_unless_expanded(self):
+        results, sql = self.get(fields='id,lessons')
+        self.assertEqual(results[0]['lessons'], [{'title': 'Leccion', 'order': 1}])
+        self.assertNotIn('"content"', sql)
+
+        results, sql = self.get(fields='id,lessons', expand='lessons')
+        self.assertEqual(results[0]['lessons'], [{'title': 'Leccion', 'content': 'Contenido', 'order': 1}])
+        self.assertIn('"content"', sql)
+
+
+@override_settings(LIST_STREAM_CHUNK_SIZE=2)
+class CourseListStreamingTests(CatalogTestCase):
+
+    def stream(self, **params):
+        iterator = QuerySet.iterator
+        with mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=iterator) as patched:
+            response = self.client.get('/course/list/', {'paginate': 'false', **params})
+            self.assertTrue(response.streaming)
+            body = b''.join(response.streaming_content).decode()
+        # el cuerpo se lee por bloques, no con un solo SELECT cargado en memoria
+        patched.assert_called_once_with(mock.ANY, chunk_size=2)
+        return response, body
+
+    def test_json_has_the_count_at_the_end(self):
+        response, body = self.stream()
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertTrue(body.endswith('],"count":3}'))
+        data = json.loads(body)
+        self.assertEqual([course['id'] for course in data['results']], [course.pk for course in self.courses])
+        self.assertEqual(data['count'], 3)
+
+    def test_ndjson_has_one_object_per_line(self):
+        response, body = self.stream(output='ndjson')
+        self.assertEqual(response['Content-Type'], streaming.NDJSON_CONTENT_TYPE)
+        lines = body.splitlines()
+        self.assertEqual([json.loads(line)['id'] for line in lines], [course.pk for course in self.courses])
+
+    def test_csv_has_a_header_and_one_row_per_object(self):
+        response, body = self.stream(output='csv', fields='id,title,lessons')
+        self.assertEqual(response['Content-Type'], streaming.CSV_CONTENT_TYPE)
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], ['id', 'title', 'lessons'])
+        self.assertEqual([row[1] for row in rows[1:]], [course.title for course in self.courses])
+        # los campos anidados van como JSON dentro de la celda
+        self.assertEqual(json.loads(rows[1][2]), [])
+
+
+class CatalogQueryCountTests(CatalogTestCase):
+
+    def add_courses(self, count, lessons):
+        instructor = User.objects.create(email=f'instructor-{count}@example.com', role=self.role)
+        category = Category.objects.create(name='data_science')
+        courses = Course.objects.bulk_create(
+            Course(title=f'Curso {index}', description='-', status='publicado', category=category, instructor=instructor)
+            for index in range(count)
+        )
+        Lesson.objects.bulk_create(
+            Lesson(course=course, title=f'Leccion {order}', content='-', order=order)
+            for course in courses
+            for order in range(1, lessons + 1)
+        )
+        CourseStats.objects.bulk_create(CourseStats(course=course) for course in courses)
+
+    def assertListQueries(self, params, expected_courses):
+        cache.clear()
+        # conteo, pagina, lecciones
+        with self.assertNumQueries(3):
+            response = self.client.get('/course/list/', params)
+        self.assertEqual(len(response.data['results']), expected_courses)
+
+    def test_queries_do_not_grow_with_the_catalog(self):
+        params = {'page_size': 100}
+        self.assertListQueries(params, 3)
+        self.add_courses(20, lessons=2)
+        self.assertListQueries(params, 23)
+        self.add_courses(60, lessons=5)
+        self.assertListQueries(params, 83)
+        self.assertListQueries({**params, 'expand': 'lessons'}, 83)
+
+
+class CatalogCacheTests(CatalogTestCase):
+
+    def test_course_write_invalidates_cached_pages(self):
+        response = self.client.get('/course/list/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/course/list/')['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.get(pk=self.courses[0].pk).save(update_fields=['title'])
+
+        second = self.client.get('/course/list/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['X-Cache'], 'MISS')
+
+    def test_stats_changes_are_coalesced(self):
+        response = self.client.get('/course/list/')
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stats.bump(self.courses[0].pk, enrollment_count=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            stats.bump(self.courses[1].pk, enrollment_count=1)
+
+        # dentro de CATALOG_STATS_MAX_AGE se sigue sirviendo la version anterior
+        with override_settings(CATALOG_STATS_MAX_AGE=60):
+            self.assertEqual(self.client.get('/course/list/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        version = catalog_cache.get_version()
+        with override_settings(CATALOG_STATS_MAX_AGE=0):
+            response = self.client.get('/course/list/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Cache'], 'MISS')
+            listed = {course['id']: course for course in response.data['results']}
+            self.assertEqual(listed[self.courses[0].pk]['stats']['students_enrolled'], 1)
+            # los dos cambios suben la version una sola vez
+            self.assertEqual(catalog_cache.get_version(), version + 1)
+
+
+
+class AnalyticsRollupTests(CatalogTestCase):
+
+    def test_average_progress_of_todays_learners(self):
+        course = self.courses[0]
+        lesson = Lesson.objects.create(course=course, title='Leccion', content='-', order=1)
+        active, idle = [
+            User.objects.create(email=f'student-{index}@example.com', role=self.role) for index in range(2)
+        ]
+        LessonProgress.objects.create(student=active, lesson=lesson, progress=80)
+        LessonProgress.objects.create(student=idle, lesson=lesson, progress=10)
+
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        CourseDailyStats.objects.create(course=course, day=yesterday, average_progress=25)
+        LearnerActivity.objects.create(course=course, student=idle, day=yesterday)
+        LearnerActivity.objects.create(course=course, student=active, day=today)
+
+        self.assertEqual(analytics.rollup_activity(), 2)
+
+        daily = {row.day: row for row in CourseDailyStats.objects.filter(course=course)}
+        self.assertEqual(daily[today].active_learners, 1)
+        self.assertEqual(daily[today].average_progress, 80)
+        # el dia anterior no se pisa con el promedio de hoy
+        self.assertEqual(daily[yesterday].active_learners, 1)
+        self.assertEqual(daily[yesterday].average_progress, 25)
+
+    def test_late_commit_with_a_lower_id_is_counted(self):
+        course = self.courses[0]
+        students = [User.objects.create(email=f'student-{index}@example.com', role=self.role) for index in range(3)]
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        CourseDailyStats.objects.create(course=course, day=today, new_enrollments=2)
+
+        LearnerActivity.objects.create(id=100, course=course, student=students[0], day=today)
+        analytics.rollup_activity()
+        self.assertEqual(CourseDailyStats.objects.get(course=course, day=today).active_learners, 1)
+
+        # transacciones que tomaron su id antes que la fila 100 y confirmaron despues del rollup
+        LearnerActivity.objects.create(id=50, course=course, student=students[1], day=today)
+        LearnerActivity.objects.create(id=60, course=course, student=students[2], day=yesterday)
+        self.assertEqual(analytics.prune_activity(), 0)
+        analytics.rollup_activity()
+        # volver a correr no suma dos veces
+        analytics.rollup_activity()
+
+        daily = {row.day: row for row in CourseDailyStats.objects.filter(course=course)}
+        self.assertEqual(daily[today].active_learners, 2)
+        self.assertEqual(daily[yesterday].active_learners, 1)
+        # el rollup solo escribe active_learners
+        self.assertEqual(daily[today].new_enrollments, 2)
+
+    def test_prune_keeps_the_days_still_recounted(self):
+        course = self.courses[0]
+        student = User.objects.create(email='student@example.com', role=self.role)
+        today = timezone.localdate()
+        for offset in range(4):
+            LearnerActivity.objects.create(course=course, student=student, day=today - timedelta(days=offset))
+        analytics.rollup_activity()
+
+        with override_settings(ROLLUP_ACTIVITY_LAG_DAYS=1):
+            self.assertEqual(analytics.prune_activity(), 2)
+        self.assertEqual(
+            set(LearnerActivity.objects.values_list('day', flat=True)), {today, today - timedelta(days=1)})
+        self.assertEqual(CourseDailyStats.objects.get(course=course, day=today - timedelta(days=3)).active_learners, 1)
+
+
+class CourseSearchDocumentTests(CatalogTestCase):
+
+    def test_unrelated_changes_keep_document(self):
+        course = Course.objects.get(pk=self.courses[0].pk)
+        course.status = 'archivado'
+        # sin leer categoria ni instructor: solo el UPDATE
+        with self.assertNumQueries(1):
+            course.save(update_fields=['status'])
+        with self.assertNumQueries(1):
+            course.save()
+
+    def test_title_change_rebuilds_document(self):
+        course = Course.objects.get(pk=self.courses[0].pk)
+        course.title = 'Curso de rust'
+        course.save(update_fields=['title'])
+
+        document = Course.objects.values_list('search_document', flat=True).get(pk=course.pk)
+        self.assertIn('rust', document)
+        self.assertIn('Pérez', document)
+
+    def test_category_change_rebuilds_documents(self):
+        self.assertEqual(self.client.get('/course/list/', {'search': 'science'}).data['results'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'data_science'
+            self.category.save()
+
+        response = self.client.get('/course/list/', {'search': 'science'})
+        self.assertEqual({course['id'] for course in response.data['results']}, {course.pk for course in self.courses})
+
+
+
+def foreign_key_index(model, field_name):
+    # nombre que Django le da al indice de una ForeignKey en la migracion inicial
+    field = model._meta.get_field(field_name)
+    editor = connection.SchemaEditorClass(connection)
+    return editor._create_index_name(model._meta.db_table, [field.column], suffix='')
+
+
+# EXPLAIN del queryset de cada listado: cada uno tiene que usar uno de los indices
+# esperados (los de las migraciones de indices o el de la ForeignKey por la que filtra)
+# y ninguno puede recorrer secuencialmente cursos, inscripciones, lecciones o usuarios. En PostgreSQL se desactiva
+# enable_seqscan: si aun asi el plan usa Seq Scan es que no hay indice que sirva.
+class QueryPlanTests(TestCase):
+
+    checked_tables = {
+        Course._meta.db_table,
+        CourseDailyStats._meta.db_table,
+        Enrollment._meta.db_table,
+        Lesson._meta.db_table,
+        User._meta.db_table,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        instructor_role = Role.objects.create(name='instructor')
+        student_role = Role.objects.create(name='estudiante')
+        cls.instructor = User.objects.create(email='plans-instructor@example.com', role=instructor_role)
+        other = User.objects.create(email='plans-other@example.com', role=instructor_role)
+        cls.student = User.objects.create(email='plans-student@example.com', role=student_role)
+        User.objects.bulk_create(
+            User(email=f'plans-{i}@example.com', role=student_role, is_active=bool(i % 5))
+            for i in range(200)
+        )
+        category = Category.objects.create(name='programacion')
+
+        courses = Course.objects.bulk_create(
+            Course(
+                title=f'Curso {i}',
+                description='Descripcion de prueba',
+                status='publicado' if i % 3 else 'borrador',
+                is_active=bool(i % 7),
+                category=category,
+                instructor=cls.instructor if i % 10 == 0 else other,
+            )
+            for i in range(200)
+        )
+        Lesson.objects.bulk_create(
+            Lesson(course=course, title=f'Leccion {order}', content='x', order=order)
+            for course in courses
+            for order in range(1, 4)
+        )
+        Enrollment.objects.bulk_create(
+            Enrollment(student=cls.student, course=course) for course in courses[::2]
+        )
+        today = timezone.localdate()
+        CourseDailyStats.objects.bulk_create(
+            CourseDailyStats(course=course, day=today - timedelta(days=offset), new_enrollments=1)
+            for course in courses
+            for offset in range(60)
+        )
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertUsesIndex(self, view_class, user, indexes, params=None):
+        request = APIRequestFactory().get('/', params or {})
+        force_authenticate(request, user=user)
+        view = view_class()
+        view.setup(request)
+        view.request = view.initialize_request(request)
+        view.format_kwarg = None
+        plan = view.get_queryset()[:10].explain()
+
+        if connection.vendor == 'postgresql':
+            scans = re.findall(r'Seq Scan on (\w+)', plan)
+        else:
+            # SQLite: "SCAN tabla" sin indice es un recorrido completo
+            scans = re.findall(r'\bSCAN (\w+)\s*$', plan, re.MULTILINE)
+        self.assertFalse(self.checked_tables.intersection(scans), plan)
+        used = set(re.findall(r'\b(?:INDEX|Index Scan using|Index Only Scan using|Bitmap Index Scan on) (\w+)', plan))
+        self.assertTrue(used & set(indexes), f'se esperaba uno de {sorted(indexes)}:\n{plan}')
+
+    def test_course_list(self):
+        self.assertUsesIndex(CourseListAPIView, self.student, ['course_published_idx'])
+
+    def test_course_list_by_instructor(self):
+        self.assertUsesIndex(CourseListByIntructorAPIView, self.instructor, ['course_instructor_active_idx'])
+
+    def test_enrollment_list(self):
+        self.assertUsesIndex(EnrollmentListAPIView, self.student, ['enrollment_student_recent_idx'])
+
+    def test_enrollment_list_by_instructor(self):
+        self.assertUsesIndex(InstructorEnrollmentListAPIView, self.instructor, [
+            'enrollment_course_recent_idx', foreign_key_index(Enrollment, 'course'),
+        ])
+
+    def test_lesson_list(self):
+        self.assertUsesIndex(GetListLessonListAPIView, self.instructor, [
+            'lesson_course_order_unique', foreign_key_index(Lesson, 'course'),
+        ])
+
+    def test_lesson_list_by_instructor(self):
+        self.assertUsesIndex(GetListLessonByInstructorListAPIView, self.instructor, [
+            'lesson_course_order_unique', foreign_key_index(Lesson, 'course'),
+        ])
+
+    def test_course_analytics(self):
+        self.assertUsesIndex(CourseAnalyticsAPIView, self.instructor, [
+            'course_daily_stats_unique', 'sqlite_autoindex_course_coursedailystats_1',
+        ])
+
+    def test_user_list_by_role(self):
+        self.assertUsesIndex(ListsUserAPIView, self.instructor, ['user_active_role_idx'], {'role': 'estudiante'})
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+
+    def test_deploy_requires_shared_cache(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([error.id for error in checks.check_shared_cache(None)], ['course.E001'])
+        shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/cache'}
+        with override_settings(CACHES={'default': shared}):
+            self.assertEqual(checks.check_shared_cache(None), [])
+
+
+class ReplicaCacheCheckTests(SimpleTestCase):
+
+    locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    shared = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/cache'}}
+
+    def test_replicas_require_shared_cache(self):
+        with override_settings(CACHES=self.locmem, DATABASE_REPLICAS=['replica_1']):
+            self.assertEqual([error.id for error in replicas.check_replica_cache(None)], ['replicas.E001'])
+        with override_settings(CACHES=self.shared, DATABASE_REPLICAS=['replica_1']):
+            self.assertEqual(replicas.check_replica_cache(None), [])
+        with override_settings(CACHES=self.locmem, DATABASE_REPLICAS=[]):
+            self.assertEqual(replicas.check_replica_cache(None), [])
+
+
+# devuelve la base que el router elige dentro de la vista, sin leer de la replica
+class ReplicaProbeView(replicas.ReplicaReadMixin, APIView):
+
+    def get(self, request):
+        return Response({'read': router.db_for_read(Course), 'write': router.db_for_write(Course)})
+
+    post = get
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRouterTests(CatalogTestCase):
+
+    def probe(self, method='get'):
+        request = getattr(APIRequestFactory(), method)('/probe/')
+        force_authenticate(request, user=self.instructor)
+        return ReplicaProbeView.as_view()(request).data
+
+    def test_list_reads_from_replica(self):
+        self.assertEqual(self.probe(), {'read': 'replica_1', 'write': 'default'})
+
+    def test_user_who_just_wrote_reads_from_default(self):
+        # el middleware marca la escritura de la peticion que termino bien
+        response = self.client.delete(f'/course/delete/{self.courses[0].pk}')
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue(replicas.wrote_recently(self.instructor))
+        self.assertEqual(self.probe(), {'read': 'default', 'write': 'default'})
+
+    def test_writes_go_to_default(self):
+        self.assertEqual(self.probe('post'), {'read': 'default', 'write': 'default'})
+
+    def test_alias_is_reset_after_response(self):
+        self.probe()
+        self.assertIsNone(replicas.current())
+        self.assertEqual(router.db_for_read(Course), 'default')
+
+
+@override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_SLOW_MS=60000, REQUEST_PROFILING_TOP_QUERIES=2)
+class RequestProfilingTests(CatalogTestCase):
+
+    def timing(self, response):
+        entries = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            entries[name] = dict(param.split('=', 1) for param in params)
+        return entries
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/course/list/')
+        self.assertEqual(response.status_code, 200)
+
+        timing = self.timing(response)
+        self.assertEqual(list(timing), ['auth', 'view', 'serialize', 'render', 'db', 'total'])
+        self.assertEqual(timing['db']['desc'], f'"{len(queries)} queries"')
+        self.assertLessEqual(float(timing['auth']['dur']), float(timing['view']['dur']))
+
+    @override_settings(REQUEST_PROFILING_SLOW_MS=0)
+    def test_slow_request_is_logged(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.assertLogs('gestion_cursos_back.profiling', 'WARNING') as logs:
+                self.client.get('/course/list/?search_title=python')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['event'], 'slow_request')
+        self.assertEqual(record['route'], 'course/list/')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], len(queries))
+        # solo las mas lentas y sin parametros
+        self.assertEqual(len(record['slowest_queries']), 2)
+        self.assertNotIn('python', json.dumps(record['slowest_queries']))
+
+    def test_fast_request_is_not_logged(self):
+        with self.assertNoLogs('gestion_cursos_back.profiling', 'WARNING'):
+            self.client.get('/course/list/')
+
+    def test_install_wraps_once(self):
+        profiling.install()
+        profiling.install()
+        self.assertEqual(APIView.initial.profiled_phase, 'auth')
+        self.assertFalse(hasattr(APIView.initial.__wrapped__, 'profiled_phase'))
+        self.assertFalse(hasattr(BaseSerializer.data.fget.__wrapped__, 'profiled_phase'))
+
+
+class MetricsExpositionTests(SimpleTestCase):
+
+    def test_histogram_buckets_are_cumulative(self):
+        # 2 en el primer bucket, 1 en 0.1 y 1 por encima del ultimo
+        counts = [2] + [0] * 3 + [1] + [0] * 6 + [1]
+        text = metrics.exposition({'http_request_duration_seconds': {('GET', 'course/list/'): counts + [12.5]}})
+
+        prefix = 'http_request_duration_seconds_bucket{method="GET",route="course/list/",'
+        self.assertIn(prefix + 'le="0.005"} 2\n', text)
+        self.assertIn(prefix + 'le="0.05"} 2\n', text)
+        self.assertIn(prefix + 'le="0.1"} 3\n', text)
+        self.assertIn(prefix + 'le="10"} 3\n', text)
+        self.assertIn(prefix + 'le="+Inf"} 4\n', text)
+        self.assertIn('http_request_duration_seconds_sum{method="GET",route="course/list/"} 12.5\n', text)
+        self.assertIn('http_request_duration_seconds_count{method="GET",route="course/list/"} 4\n', text)
+        self.assertIn('# TYPE http_request_duration_seconds histogram\n', text)
+
+    def test_label_values_are_escaped(self):
+        text = metrics.exposition({'http_requests_total': {('GET', 'a\\b"c\nd', '200'): 3}})
+        self.assertIn('http_requests_total{method="GET",route="a\\\\b\\"c\\nd",status="200"} 3\n', text)
+
+
+class MetricsCollectTests(SimpleTestCase):
+
+    def write(self, directory, pid, data):
+        with open(os.path.join(directory, f'{pid}.json'), 'w', encoding='utf-8') as handle:
+            json.dump(data, handle)
+
+    def test_pid_files_are_merged(self):
+        process = subprocess.Popen(['true'])
+        process.wait()
+        histogram = [1] + [0] * 11 + [0.002]
+
+        with tempfile.TemporaryDirectory() as directory:
+            # un worker vivo y uno que ya termino
+            self.write(directory, os.getppid(), {
+                'http_requests_total': [[['GET', 'course/list/', '200'], 2]],
+                'http_requests_in_flight': [[[], 1]],
+                'db_query_duration_seconds': [[['default'], histogram]],
+            })
+            self.write(directory, process.pid, {
+                'http_requests_total': [[['GET', 'course/list/', '200'], 3], [['POST', 'course/create/', '201'], 1]],
+                'http_requests_in_flight': [[[], 4]],
+                'db_query_duration_seconds': [[['default'], histogram]],
+            })
+            with override_settings(METRICS_DIR=directory), mock.patch.object(metrics, '_local_samples', return_value={}):
+                snapshot = metrics.collect()
+
+        self.assertEqual(snapshot['http_requests_total'], {
+            ('GET', 'course/list/', '200'): 5,
+            ('POST', 'course/create/', '201'): 1,
+        })
+        # los gauges de un proceso muerto no cuentan
+        self.assertEqual(snapshot['http_requests_in_flight'], {(): 1})
+        self.assertEqual(snapshot['db_query_duration_seconds'], {('default',): [2] + [0] * 11 + [0.004]})
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import CourseListAPIView, CourseCreateLessonAPIView, CourseListByIntructorAPIView, CourseUpdateAPIView, CourseDeleteAPIView
+from .views import CourseListAPIView, CourseCreateLessonAPIView, CourseListByIntructorAPIView, CourseUpdateAPIView, CourseDeleteAPIView, CourseAnalyticsAPIView
 
 
 
@@ -9,5 +9,6 @@ urlpatterns = [
     path('create/', CourseCreateLessonAPIView.as_view()),
     path('update/<int:pk>', CourseUpdateAPIView.as_view()),
     path('delete/<int:pk>', CourseDeleteAPIView.as_view()),
+    path('analytics/', CourseAnalyticsAPIView.as_view()),
     
 ]
\ No newline at end of file
@@ -4,22 +4,50 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
-from .models import Course
-from .serializers import CourseListSerializer, CourseLessonCreateSerializer, CourseUpdateSerializer
-from rest_framework.pagination import PageNumberPagination
+from .models import Course, CourseDailyStats
+from .serializers import CourseListSerializer, CourseLessonCreateSerializer, CourseUpdateSerializer, CourseDailyStatsSerializer
+from .search import search_courses
+from . import cache as catalog_cache
+from gestion_cursos_back.pagination import KeysetPagination
+from gestion_cursos_back.streaming import stream_list
+from gestion_cursos_back.replicas import ReplicaReadMixin, primary
+from gestion_cursos_back.conditional import not_modified, queryset_validators, set_validators, version_validators
 from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from datetime import timedelta
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 
 
 
-class CoursePagination(PageNumberPagination):
+# Solo se leen las columnas que la respuesta va a mostrar (?fields= / ?expand=)
+def list_queryset(request):
+    queryset = Course.objects.with_list_relations(
+        lessons=CourseListSerializer.shows(request, 'lessons'),
+        lesson_content=CourseListSerializer.expands(request, 'lessons'),
+    )
+    return CourseListSerializer.project(queryset, request)
+
+
+
+
+class CoursePagination(KeysetPagination):
     page_size = 10
     page_size_query_param = 'page_size'
+    cursor_ordering = ('created_at', 'id')
+
+
+class AnalyticsPagination(KeysetPagination):
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_ordering = ('course', 'day')
 
     
-class CourseListAPIView(ListAPIView):
+class CourseListAPIView(ReplicaReadMixin, ListAPIView):
     
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     
@@ -36,6 +64,12 @@ class CourseListAPIView(ListAPIView):
         La paginación puede desactivarse.
         """,
         manual_parameters=[
+            openapi.Parameter(
+                'search',
+                openapi.IN_QUERY,
+                description="Búsqueda de texto completo en título, descripción, categoría e instructor",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'search_title',
                 openapi.IN_QUERY,
@@ -54,6 +88,18 @@ class CourseListAPIView(ListAPIView):
                 description="Buscar por nombre del instructor",
                 type=openapi.TYPE_STRING
             ),
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Campos a incluir separados por coma, por ejemplo id,title,lessons",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'expand',
+                openapi.IN_QUERY,
+                description="lessons para incluir el contenido de las lecciones (por defecto solo título y orden)",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'paginate',
                 openapi.IN_QUERY,
@@ -61,12 +107,31 @@ class CourseListAPIView(ListAPIView):
                 type=openapi.TYPE_BOOLEAN,
                 default=True
             ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="ndjson para exportar un objeto por línea cuando paginate=false",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'page',
                 openapi.IN_QUERY,
                 description="Número de página",
                 type=openapi.TYPE_INTEGER
             ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor de paginación keyset (vacío para la primera página). No se combina con search",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'count',
+                openapi.IN_QUERY,
+                description="true para incluir el total en modo cursor",
+                type=openapi.TYPE_BOOLEAN,
+                default=False
+            ),
         ],
         responses={
             200: CourseListSerializer(many=True),
@@ -83,8 +148,9 @@ class CourseListAPIView(ListAPIView):
     
     def get_queryset(self):
            
-        queryset = Course.objects.filter(is_active=True, status='publicado')
+        queryset = list_queryset(self.request).filter(is_active=True, status='publicado')
         
+        search = self.request.query_params.get('search')
         search_title = self.request.query_params.get('search_title')
         search_category = self.request.query_params.get('search_category')
         search_instructor = self.request.query_params.get('search_instructor')
@@ -99,6 +165,13 @@ class CourseListAPIView(ListAPIView):
                     Q(instructor__first_name__icontains=term) | 
                     Q(instructor__last_name__icontains=term))
         
+        # solo search usa el indice de busqueda; los resultados quedan ordenados por relevancia
+        if search:
+            # el cursor ordena por (created_at, id) y perderia el orden por relevancia
+            if CoursePagination.cursor_query_param in self.request.query_params:
+                raise ValidationError({'cursor': 'No se puede combinar con la búsqueda, use la paginación por página'})
+            return search_courses(queryset, search)
+        
         queryset = queryset.order_by('created_at')
 
         return queryset
@@ -109,15 +182,28 @@ class CourseListAPIView(ListAPIView):
         
         queryset = self.get_queryset()
         
+        # la version del catalogo sirve de validador: un 304 no toca la base
+        etag, last_modified = version_validators(request, catalog_cache.get_version())
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+        
         if pagination == 'false':
-            serializer = self.get_serializer(queryset, many=True)
-            
-            return Response({
-                'count': queryset.count(),
-                'results': serializer.data
-            })
+            return set_validators(stream_list(self, queryset), etag, last_modified)
+        
+        # el catalogo publico es igual para todos los usuarios: se cachea por parametros
+        cache_key = catalog_cache.key_for(request)
+        data = catalog_cache.lookup(cache_key)
+        if data is not None:
+            return set_validators(Response(data, headers={'X-Cache': 'HIT'}), etag, last_modified)
             
-        return super().list(queryset, *args, **kwargs)
+        # lo que se cachea se lee de default: una replica atrasada dejaria en cache
+        # datos de antes de la escritura que cambio la version
+        with primary():
+            response = super().list(request, *args, **kwargs)
+        catalog_cache.store(cache_key, response.data)
+        response['X-Cache'] = 'MISS'
+        return set_validators(response, etag, last_modified)
     
     
 
@@ -126,7 +212,7 @@ class CourseListAPIView(ListAPIView):
 
 
 
-class CourseListByIntructorAPIView(ListAPIView):
+class CourseListByIntructorAPIView(ReplicaReadMixin, ListAPIView):
     
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     
@@ -153,12 +239,43 @@ class CourseListByIntructorAPIView(ListAPIView):
                 openapi.IN_QUERY,
                 type=openapi.TYPE_STRING
             ),
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Campos a incluir separados por coma, por ejemplo id,title,lessons",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'expand',
+                openapi.IN_QUERY,
+                description="lessons para incluir el contenido de las lecciones (por defecto solo título y orden)",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'paginate',
                 openapi.IN_QUERY,
                 type=openapi.TYPE_BOOLEAN,
                 default=True
             ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="ndjson para exportar un objeto por línea cuando paginate=false",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor de paginación keyset (vacío para la primera página)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'count',
+                openapi.IN_QUERY,
+                description="true para incluir el total en modo cursor",
+                type=openapi.TYPE_BOOLEAN,
+                default=False
+            ),
         ],
         responses={200: CourseListSerializer(many=True)},
         tags=["Courses"]
@@ -172,7 +289,7 @@ class CourseListByIntructorAPIView(ListAPIView):
         
         user = self.request.user
         
-        queryset = Course.objects.filter(instructor=user, is_active=True)
+        queryset = list_queryset(self.request).filter(instructor=user, is_active=True)
         
 
         search_title = self.request.query_params.get('search_title')
@@ -197,16 +314,18 @@ class CourseListByIntructorAPIView(ListAPIView):
         pagination = request.query_params.get('paginate', 'true').lower()
         
         queryset = self.get_queryset()
-        
+
+        etag, last_modified = queryset_validators(request, queryset, 'updated_at', 'stats__updated_at')
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
         if pagination == 'false':
-            serializer = self.get_serializer(queryset, many=True)
-            
-            return Response({
-                'count': queryset.count(),
-                'results': serializer.data
-            })
-            
-        return super().list(queryset, *args, **kwargs)
+            response = stream_list(self, queryset)
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        return set_validators(response, etag, last_modified)
 
 
 
@@ -307,4 +426,124 @@ class CourseDeleteAPIView(APIView):
         return Response({'message': 'curso eliminado con exito'}, status=status.HTTP_204_NO_CONTENT)
         
         
-    
\ No newline at end of file
+    
+
+
+
+
+
+
+
+# Analiticas diarias de los cursos del instructor.
+# Lee solo el resumen diario ya agregado (CourseDailyStats): un año de datos son
+# a lo sumo 366 filas por curso, recorridas por el indice (course, day).
+class CourseAnalyticsAPIView(ReplicaReadMixin, ListAPIView):
+    
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    
+    pagination_class = AnalyticsPagination
+    serializer_class = CourseDailyStatsSerializer
+    
+    
+    @swagger_auto_schema(
+        operation_summary="Analíticas diarias de mis cursos",
+        operation_description="""
+        Retorna por curso y por día: nuevas inscripciones, cancelaciones,
+        cursos completados, estudiantes activos y progreso promedio
+        de los estudiantes activos ese día.
+        Por defecto se devuelven los últimos 30 días.
+        """,
+        manual_parameters=[
+            openapi.Parameter(
+                'course',
+                openapi.IN_QUERY,
+                description="Id del curso (por defecto todos los del instructor)",
+                type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'date_from',
+                openapi.IN_QUERY,
+                description="Fecha inicial (AAAA-MM-DD)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'date_to',
+                openapi.IN_QUERY,
+                description="Fecha final (AAAA-MM-DD)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'paginate',
+                openapi.IN_QUERY,
+                type=openapi.TYPE_BOOLEAN,
+                default=True
+            ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="ndjson para exportar un objeto por línea cuando paginate=false",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor de paginación keyset (vacío para la primera página)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Cantidad de registros por página",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={200: CourseDailyStatsSerializer(many=True)},
+        tags=["Courses"]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+    
+    
+    def get_queryset(self):
+        
+        user = self.request.user
+        
+        date_to = self._date_param('date_to') or timezone.localdate()
+        date_from = self._date_param('date_from') or date_to - timedelta(days=29)
+        
+        queryset = CourseDailyStats.objects.select_related('course').filter(
+            course__instructor=user,
+            day__gte=date_from,
+            day__lte=date_to,
+        )
+        
+        course = self.request.query_params.get('course')
+        
+        if course:
+            if not course.isdigit():
+                raise ValidationError({'course': 'Debe ser un id numérico'})
+            queryset = queryset.filter(course_id=course)
+        
+        return queryset.order_by('course', 'day')
+    
+    
+    def _date_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: 'Fecha inválida, use AAAA-MM-DD'})
+        return day
+    
+    
+    def list(self, request, *args, **kwargs):
+        pagination = request.query_params.get('paginate', 'true').lower()
+        
+        if pagination == 'false':
+            return stream_list(self, self.get_queryset())
+        
+        return super().list(request, *args, **kwargs)
@@ -1,16 +1,35 @@
 from rest_framework import serializers
 from apps.course.models import Enrollment
+from apps.course.serializers import CourseOutlineSerializer
+from gestion_cursos_back.fields import SparseFieldsMixin
 
 
 
-class EnrollmentListSerializer(serializers.ModelSerializer):
+class EnrollmentListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     
     student = serializers.StringRelatedField()
     course = serializers.StringRelatedField()
+    lesson_count = serializers.SerializerMethodField()
+    percent_complete = serializers.SerializerMethodField()
+    
+    expandable_fields = {'course': lambda: CourseOutlineSerializer()}
     
     class Meta:
         model = Enrollment
-        fields = ['id', 'student', 'course', 'enrolled_at', 'status']
+        fields = ['id', 'student', 'course', 'enrolled_at', 'status', 'completed_lessons', 'lesson_count', 'percent_complete']
+    
+    
+    # el total sale de course.stats (select_related), sin contar lecciones por fila
+    def get_lesson_count(self, obj):
+        course_stats = getattr(obj.course, 'stats', None)
+        return course_stats.lesson_count if course_stats else 0
+    
+    
+    def get_percent_complete(self, obj):
+        total = self.get_lesson_count(obj)
+        if not total:
+            return 0
+        return min(100, round(obj.completed_lessons * 100 / total, 2))
         
 
 
@@ -1,3 +1,69 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.course import stats
+from apps.course.models import Category, Course, CourseStats, Enrollment
+from apps.enrollment.views import change_status
+from apps.users.models import Role, User
+
+
+class EnrollmentTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create_user(
+            'instructor@example.com', 'password', role=Role.objects.create(name='instructor'))
+        cls.student = User.objects.create_user(
+            'student@example.com', 'password', role=Role.objects.create(name='estudiante'), is_superuser=True)
+        cls.course = Course.objects.create(
+            title='Curso de python', description='Introducción', status='publicado',
+            category=Category.objects.create(name='programacion'), instructor=cls.instructor,
+        )
+        cls.enrollment = Enrollment.objects.create(student=cls.student, course=cls.course)
+        stats.enrollment_status_changed(cls.course.pk, None, Enrollment.STATUS_ACTIVE)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+
+class EnrollmentListValidatorTests(EnrollmentTestCase):
+
+    def test_lesson_count_change_changes_etag(self):
+        response = self.client.get('/enrollment/list/')
+        self.assertEqual(response.data['results'][0]['lesson_count'], 0)
+        self.assertEqual(self.client.get('/enrollment/list/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        # las lecciones solo cambian course.stats, no el curso ni la inscripcion
+        stats.bump(self.course.pk, lesson_count=4)
+
+        response = self.client.get('/enrollment/list/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['lesson_count'], 4)
+
+
+class EnrollmentStatusTests(EnrollmentTestCase):
+
+    def counts(self):
+        course_stats = CourseStats.objects.get(pk=self.course.pk)
+        return course_stats.enrollment_count, course_stats.completion_count
+
+    def test_status_change_updates_stats(self):
+        response = self.client.patch(f'/enrollment/update/{self.enrollment.pk}', {'status': 'completado'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts(), (1, 1))
+
+        response = self.client.patch(f'/enrollment/update/{self.enrollment.pk}', {'status': 'cancelado'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts(), (0, 0))
+
+    def test_concurrent_change_is_counted_once(self):
+        # dos peticiones leyeron la inscripcion activa antes de que cualquiera escribiera
+        first = Enrollment.objects.get(pk=self.enrollment.pk)
+        second = Enrollment.objects.get(pk=self.enrollment.pk)
+
+        change_status(first, Enrollment.STATUS_CANCELLED)
+        change_status(second, Enrollment.STATUS_CANCELLED)
+
+        self.assertEqual(self.counts(), (0, 0))
+        self.assertEqual(Enrollment.objects.get(pk=self.enrollment.pk).status, Enrollment.STATUS_CANCELLED)
@@ -5,21 +5,49 @@ from rest_framework import status
 from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
 from apps.course.models import Enrollment
+from apps.course import completion, stats
 from .serializers import EnrollmentListSerializer, EnrollmentCreateSerializer
-from rest_framework.pagination import PageNumberPagination
+from gestion_cursos_back.pagination import KeysetPagination
+from gestion_cursos_back.streaming import stream_list
+from gestion_cursos_back.replicas import ReplicaReadMixin
+from gestion_cursos_back.conditional import not_modified, queryset_validators, set_validators
+from django.db import transaction
+from django.utils import timezone
 from django.db.models import Q
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 
 
-class EnrollmentPagination(PageNumberPagination):
+# Cambia el estado solo si nadie lo cambio antes (UPDATE ... WHERE status = anterior),
+# asi dos peticiones concurrentes no cuentan dos veces el mismo cambio en las estadisticas
+def change_status(enrollment, new_status):
+    old_status = enrollment.status
+    updated = Enrollment.objects.filter(pk=enrollment.pk, status=old_status).update(
+        status=new_status, updated_at=timezone.now())
+    if updated:
+        stats.enrollment_status_changed(enrollment.course_id, old_status, new_status)
+    enrollment.status = new_status
+
+
+
+
+# el curso se muestra por titulo: sus columnas de texto no se leen
+def enrollment_queryset():
+    return Enrollment.objects.select_related('student', 'course', 'course__stats').defer(
+        'course__description', 'course__search_document')
+
+
+
+
+class EnrollmentPagination(KeysetPagination):
     page_size = 10
     page_size_query_param = 'page_size'
+    cursor_ordering = ('-enrolled_at', '-id')
     
     
 
-class EnrollmentListAPIView(ListAPIView):
+class EnrollmentListAPIView(ReplicaReadMixin, ListAPIView):
     
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     
@@ -40,6 +68,18 @@ class EnrollmentListAPIView(ListAPIView):
                 description="Buscar por nombre del curso",
                 type=openapi.TYPE_STRING
             ),
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Campos a incluir separados por coma, por ejemplo id,course,percent_complete",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'expand',
+                openapi.IN_QUERY,
+                description="course para devolver el curso como objeto (id, título, estado)",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'paginate',
                 openapi.IN_QUERY,
@@ -47,12 +87,31 @@ class EnrollmentListAPIView(ListAPIView):
                 type=openapi.TYPE_BOOLEAN,
                 default=True
             ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="ndjson para exportar un objeto por línea cuando paginate=false",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'page',
                 openapi.IN_QUERY,
                 description="Número de página",
                 type=openapi.TYPE_INTEGER
             ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor de paginación keyset (vacío para la primera página)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'count',
+                openapi.IN_QUERY,
+                description="true para incluir el total en modo cursor",
+                type=openapi.TYPE_BOOLEAN,
+                default=False
+            ),
             openapi.Parameter(
                 'page_size',
                 openapi.IN_QUERY,
@@ -74,7 +133,7 @@ class EnrollmentListAPIView(ListAPIView):
     def get_queryset(self):
         
         user = self.request.user
-        queryset = Enrollment.objects.filter(
+        queryset = enrollment_queryset().filter(
             student=user, 
             status__in=[Enrollment.STATUS_ACTIVE, Enrollment.STATUS_COMPLETED])
         
@@ -94,23 +153,27 @@ class EnrollmentListAPIView(ListAPIView):
         pagination = request.query_params.get('paginate', 'true').lower()
         
         queryset = self.get_queryset()
-        
+
+        # lesson_count y el porcentaje salen de course.stats
+        etag, last_modified = queryset_validators(
+            request, queryset, 'updated_at', 'course__updated_at', 'course__stats__updated_at')
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
         if pagination == 'false':
-            serializer = self.get_serializer(queryset, many=True)
-            
-            return Response({
-                'count': queryset.count(),
-                'results': serializer.data
-            })
-            
-        return super().list(request, *args, **kwargs)
+            response = stream_list(self, queryset)
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        return set_validators(response, etag, last_modified)
     
 
 
 
 
 
-class InstructorEnrollmentListAPIView(ListAPIView):
+class InstructorEnrollmentListAPIView(ReplicaReadMixin, ListAPIView):
     
     
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
@@ -132,17 +195,48 @@ class InstructorEnrollmentListAPIView(ListAPIView):
                 description="Buscar por curso",
                 type=openapi.TYPE_STRING
             ),
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Campos a incluir separados por coma, por ejemplo id,course,percent_complete",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'expand',
+                openapi.IN_QUERY,
+                description="course para devolver el curso como objeto (id, título, estado)",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'paginate',
                 openapi.IN_QUERY,
                 type=openapi.TYPE_BOOLEAN,
                 default=True
             ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="ndjson para exportar un objeto por línea cuando paginate=false",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'page',
                 openapi.IN_QUERY,
                 type=openapi.TYPE_INTEGER
             ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor de paginación keyset (vacío para la primera página)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'count',
+                openapi.IN_QUERY,
+                description="true para incluir el total en modo cursor",
+                type=openapi.TYPE_BOOLEAN,
+                default=False
+            ),
         ],
         responses={200: EnrollmentListSerializer(many=True)},
         tags=["Enrollments"]
@@ -155,7 +249,7 @@ class InstructorEnrollmentListAPIView(ListAPIView):
     def get_queryset(self):
         user = self.request.user
 
-        queryset = Enrollment.objects.filter(
+        queryset = enrollment_queryset().filter(
             course__instructor=user
         )
 
@@ -171,14 +265,19 @@ class InstructorEnrollmentListAPIView(ListAPIView):
         pagination = request.query_params.get('paginate', 'true').lower()
         queryset = self.get_queryset()
 
+        # lesson_count y el porcentaje salen de course.stats
+        etag, last_modified = queryset_validators(
+            request, queryset, 'updated_at', 'course__updated_at', 'course__stats__updated_at')
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
         if pagination == 'false':
-            serializer = self.get_serializer(queryset, many=True)
-            return Response({
-                'count': queryset.count(),
-                'results': serializer.data
-            })
+            response = stream_list(self, queryset)
+        else:
+            response = super().list(request, *args, **kwargs)
 
-        return super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
     
 
 
@@ -221,19 +320,24 @@ class EnrollmentCreateAPIView(APIView):
         ).first()
 
         if not enrollment:
-            enrollment = Enrollment.objects.create(
-                student=student,
-                course=course,
-                status=Enrollment.STATUS_ACTIVE
-            )
+            with transaction.atomic():
+                enrollment = Enrollment.objects.create(
+                    student=student,
+                    course=course,
+                    status=Enrollment.STATUS_ACTIVE
+                )
+                stats.enrollment_status_changed(course.id, None, Enrollment.STATUS_ACTIVE)
             return Response(
                 EnrollmentListSerializer(enrollment).data,
                 status=status.HTTP_201_CREATED
             )
 
         if enrollment.status == Enrollment.STATUS_CANCELLED:
-            enrollment.status = Enrollment.STATUS_ACTIVE
-            enrollment.save(update_fields=['status'])
+            with transaction.atomic():
+                change_status(enrollment, Enrollment.STATUS_ACTIVE)
+                # pudo haber terminado todas las lecciones antes de cancelar
+                if completion.complete_reached(course.id, [student.id]):
+                    enrollment.status = Enrollment.STATUS_COMPLETED
             return Response(
                 EnrollmentListSerializer(enrollment).data,
                 status=status.HTTP_200_OK
@@ -318,7 +422,7 @@ class EnrollmentUpdateAPIView(APIView):
             return Response({'message': 'Inscripcion no encontrada'}, status=status.HTTP_404_NOT_FOUND)
         
         
-        enrollment.status = new_status
-        enrollment.save()
+        with transaction.atomic():
+            change_status(enrollment, new_status)
         
         return Response({'message': 'Inscripcion cancelada'}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -1,11 +1,21 @@
 from rest_framework import serializers
-from apps.course.models import Lesson
-from django.db.models import Max
+from apps.course.models import Course, Lesson
+from apps.course import cache as catalog_cache
+from apps.course import completion
+from apps.course.serializers import CourseOutlineSerializer
+from gestion_cursos_back.fields import SparseFieldsMixin
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
 
 
 
-class LessonListSerializer(serializers.ModelSerializer):
+class LessonListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     course = serializers.StringRelatedField()
+    
+    expandable_fields = {'course': lambda: CourseOutlineSerializer()}
+    deferrable_fields = {'content': ['content']}
+    
     class Meta:
         model = Lesson
         fields = ['id', 'course', 'title', 'content', 'created_at', 'order']
@@ -24,22 +34,101 @@ class LessonCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         course = validated_data['course']
 
-        # obtenemos el numero mayor del order y la gargamos 1 para este quede en secuencia
-        last_order = (
-            Lesson.objects
-            .filter(course=course)
-            .aggregate(Max('order'))
-            ['order__max']
-        )
+        # el contador del curso entrega el siguiente order sin recorrer sus lecciones
+        with transaction.atomic():
+            validated_data['order'] = course.allocate_lesson_orders(1)
+            return super().create(validated_data)
+    
 
-        validated_data['order'] = (last_order or 0) + 1
 
-        return super().create(validated_data)
+class LessonUpdateSerializer(serializers.ModelSerializer):
     
+    class Meta:
+        model = Lesson
+        fields = ['title', 'content']
 
 
-class LessonUpdateSerializer(serializers.ModelSerializer):
+
+
+class LessonBulkItemSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Lesson
-        fields = ['title', 'content']
\ No newline at end of file
+        fields = ['title', 'content']
+
+
+# Agrega muchas lecciones al final de un curso existente:
+# se valida todo el lote, se reservan los orders de una vez y se inserta con bulk_create
+class LessonBulkCreateSerializer(serializers.Serializer):
+    
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
+    lessons = LessonBulkItemSerializer(many=True, allow_empty=False, max_length=1000)
+    
+    
+    def create(self, validated_data):
+        lessons_data = validated_data['lessons']
+        
+        with transaction.atomic():
+            course = validated_data['course']
+            first_order = course.allocate_lesson_orders(len(lessons_data))
+            
+            lessons = Lesson.objects.bulk_create([
+                Lesson(course=course, order=first_order + index, **lesson_data)
+                for index, lesson_data in enumerate(lessons_data)
+            ])
+            # bulk_create no envia post_save
+            Course.objects.filter(pk=course.pk).update(updated_at=timezone.now())
+            completion.lessons_added(course.pk, len(lessons))
+            catalog_cache.bump_version()
+        
+        return lessons
+
+
+
+# Aplica un nuevo orden completo a las lecciones de un curso.
+# `lessons` es la lista de ids en el orden deseado y debe contener todas las lecciones del curso.
+class LessonReorderSerializer(serializers.Serializer):
+    
+    course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
+    lessons = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    
+    
+    def validate(self, attrs):
+        lesson_ids = attrs['lessons']
+        if len(set(lesson_ids)) != len(lesson_ids):
+            raise serializers.ValidationError({'lessons': 'Hay lecciones repetidas'})
+        
+        self._check_complete(attrs['course'], lesson_ids)
+        return attrs
+    
+    
+    def _check_complete(self, course, lesson_ids):
+        current = set(Lesson.objects.filter(course=course).values_list('id', flat=True))
+        if current != set(lesson_ids):
+            raise serializers.ValidationError({'lessons': 'La lista debe contener exactamente las lecciones del curso'})
+    
+    
+    def save(self):
+        course = self.validated_data['course']
+        lesson_ids = self.validated_data['lessons']
+        
+        with transaction.atomic():
+            # el bloqueo del curso espera a las altas de lecciones en curso (ver allocate_lesson_orders)
+            last_order = Course.objects.select_for_update().values_list('last_lesson_order', flat=True).get(pk=course.pk)
+            # se vuelve a comprobar con el curso bloqueado por si entro una leccion nueva
+            self._check_complete(course, lesson_ids)
+            lessons = Lesson.objects.filter(course=course)
+            
+            # se corren todos los orders por encima del ultimo asignado para que la
+            # asignacion final nunca choque con la restriccion unica (course, order)
+            lessons.update(order=F('order') + last_order)
+            lessons.update(
+                order=Case(
+                    *[When(id=lesson_id, then=Value(index)) for index, lesson_id in enumerate(lesson_ids, start=1)]
+                ),
+                updated_at=timezone.now(),
+            )
+            Course.objects.filter(pk=course.pk).update(updated_at=timezone.now())
+            catalog_cache.bump_version()
+        
+        return lessons.order_by('order')
@@ -1,3 +1,156 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.course.models import Category, Course, CourseStats, Lesson
+from apps.lesson.serializers import LessonCreateSerializer
+from apps.users.models import Role, User
+
+
+# Crea lecciones del mismo curso desde varios hilos a la vez (cada uno con su conexion)
+# y comprueba que no haya orders repetidos ni errores de integridad.
+class LessonOrderConcurrencyTests(TransactionTestCase):
+
+    workers = 8
+    lessons = 10
+
+    def setUp(self):
+        instructor = User.objects.create(
+            email='stress-lessons@example.com', role=Role.objects.create(name='instructor'))
+        self.course = Course.objects.create(
+            title='Stress order', description='-', instructor=instructor,
+            category=Category.objects.create(name='programacion'),
+        )
+
+    def _worker(self, errors):
+        try:
+            for index in range(self.lessons):
+                serializer = LessonCreateSerializer(
+                    data={'course': self.course.pk, 'title': f'Leccion {index}', 'content': '-'})
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
+        except Exception as exc:
+            errors.append(repr(exc))
+        finally:
+            connection.close()
+
+    def test_concurrent_creates_get_distinct_orders(self):
+        # la base SQLite en memoria de los tests bloquea la tabla en lugar de esperar
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            self.skipTest('requiere una base en archivo o PostgreSQL')
+
+        errors = []
+        threads = [threading.Thread(target=self._worker, args=(errors,)) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        lessons = Lesson.objects.filter(course=self.course)
+        self.assertEqual(lessons.count(), self.workers * self.lessons)
+        self.assertFalse(lessons.values('order').annotate(total=Count('id')).filter(total__gt=1).exists())
+        self.assertEqual(
+            sorted(lessons.values_list('order', flat=True)),
+            list(range(1, self.workers * self.lessons + 1)),
+        )
+
+
+class LessonTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.instructor = User.objects.create(
+            email='instructor@example.com', role=Role.objects.create(name='instructor'), is_superuser=True)
+        cls.course = Course.objects.create(
+            title='Curso', description='-', instructor=cls.instructor,
+            category=Category.objects.create(name='programacion'),
+        )
+        for index in range(3):
+            serializer = LessonCreateSerializer(data={'course': cls.course.pk, 'title': f'Leccion {index}', 'content': '-'})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        cls.lesson_ids = list(Lesson.objects.filter(course=cls.course).order_by('order').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.instructor)
+
+
+class LessonReorderTests(LessonTestCase):
+
+    def test_reorder(self):
+        reversed_ids = self.lesson_ids[::-1]
+        response = self.client.put('/lesson/reorder/', {'course': self.course.pk, 'lessons': reversed_ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(Lesson.objects.filter(course=self.course).order_by('order').values_list('id', flat=True)),
+            reversed_ids,
+        )
+
+    def test_reorder_requires_every_lesson(self):
+        response = self.client.put('/lesson/reorder/', {'course': self.course.pk, 'lessons': self.lesson_ids[:2]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('lessons', response.data['errors'])
+
+
+class LessonBulkCreateTests(LessonTestCase):
+
+    def bulk_create(self, count):
+        lessons = [{'title': f'Nueva {index}', 'content': '-'} for index in range(count)]
+        return self.client.post('/lesson/bulk_create/', {'course': self.course.pk, 'lessons': lessons}, format='json')
+
+    def test_lessons_are_appended_with_contiguous_orders(self):
+        response = self.bulk_create(5)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual([lesson['order'] for lesson in response.data['results']], [4, 5, 6, 7, 8])
+        self.assertEqual(
+            list(Lesson.objects.filter(course=self.course).order_by('order').values_list('order', flat=True)),
+            list(range(1, 9)),
+        )
+        self.assertEqual(CourseStats.objects.get(pk=self.course.pk).lesson_count, 8)
+
+        # el contador del curso sigue despues del lote
+        serializer = LessonCreateSerializer(data={'course': self.course.pk, 'title': 'Otra', 'content': '-'})
+        serializer.is_valid(raise_exception=True)
+        self.assertEqual(serializer.save().order, 9)
+
+    def test_batch_limit(self):
+        response = self.bulk_create(1001)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('lessons', response.data['errors'])
+        self.assertEqual(Lesson.objects.filter(course=self.course).count(), 3)
+        self.assertEqual(CourseStats.objects.get(pk=self.course.pk).lesson_count, 3)
+
+
+class LessonSparseFieldsTests(LessonTestCase):
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/lesson/list/', params)
+        self.assertEqual(response.status_code, 200)
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        return response.data['results'], sql
+
+    def test_fields_limit_the_response_and_the_columns(self):
+        results, sql = self.get(fields='id,title')
+        self.assertEqual([set(lesson) for lesson in results], [{'id', 'title'}] * 3)
+        self.assertNotIn('"content"', sql)
+        self.assertNotIn('"description"', sql)
+
+        results, sql = self.get()
+        self.assertEqual(results[0]['content'], '-')
+        self.assertIn('"content"', sql)
+
+    def test_expand_course(self):
+        results, _ = self.get(fields='id,course')
+        self.assertEqual(results[0]['course'], 'Curso')
+
+        results, sql = self.get(fields='id,course', expand='course')
+        self.assertEqual(results[0]['course'], {'id': self.course.pk, 'title': 'Curso', 'status': 'borrador'})
+        self.assertNotIn('"description"', sql)
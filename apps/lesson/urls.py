@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import GetListLessonListAPIView, GetListLessonByInstructorListAPIView, PostLessonAPIView, UpdateLessonAPIView, DeleteLessonAPIView
+from .views import GetListLessonListAPIView, GetListLessonByInstructorListAPIView, PostLessonAPIView, BulkCreateLessonAPIView, ReorderLessonAPIView, UpdateLessonAPIView, DeleteLessonAPIView
 
 
 
@@ -7,6 +7,8 @@ urlpatterns = [
     path('list/', GetListLessonListAPIView.as_view()),
     path('list_by_instructor/', GetListLessonByInstructorListAPIView.as_view()),
     path('create/', PostLessonAPIView.as_view()),
+    path('bulk_create/', BulkCreateLessonAPIView.as_view()),
+    path('reorder/', ReorderLessonAPIView.as_view()),
     path('update/<int:pk>', UpdateLessonAPIView.as_view()),
     path('delete/<int:pk>', DeleteLessonAPIView.as_view()),
 ]
\ No newline at end of file
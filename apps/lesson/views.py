@@ -5,20 +5,31 @@ from rest_framework import status
 from rest_framework.generics import ListAPIView
 from rest_framework.views import APIView
 from apps.course.models import Lesson
-from .serializers import LessonListSerializer, LessonCreateSerializer, LessonUpdateSerializer
-from rest_framework.pagination import PageNumberPagination
+from .serializers import LessonListSerializer, LessonCreateSerializer, LessonUpdateSerializer, LessonBulkCreateSerializer, LessonReorderSerializer
+from gestion_cursos_back.pagination import KeysetPagination
+from gestion_cursos_back.streaming import stream_list
+from gestion_cursos_back.replicas import ReplicaReadMixin
+from gestion_cursos_back.conditional import not_modified, queryset_validators, set_validators
 from django.db.models import Q
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 
-class PaginationLesson(PageNumberPagination):
+# del curso solo se muestra el titulo (o el resumen con ?expand=course)
+def lesson_queryset(request):
+    queryset = Lesson.objects.select_related('course').defer('course__description', 'course__search_document')
+    return LessonListSerializer.project(queryset, request)
+
+
+
+class PaginationLesson(KeysetPagination):
     page_size = 10
     page_size_query_param = 'page_size'
+    cursor_ordering = ('course', 'order', 'id')
     
     
 
-class GetListLessonListAPIView(ListAPIView):
+class GetListLessonListAPIView(ReplicaReadMixin, ListAPIView):
     
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     
@@ -32,6 +43,18 @@ class GetListLessonListAPIView(ListAPIView):
         La paginación puede desactivarse usando `paginate=false`.
         """,
         manual_parameters=[
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Campos a incluir separados por coma, por ejemplo id,title,order",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'expand',
+                openapi.IN_QUERY,
+                description="course para devolver el curso como objeto (id, título, estado)",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'paginate',
                 openapi.IN_QUERY,
@@ -39,12 +62,31 @@ class GetListLessonListAPIView(ListAPIView):
                 type=openapi.TYPE_BOOLEAN,
                 default=True
             ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="ndjson para exportar un objeto por línea cuando paginate=false",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'page',
                 openapi.IN_QUERY,
                 description="Número de página",
                 type=openapi.TYPE_INTEGER
             ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor de paginación keyset (vacío para la primera página)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'count',
+                openapi.IN_QUERY,
+                description="true para incluir el total en modo cursor",
+                type=openapi.TYPE_BOOLEAN,
+                default=False
+            ),
             openapi.Parameter(
                 'page_size',
                 openapi.IN_QUERY,
@@ -65,7 +107,7 @@ class GetListLessonListAPIView(ListAPIView):
     
     def get_queryset(self):
         
-        queryset = Lesson.objects.all().order_by('course')
+        queryset = lesson_queryset(self.request).order_by('course')
         
         return queryset
 
@@ -76,22 +118,25 @@ class GetListLessonListAPIView(ListAPIView):
         pagination = request.query_params.get('paginate', 'true').lower()
         
         queryset = self.get_queryset()
-        
+
+        etag, last_modified = queryset_validators(request, queryset, 'updated_at', 'course__updated_at')
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
         if pagination == 'false':
-            serializer = self.get_serializer(queryset, many=True)
-            return Response({
-                'count': queryset.count(),
-                'results': serializer.data
-            })
-            
-        return super().list(request, *args, **kwargs)
+            response = stream_list(self, queryset)
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        return set_validators(response, etag, last_modified)
         
         
 
 
 
 
-class GetListLessonByInstructorListAPIView(ListAPIView):
+class GetListLessonByInstructorListAPIView(ReplicaReadMixin, ListAPIView):
     
     
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
@@ -104,17 +149,48 @@ class GetListLessonByInstructorListAPIView(ListAPIView):
         operation_summary="Listar lecciones del instructor",
         operation_description="Retorna las lecciones asociadas a cursos del instructor autenticado",
         manual_parameters=[
+            openapi.Parameter(
+                'fields',
+                openapi.IN_QUERY,
+                description="Campos a incluir separados por coma, por ejemplo id,title,order",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'expand',
+                openapi.IN_QUERY,
+                description="course para devolver el curso como objeto (id, título, estado)",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'paginate',
                 openapi.IN_QUERY,
                 type=openapi.TYPE_BOOLEAN,
                 default=True
             ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="ndjson para exportar un objeto por línea cuando paginate=false",
+                type=openapi.TYPE_STRING
+            ),
             openapi.Parameter(
                 'page',
                 openapi.IN_QUERY,
                 type=openapi.TYPE_INTEGER
             ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor de paginación keyset (vacío para la primera página)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'count',
+                openapi.IN_QUERY,
+                description="true para incluir el total en modo cursor",
+                type=openapi.TYPE_BOOLEAN,
+                default=False
+            ),
         ],
         responses={200: LessonListSerializer(many=True)},
         tags=["Lessons"]
@@ -127,7 +203,7 @@ class GetListLessonByInstructorListAPIView(ListAPIView):
     def get_queryset(self):
         
         user = self.request.user
-        queryset = Lesson.objects.filter(course__instructor=user).order_by('course')
+        queryset = lesson_queryset(self.request).filter(course__instructor=user).order_by('course')
         
         return queryset
     
@@ -138,15 +214,18 @@ class GetListLessonByInstructorListAPIView(ListAPIView):
         pagination = request.query_params.get('paginate', 'true').lower()
         
         queryset = self.get_queryset()
-        
+
+        etag, last_modified = queryset_validators(request, queryset, 'updated_at', 'course__updated_at')
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
         if pagination == 'false':
-            serializer = self.get_serializer(queryset, many=True)
-            return Response({
-                'count': queryset.count(),
-                'results': serializer.data
-            })
-            
-        return super().list(request, *args, **kwargs)
+            response = stream_list(self, queryset)
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        return set_validators(response, etag, last_modified)
         
     
     
@@ -184,6 +263,77 @@ class PostLessonAPIView(APIView):
 
 
 
+class BulkCreateLessonAPIView(APIView):
+    
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    queryset = Lesson.objects.all()
+    
+    
+    @swagger_auto_schema(
+        operation_summary="Importar lecciones en lote",
+        operation_description="""
+        Agrega varias lecciones al final de un curso existente.
+        El order se asigna de forma consecutiva a partir de la última lección.
+        """,
+        request_body=LessonBulkCreateSerializer,
+        responses={
+            201: LessonListSerializer(many=True),
+            400: "Datos inválidos",
+            403: "Sin permisos"
+        },
+        tags=["Lessons"]
+    )
+    def post(self, request):
+        
+        serializer = LessonBulkCreateSerializer(data=request.data)
+        
+        if serializer.is_valid():
+            lessons = serializer.save()
+            
+            return Response({
+                'count': len(lessons),
+                'results': LessonListSerializer(lessons, many=True).data
+            }, status=status.HTTP_201_CREATED)
+        
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+
+
+class ReorderLessonAPIView(APIView):
+    
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    queryset = Lesson.objects.all()
+    
+    
+    @swagger_auto_schema(
+        operation_summary="Reordenar lecciones",
+        operation_description="""
+        Aplica un nuevo orden a todas las lecciones de un curso.
+        `lessons` es la lista de ids de lecciones en el orden deseado.
+        """,
+        request_body=LessonReorderSerializer,
+        responses={
+            200: LessonListSerializer(many=True),
+            400: "Datos inválidos",
+            403: "Sin permisos"
+        },
+        tags=["Lessons"]
+    )
+    def put(self, request):
+        
+        serializer = LessonReorderSerializer(data=request.data)
+        
+        if serializer.is_valid():
+            lessons = serializer.save()
+            
+            return Response(LessonListSerializer(lessons.select_related('course'), many=True).data, status=status.HTTP_200_OK)
+        
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+
+
 class UpdateLessonAPIView(APIView):
     
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
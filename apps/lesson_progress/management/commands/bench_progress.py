@@ -0,0 +1,103 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.course.models import Category, Course, Lesson, LessonProgress
+from apps.lesson_progress.progress import ProgressBuffer, upsert_progress
+from apps.users.models import Role, User
+
+
+# Simula muchos estudiantes viendo lecciones a la vez, cada uno enviando un latido cada
+# `--interval` segundos, y compara las escrituras por segundo de hacer un upsert por latido
+# contra el buffer con coalescencia. El tiempo simulado avanza con un reloj virtual; el
+# tiempo de base de datos es real. Todo se revierte al final.
+class Command(BaseCommand):
+    help = 'Benchmark de escrituras de progreso con y sin coalescencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--learners', type=int, default=10000)
+        parser.add_argument('--lessons', type=int, default=50)
+        parser.add_argument('--interval', type=int, default=1, help='Segundos entre latidos de un estudiante')
+        parser.add_argument('--duration', type=int, default=60, help='Segundos simulados')
+        parser.add_argument('--window', type=float, default=2.0, help='Ventana de coalescencia en segundos')
+        parser.add_argument('--naive-sample', type=int, default=2000,
+                            help='Latidos escritos uno a uno para medir el costo sin coalescencia')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            student_ids, lesson_ids = self._seed(options['learners'], options['lessons'])
+            naive_cost = self._naive_cost(student_ids, lesson_ids, options['naive_sample'])
+            LessonProgress.objects.all().delete()
+            self._report(student_ids, lesson_ids, naive_cost, options)
+            transaction.set_rollback(True)
+
+    def _seed(self, learners, lessons):
+        role, _ = Role.objects.get_or_create(name='estudiante')
+        instructor = User.objects.create(email='bench-progress@example.com', role=role)
+        category = Category.objects.create(name='programacion')
+        course = Course.objects.create(
+            title='Bench progress', description='-', category=category, instructor=instructor)
+        lesson_objs = Lesson.objects.bulk_create(
+            Lesson(course=course, title=f'Leccion {order}', content='-', order=order)
+            for order in range(1, lessons + 1)
+        )
+        students = User.objects.bulk_create(
+            User(email=f'bench-learner-{index}@example.com', role=role)
+            for index in range(learners)
+        )
+        return [student.pk for student in students], [lesson.pk for lesson in lesson_objs]
+
+    def _naive_cost(self, student_ids, lesson_ids, sample):
+        start = time.perf_counter()
+        for index in range(sample):
+            student_id = student_ids[index % len(student_ids)]
+            upsert_progress({(student_id, lesson_ids[index % len(lesson_ids)]): (Decimal(index % 100), False)})
+        return (time.perf_counter() - start) / sample
+
+    def _report(self, student_ids, lesson_ids, naive_cost, options):
+        interval = options['interval']
+        duration = options['duration']
+        now = [0.0]
+        flushes = []
+
+        def writer(rows):
+            start = time.perf_counter()
+            written = upsert_progress(rows)
+            flushes.append((written, time.perf_counter() - start))
+            return written
+
+        buffer = ProgressBuffer(
+            window=options['window'], max_rows=len(student_ids) * 2, clock=lambda: now[0], writer=writer)
+
+        heartbeats = 0
+        for second in range(duration):
+            now[0] = float(second)
+            for index, student_id in enumerate(student_ids):
+                # los estudiantes se reparten a lo largo del intervalo
+                if (second + index) % interval:
+                    continue
+                beat = (second + index) // interval
+                progress = Decimal(min(100, beat * 2))
+                buffer.add(student_id, [(lesson_ids[index % len(lesson_ids)], progress, progress >= 100)])
+                heartbeats += 1
+        buffer.flush()
+
+        rows = sum(written for written, _ in flushes)
+        db_time = sum(elapsed for _, elapsed in flushes)
+        self.stdout.write(
+            f'{len(student_ids)} estudiantes, latido cada {interval}s, {duration}s simulados: '
+            f'{heartbeats / duration:.0f} latidos/s'
+        )
+        self.stdout.write(
+            f'  sin coalescencia: {heartbeats / duration:.0f} upserts/s | '
+            f'{naive_cost * 1000:.3f} ms por upsert | '
+            f'{heartbeats / duration * naive_cost:.2f}s de base por segundo'
+        )
+        self.stdout.write(
+            f'  con ventana de {options["window"]}s: {len(flushes) / duration:.2f} escrituras en lote/s | '
+            f'{rows / duration:.0f} filas/s | '
+            f'{db_time / duration:.3f}s de base por segundo'
+        )
+        self.stdout.write(f'  filas de progreso al final: {LessonProgress.objects.count()}')
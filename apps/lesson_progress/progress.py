@@ -0,0 +1,214 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.course import analytics, completion
+from apps.course.models import LessonProgress
+
+
+# Escritura de progreso con coalescencia.
+# Los reproductores envian muchos latidos por minuto; en memoria se guarda solo el mayor
+# progreso por (estudiante, leccion) y cada `window` segundos se escribe todo junto con un
+# unico INSERT ... ON CONFLICT DO UPDATE. El upsert nunca baja el progreso ni desmarca una
+# leccion completada, asi varios workers pueden escribir el mismo par sin coordinarse.
+# Los pares que pasan a completados se informan a apps/course/completion.py y la actividad
+# del dia a apps/course/analytics.py.
+# Ademas de las peticiones, un hilo por proceso escribe lo pendiente cuando vence la ventana,
+# asi los ultimos latidos no esperan a que llegue otro. Si la escritura falla las filas
+# vuelven al buffer y se reintentan en la siguiente.
+
+logger = logging.getLogger(__name__)
+
+UPSERT_COLUMNS = ['student_id', 'lesson_id', 'progress', 'completed', 'updated_at']
+
+
+def upsert_progress(rows):
+    # rows: {(student_id, lesson_id): (progress, completed)}
+    if not rows:
+        return 0
+
+    opts = LessonProgress._meta
+    progress_field = opts.get_field('progress')
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    values = [
+        (
+            student_id,
+            lesson_id,
+            connection.ops.adapt_decimalfield_value(progress, progress_field.max_digits, progress_field.decimal_places),
+            completed,
+            now,
+        )
+        for (student_id, lesson_id), (progress, completed) in rows.items()
+    ]
+    finished = [row for row in values if row[3]]
+
+    with transaction.atomic():
+        # las filas nuevas entran sin completar; el paso a completada va aparte
+        # para saber exactamente que pares cambiaron
+        _execute_upsert(
+            [row[:3] + (False,) + row[4:] for row in values],
+            f'{{progress}} = {_greatest()}({{table}}.{{progress}}, excluded.{{progress}}), '
+            f'{{updated_at}} = excluded.{{updated_at}}',
+        )
+        if finished:
+            completion.lessons_completed(_mark_completed(finished))
+        analytics.record_activity(list(rows))
+    return len(values)
+
+
+def _mark_completed(values):
+    update = '{completed} = %s, {updated_at} = excluded.{updated_at}'
+    condition = 'NOT {table}.{completed}'
+
+    if connection.features.can_return_rows_from_bulk_insert:
+        # RETURNING solo devuelve las filas que el WHERE dejo actualizar
+        return _execute_upsert(values, update, condition, returning=True)
+
+    # SQLite anterior a 3.35: se leen antes las que ya estaban completadas
+    pairs = {(row[0], row[1]) for row in values}
+    already = set(
+        LessonProgress.objects.filter(
+            student_id__in={student_id for student_id, _ in pairs},
+            lesson_id__in={lesson_id for _, lesson_id in pairs},
+            completed=True,
+        ).values_list('student_id', 'lesson_id')
+    )
+    _execute_upsert(values, update, condition)
+    return sorted(pairs - already)
+
+
+def _execute_upsert(values, update, condition=None, returning=False):
+    qn = connection.ops.quote_name
+    names = {
+        'table': qn(LessonProgress._meta.db_table),
+        'progress': qn('progress'),
+        'completed': qn('completed'),
+        'updated_at': qn('updated_at'),
+    }
+    update = update.format(**names)
+    update_params = [True] if '%s' in update else []
+    where = f' WHERE {condition.format(**names)}' if condition else ''
+    suffix = f' RETURNING {qn("student_id")}, {qn("lesson_id")}' if returning else ''
+
+    changed = []
+    batch_size = connection.ops.bulk_batch_size(UPSERT_COLUMNS, values) or len(values)
+    with connection.cursor() as cursor:
+        for start in range(0, len(values), batch_size):
+            batch = values[start:start + batch_size]
+            placeholders = ', '.join(['(%s, %s, %s, %s, %s)'] * len(batch))
+            cursor.execute(
+                f'INSERT INTO {names["table"]} ({", ".join(qn(column) for column in UPSERT_COLUMNS)}) '
+                f'VALUES {placeholders} '
+                f'ON CONFLICT ({qn("student_id")}, {qn("lesson_id")}) DO UPDATE SET {update}{where}{suffix}',
+                [value for row in batch for value in row] + update_params,
+            )
+            if returning:
+                changed.extend(tuple(row) for row in cursor.fetchall())
+    return changed
+
+
+def _greatest():
+    return 'GREATEST' if connection.vendor == 'postgresql' else 'MAX'
+
+
+class ProgressBuffer:
+
+    def __init__(self, window, max_rows, clock=time.monotonic, writer=upsert_progress, background=False):
+        self.window = window
+        self.max_rows = max_rows
+        self.clock = clock
+        self.writer = writer
+        self.background = background
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._opened_at = None
+        self._timer_pid = None
+
+    def add(self, student_id, heartbeats):
+        # heartbeats: [(lesson_id, progress, completed)]
+        with self._lock:
+            self._merge({(student_id, lesson_id): (progress, completed) for lesson_id, progress, completed in heartbeats})
+            due = self.window <= 0 or len(self._rows) >= self.max_rows or self._expired()
+
+        if due:
+            return self.flush()
+        self._start_timer()
+        return 0
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, {}
+            opened_at, self._opened_at = self._opened_at, None
+        try:
+            return self.writer(rows)
+        except Exception:
+            # se devuelven al buffer (con lo que haya llegado mientras tanto) para el proximo intento
+            with self._lock:
+                self._merge(rows)
+                if opened_at is not None and self._opened_at is not None:
+                    self._opened_at = min(self._opened_at, opened_at)
+            raise
+
+    def _merge(self, rows):
+        if rows and self._opened_at is None:
+            self._opened_at = self.clock()
+        for key, (progress, completed) in rows.items():
+            current = self._rows.get(key)
+            if current is not None:
+                progress = max(progress, current[0])
+                completed = completed or current[1]
+            self._rows[key] = (progress, completed)
+
+    def _expired(self):
+        return self._opened_at is not None and self.clock() - self._opened_at >= self.window
+
+    def _start_timer(self):
+        # uno por proceso: el de un padre que hizo fork no existe en el hijo
+        if not self.background or self.window <= 0 or self._timer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._timer_pid == os.getpid():
+                return
+            self._timer_pid = os.getpid()
+        threading.Thread(target=self._run_timer, name='progress-flush', daemon=True).start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.window)
+            with self._lock:
+                due = self._expired()
+            if not due:
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('No se pudo escribir el progreso pendiente')
+            finally:
+                # el hilo tiene su propia conexion
+                connection.close()
+
+    def __len__(self):
+        return len(self._rows)
+
+
+buffer = ProgressBuffer(
+    window=getattr(settings, 'PROGRESS_FLUSH_WINDOW', 2.0),
+    max_rows=getattr(settings, 'PROGRESS_FLUSH_MAX_ROWS', 5000),
+    background=True,
+)
+
+
+def _flush_on_exit():
+    try:
+        buffer.flush()
+    except Exception:
+        pass
+
+
+atexit.register(_flush_on_exit)
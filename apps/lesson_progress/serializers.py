@@ -0,0 +1,52 @@
+from decimal import Decimal
+from rest_framework import serializers
+from apps.course.models import Enrollment, Lesson
+from .progress import buffer
+
+
+
+class HeartbeatSerializer(serializers.Serializer):
+    
+    lesson = serializers.IntegerField()
+    progress = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=Decimal('0'), max_value=Decimal('100'))
+    completed = serializers.BooleanField(default=False)
+
+
+
+# Lote de latidos del reproductor: varias lecciones por peticion.
+# Las lecciones se validan con una sola consulta y solo se aceptan las de cursos
+# en los que el estudiante tiene una inscripcion vigente.
+class HeartbeatBatchSerializer(serializers.Serializer):
+    
+    heartbeats = HeartbeatSerializer(many=True, allow_empty=False, max_length=500)
+    
+    
+    def validate_heartbeats(self, heartbeats):
+        student = self.context['request'].user
+        lesson_ids = {heartbeat['lesson'] for heartbeat in heartbeats}
+        allowed = set(
+            Lesson.objects.filter(
+                id__in=lesson_ids,
+                course__enrollments__student=student,
+                course__enrollments__status__in=(Enrollment.STATUS_ACTIVE, Enrollment.STATUS_COMPLETED),
+            ).values_list('id', flat=True)
+        )
+        missing = sorted(lesson_ids - allowed)
+        if missing:
+            raise serializers.ValidationError(
+                f'Lecciones inexistentes o de cursos sin inscripción: {missing}')
+        return heartbeats
+    
+    
+    def save(self):
+        student = self.context['request'].user
+        heartbeats = [
+            (
+                heartbeat['lesson'],
+                heartbeat['progress'],
+                heartbeat['completed'] or heartbeat['progress'] >= 100,
+            )
+            for heartbeat in self.validated_data['heartbeats']
+        ]
+        buffer.add(student.pk, heartbeats)
+        return len(heartbeats)
@@ -1,3 +1,104 @@
-from django.test import TestCase
+import time
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+
+from apps.course.models import Category, Course, Enrollment, Lesson, LessonProgress
+from apps.lesson_progress.progress import ProgressBuffer, upsert_progress
+from apps.users.models import Role, User
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ProgressBufferTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.writes = []
+        self.buffer = ProgressBuffer(window=2, max_rows=3, clock=self.clock, writer=self.write)
+
+    def write(self, rows):
+        self.writes.append(rows)
+        return len(rows)
+
+    def test_heartbeats_are_coalesced_per_lesson(self):
+        self.buffer.add(1, [(10, Decimal('20'), False)])
+        self.buffer.add(1, [(10, Decimal('60'), True), (11, Decimal('5'), False)])
+        # un latido atrasado no baja el progreso ni desmarca la leccion
+        self.buffer.add(1, [(10, Decimal('40'), False)])
+        self.assertEqual(self.writes, [])
+
+        self.clock.now = 2
+        self.buffer.add(1, [(11, Decimal('10'), False)])
+        self.assertEqual(self.writes, [{(1, 10): (Decimal('60'), True), (1, 11): (Decimal('10'), False)}])
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_flush_when_full(self):
+        self.buffer.add(1, [(10, Decimal('1'), False), (11, Decimal('1'), False)])
+        self.assertEqual(self.writes, [])
+        self.buffer.add(2, [(10, Decimal('1'), False)])
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual(len(self.writes[0]), 3)
+
+    def test_failed_write_keeps_rows(self):
+        def fail(rows):
+            raise RuntimeError('base caida')
+
+        self.buffer.writer = fail
+        self.buffer.add(1, [(10, Decimal('30'), False)])
+        with self.assertRaises(RuntimeError):
+            self.buffer.flush()
+        self.buffer.add(1, [(10, Decimal('20'), False), (11, Decimal('5'), False)])
+
+        self.buffer.writer = self.write
+        self.buffer.flush()
+        self.assertEqual(self.writes, [{(1, 10): (Decimal('30'), False), (1, 11): (Decimal('5'), False)}])
+
+    def test_background_flush_after_window(self):
+        buffer = ProgressBuffer(window=0.05, max_rows=100, writer=self.write, background=True)
+        buffer.add(1, [(10, Decimal('30'), False)])
+        deadline = time.monotonic() + 2
+        while not self.writes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.writes, [{(1, 10): (Decimal('30'), False)}])
+
+
+class UpsertProgressTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='estudiante')
+        cls.student = User.objects.create(email='student@example.com', role=role)
+        course = Course.objects.create(
+            title='Curso', description='-', status='publicado', instructor=cls.student,
+            category=Category.objects.create(name='programacion'),
+        )
+        cls.lessons = [Lesson.objects.create(course=course, title=f'Leccion {order}', content='-', order=order)
+                       for order in (1, 2)]
+        cls.enrollment = Enrollment.objects.create(student=cls.student, course=course)
+
+    def test_progress_never_goes_back(self):
+        lesson = self.lessons[0]
+        upsert_progress({(self.student.pk, lesson.pk): (Decimal('70'), False)})
+        upsert_progress({(self.student.pk, lesson.pk): (Decimal('30'), False)})
+        self.assertEqual(LessonProgress.objects.get(student=self.student, lesson=lesson).progress, Decimal('70'))
+
+    def test_completion_is_counted_once(self):
+        first, second = self.lessons
+        for _ in range(2):
+            upsert_progress({(self.student.pk, first.pk): (Decimal('100'), True)})
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 1)
+        self.assertEqual(self.enrollment.status, Enrollment.STATUS_ACTIVE)
+
+        upsert_progress({(self.student.pk, second.pk): (Decimal('100'), True)})
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 2)
+        self.assertEqual(self.enrollment.status, Enrollment.STATUS_COMPLETED)
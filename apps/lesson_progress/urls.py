@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import HeartbeatAPIView
+
+
+
+urlpatterns = [
+    path('heartbeat/', HeartbeatAPIView.as_view()),
+]
@@ -1,3 +1,42 @@
-from django.shortcuts import render
+from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.views import APIView
+from apps.course.models import LessonProgress
+from .serializers import HeartbeatBatchSerializer
+from drf_yasg.utils import swagger_auto_schema
 
-# Create your views here.
+
+
+class HeartbeatAPIView(APIView):
+    
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    queryset = LessonProgress.objects.all()
+    
+    
+    @swagger_auto_schema(
+        operation_summary="Reportar progreso de lecciones",
+        operation_description="""
+        Recibe los latidos del reproductor para una o varias lecciones.
+        El progreso se acumula unos segundos en el servidor y se guarda en lote,
+        conservando siempre el mayor valor recibido por lección.
+        Un progreso de 100 marca la lección como completada.
+        """,
+        request_body=HeartbeatBatchSerializer,
+        responses={
+            202: "Latidos aceptados",
+            400: "Datos inválidos",
+            403: "Sin permisos"
+        },
+        tags=["Lesson progress"]
+    )
+    def post(self, request):
+        
+        serializer = HeartbeatBatchSerializer(data=request.data, context={'request': request})
+        
+        if serializer.is_valid():
+            accepted = serializer.save()
+            
+            return Response({'accepted': accepted}, status=status.HTTP_202_ACCEPTED)
+        
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
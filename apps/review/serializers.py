@@ -0,0 +1,88 @@
+from rest_framework import serializers
+from apps.course.models import CourseStats, Enrollment, Review
+from apps.course import stats
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+
+
+class ReviewListSerializer(serializers.ModelSerializer):
+    
+    student = serializers.StringRelatedField()
+    
+    class Meta:
+        model = Review
+        fields = ['id', 'student', 'rating', 'comment', 'created_at', 'updated_at']
+
+
+
+
+# El estudiante autenticado califica un curso en el que esta (o estuvo) inscrito
+class ReviewCreateSerializer(serializers.ModelSerializer):
+    
+    class Meta:
+        model = Review
+        fields = ['course', 'rating', 'comment']
+        validators = []
+        
+        
+    def validate(self, attrs):
+        student = self.context['request'].user
+        course = attrs['course']
+        
+        if not Enrollment.objects.filter(student=student, course=course, status__in=stats.COUNTED_STATUSES).exists():
+            raise serializers.ValidationError('Solo puedes calificar cursos en los que estás inscrito')
+        if Review.objects.filter(student=student, course=course).exists():
+            raise serializers.ValidationError('Ya calificaste este curso')
+        return attrs
+    
+    
+    def create(self, validated_data):
+        try:
+            with transaction.atomic():
+                review = Review.objects.create(student=self.context['request'].user, **validated_data)
+                stats.review_changed(review.course_id, None, review.rating)
+        except IntegrityError:
+            # otra peticion del mismo estudiante gano la carrera
+            raise serializers.ValidationError('Ya calificaste este curso')
+        return review
+
+
+
+
+class ReviewUpdateSerializer(serializers.ModelSerializer):
+    
+    class Meta:
+        model = Review
+        fields = ['rating', 'comment']
+        
+        
+    # UPDATE ... WHERE rating = anterior: si otra peticion cambio la calificacion
+    # en medio, el resumen no se ajusta dos veces con el mismo valor viejo
+    def update(self, instance, validated_data):
+        old_rating = instance.rating
+        new_rating = validated_data.get('rating', old_rating)
+        comment = validated_data.get('comment', instance.comment)
+        
+        with transaction.atomic():
+            updated = Review.objects.filter(pk=instance.pk, rating=old_rating).update(
+                rating=new_rating, comment=comment, updated_at=timezone.now())
+            if not updated:
+                raise serializers.ValidationError('La reseña fue modificada por otra petición, intenta de nuevo')
+            stats.review_changed(instance.course_id, old_rating, new_rating)
+        
+        instance.refresh_from_db()
+        return instance
+
+
+
+
+class RatingSummarySerializer(serializers.ModelSerializer):
+    
+    course = serializers.IntegerField(source='course_id')
+    average_rating = serializers.FloatField()
+    histogram = serializers.DictField(source='rating_histogram', child=serializers.IntegerField())
+    
+    class Meta:
+        model = CourseStats
+        fields = ['course', 'rating_count', 'average_rating', 'histogram']
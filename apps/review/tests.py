@@ -1,3 +1,108 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from apps.course import stats
+from apps.course.models import Category, Course, CourseStats, Enrollment, Review
+from apps.review.serializers import ReviewUpdateSerializer
+from apps.users.models import Role, User
+
+
+class ReviewSummaryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='estudiante')
+        cls.student = User.objects.create_user('student@example.com', 'password', role=role, is_superuser=True)
+        cls.course = Course.objects.create(
+            title='Curso', description='-', status='publicado', instructor=cls.student,
+            category=Category.objects.create(name='programacion'),
+        )
+        Enrollment.objects.create(student=cls.student, course=cls.course)
+        stats.enrollment_status_changed(cls.course.pk, None, Enrollment.STATUS_ACTIVE)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def summary(self):
+        response = self.client.get(f'/review/summary/{self.course.pk}')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_rating_moves_between_buckets(self):
+        response = self.client.post('/review/create/', {'course': self.course.pk, 'rating': 4}, format='json')
+        self.assertEqual(response.status_code, 201)
+        summary = self.summary()
+        self.assertEqual(summary['rating_count'], 1)
+        self.assertEqual(summary['histogram']['4'], 1)
+
+        response = self.client.patch(f'/review/update/{response.data["id"]}', {'rating': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        summary = self.summary()
+        self.assertEqual(summary['rating_count'], 1)
+        self.assertEqual(summary['average_rating'], 2)
+        self.assertEqual(summary['histogram'], {'1': 0, '2': 1, '3': 0, '4': 0, '5': 0})
+
+    def test_second_review_is_rejected(self):
+        self.client.post('/review/create/', {'course': self.course.pk, 'rating': 5}, format='json')
+        response = self.client.post('/review/create/', {'course': self.course.pk, 'rating': 1}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(CourseStats.objects.get(pk=self.course.pk).rating_5, 1)
+        self.assertEqual(CourseStats.objects.get(pk=self.course.pk).rating_1, 0)
+
+    def test_stale_update_does_not_move_the_bucket_twice(self):
+        response = self.client.post('/review/create/', {'course': self.course.pk, 'rating': 3}, format='json')
+        review_id = response.data['id']
+        # otra peticion cambio la calificacion despues de que esta leyo la reseña
+        Review.objects.filter(pk=review_id).update(rating=5)
+        stats.review_changed(self.course.pk, 3, 5)
+
+        stale = Review.objects.get(pk=review_id)
+        stale.rating = 3
+        serializer = ReviewUpdateSerializer(stale, data={'rating': 1}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        with self.assertRaises(ValidationError):
+            serializer.save()
+
+        self.assertEqual(self.summary()['histogram'], {'1': 0, '2': 0, '3': 0, '4': 0, '5': 1})
+
+
+class ReviewListPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        role = Role.objects.create(name='estudiante')
+        cls.student = User.objects.create(email='student@example.com', role=role, is_superuser=True)
+        cls.course = Course.objects.create(
+            title='Curso', description='-', status='publicado', instructor=cls.student,
+            category=Category.objects.create(name='programacion'),
+        )
+        students = [User.objects.create(email=f'reviewer-{index}@example.com', role=role) for index in range(3)]
+        cls.reviews = [Review.objects.create(course=cls.course, student=student, rating=4) for student in students]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_keyset_is_the_default(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/review/list/', {'course': self.course.pk, 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.data)
+        self.assertEqual([review['id'] for review in response.data['results']], [r.pk for r in self.reviews[:0:-1]])
+        # solo queda el agregado del validador (ETag); el paginador no cuenta ni salta filas
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        self.assertNotIn('__count', sql)
+        self.assertNotIn('OFFSET', sql.upper())
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([review['id'] for review in response.data['results']], [self.reviews[0].pk])
+        self.assertIsNone(response.data['next'])
+
+    def test_page_is_kept_for_old_clients(self):
+        response = self.client.get('/review/list/', {'course': self.course.pk, 'page_size': 2, 'page': 2})
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([review['id'] for review in response.data['results']], [self.reviews[0].pk])
@@ -0,0 +1,11 @@
+from django.urls import path
+from .views import ReviewListAPIView, RatingSummaryAPIView, ReviewCreateAPIView, ReviewUpdateAPIView
+
+
+
+urlpatterns = [
+    path('list/', ReviewListAPIView.as_view()),
+    path('summary/<int:course_id>', RatingSummaryAPIView.as_view()),
+    path('create/', ReviewCreateAPIView.as_view()),
+    path('update/<int:pk>', ReviewUpdateAPIView.as_view()),
+]
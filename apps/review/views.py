@@ -1,3 +1,241 @@
-from django.shortcuts import render
+from rest_framework.permissions import IsAuthenticated, DjangoModelPermissions
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView
+from rest_framework.views import APIView
+from apps.course.models import Course, CourseStats, Review
+from .serializers import ReviewListSerializer, ReviewCreateSerializer, ReviewUpdateSerializer, RatingSummarySerializer
+from gestion_cursos_back.pagination import KeysetPagination
+from gestion_cursos_back.streaming import stream_list
+from gestion_cursos_back.replicas import ReplicaReadMixin
+from gestion_cursos_back.conditional import not_modified, queryset_validators, set_validators
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
 
-# Create your views here.
+
+
+
+class ReviewPagination(KeysetPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    cursor_ordering = ('-created_at', '-id')
+    # sin COUNT ni OFFSET salvo que se pida ?page=
+    cursor_by_default = True
+
+
+
+# Comentarios de un curso, mas recientes primero.
+# Siempre se filtra por curso, asi la pagina sale del indice (course, -created_at, -id).
+class ReviewListAPIView(ReplicaReadMixin, ListAPIView):
+    
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    
+    pagination_class = ReviewPagination
+    serializer_class = ReviewListSerializer
+    
+    
+    @swagger_auto_schema(
+        operation_summary="Listar reseñas de un curso",
+        operation_description="""
+        Retorna las reseñas de un curso, las más recientes primero.
+        Se pagina por cursor: cada respuesta trae el enlace next y no incluye el total.
+        """,
+        manual_parameters=[
+            openapi.Parameter(
+                'course',
+                openapi.IN_QUERY,
+                description="Id del curso",
+                type=openapi.TYPE_INTEGER,
+                required=True
+            ),
+            openapi.Parameter(
+                'rating',
+                openapi.IN_QUERY,
+                description="Filtrar por cantidad de estrellas (1 a 5)",
+                type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'paginate',
+                openapi.IN_QUERY,
+                type=openapi.TYPE_BOOLEAN,
+                default=True
+            ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="ndjson para exportar un objeto por línea cuando paginate=false",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor de la página siguiente (el enlace next de la respuesta)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'count',
+                openapi.IN_QUERY,
+                description="true para incluir el total",
+                type=openapi.TYPE_BOOLEAN,
+                default=False
+            ),
+            openapi.Parameter(
+                'page',
+                openapi.IN_QUERY,
+                description="Número de página (paginación anterior, con total y OFFSET)",
+                type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Cantidad de registros por página",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={200: ReviewListSerializer(many=True)},
+        tags=["Reviews"]
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+    
+    
+    def get_queryset(self):
+        
+        course = self.request.query_params.get('course')
+        rating = self.request.query_params.get('rating')
+        
+        if not course or not course.isdigit():
+            raise ValidationError({'course': 'El id del curso es obligatorio'})
+        
+        queryset = Review.objects.select_related('student').filter(course_id=course)
+        
+        if rating:
+            if rating not in {'1', '2', '3', '4', '5'}:
+                raise ValidationError({'rating': 'Debe ser un número del 1 al 5'})
+            queryset = queryset.filter(rating=rating)
+        
+        return queryset.order_by('-created_at', '-id')
+    
+    
+    def list(self, request, *args, **kwargs):
+        pagination = request.query_params.get('paginate', 'true').lower()
+        
+        queryset = self.get_queryset()
+
+        etag, last_modified = queryset_validators(request, queryset, 'updated_at')
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        if pagination == 'false':
+            response = stream_list(self, queryset)
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        return set_validators(response, etag, last_modified)
+
+
+
+
+
+# Resumen de calificaciones leido de CourseStats: una sola fila por clave primaria
+class RatingSummaryAPIView(APIView):
+    
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    queryset = Review.objects.all()
+    
+    
+    @swagger_auto_schema(
+        operation_summary="Resumen de calificaciones de un curso",
+        operation_description="""
+        Retorna la cantidad de reseñas, el promedio
+        y el histograma de 1 a 5 estrellas.
+        """,
+        responses={
+            200: RatingSummarySerializer,
+            404: "Curso no encontrado"
+        },
+        tags=["Reviews"]
+    )
+    def get(self, request, course_id):
+        
+        summary = CourseStats.objects.filter(course_id=course_id).first()
+        
+        if summary is None:
+            if not Course.objects.filter(pk=course_id).exists():
+                return Response({'message': 'curso no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+            summary = CourseStats(course_id=course_id)
+        
+        return Response(RatingSummarySerializer(summary).data, status=status.HTTP_200_OK)
+
+
+
+
+
+class ReviewCreateAPIView(APIView):
+    
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    queryset = Review.objects.all()
+    
+    
+    @swagger_auto_schema(
+        operation_summary="Calificar un curso",
+        operation_description="""
+        Crea la reseña del estudiante autenticado.
+        Solo se permite una reseña por curso.
+        """,
+        request_body=ReviewCreateSerializer,
+        responses={
+            201: ReviewListSerializer,
+            400: "Datos inválidos",
+            403: "Sin permisos"
+        },
+        tags=["Reviews"]
+    )
+    def post(self, request):
+        
+        serializer = ReviewCreateSerializer(data=request.data, context={'request': request})
+        
+        if serializer.is_valid():
+            review = serializer.save()
+            
+            return Response(ReviewListSerializer(review).data, status=status.HTTP_201_CREATED)
+        
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+
+
+
+class ReviewUpdateAPIView(APIView):
+    
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    queryset = Review.objects.all()
+    
+    
+    @swagger_auto_schema(
+        operation_summary="Editar mi reseña",
+        request_body=ReviewUpdateSerializer,
+        responses={
+            200: ReviewListSerializer,
+            400: "Datos inválidos",
+            404: "Reseña no encontrada"
+        },
+        tags=["Reviews"]
+    )
+    def patch(self, request, pk):
+        
+        try:
+            review = Review.objects.select_related('student').get(pk=pk, student=request.user)
+        except Review.DoesNotExist:
+            return Response({'message': 'Reseña no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+        
+        serializer = ReviewUpdateSerializer(review, data=request.data, partial=True)
+        
+        if serializer.is_valid():
+            review = serializer.save()
+            
+            return Response(ReviewListSerializer(review).data, status=status.HTTP_200_OK)
+        
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,227 @@
+import csv
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connection, transaction
+
+from apps.users.models import Role, User
+
+
+# Alta masiva de usuarios (cohortes completas) desde CSV o NDJSON.
+# Hace lo mismo que RegisterSerializer por usuario, pero:
+#   - roles y grupos se leen una sola vez
+#   - las contraseñas se hashean en paralelo con todos los nucleos; mientras se escribe un
+#     lote ya se esta hasheando el siguiente. El comando usa un pool de procesos; la vista,
+#     un pool de hilos (PBKDF2 libera el GIL), porque crear procesos desde un worker web con
+#     hilos puede dejar a los hijos bloqueados en un lock copiado al hacer fork
+#   - cada lote se escribe con bulk_create de usuarios y de la tabla intermedia de grupos,
+#     en su propia transaccion; si choca con un email registrado mientras tanto, ese lote
+#     se vuelve a escribir fila por fila
+# Las filas invalidas o con email ya registrado no se importan y se informan con su linea.
+
+FIELDS = ('email', 'password', 'first_name', 'last_name', 'role')
+PASSWORD_MIN_LENGTH = 8
+
+
+class ImportResult:
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    def add_error(self, line, message):
+        self.errors.append({'line': line, 'message': message})
+
+    @property
+    def rate(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+
+def read_rows(stream, file_format):
+    # stream: texto; devuelve (linea, dict) sin cargar el archivo entero
+    if file_format == 'ndjson':
+        for line, text in enumerate(stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                row = None
+            yield line, row if isinstance(row, dict) else None
+        return
+
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def open_upload(uploaded_file):
+    return io.TextIOWrapper(uploaded_file, encoding='utf-8-sig', newline='')
+
+
+def _init_worker(settings_module):
+    # con el metodo spawn los procesos hijos arrancan sin Django configurado
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _executor(workers, processes):
+    if processes:
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(settings.SETTINGS_MODULE,))
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def import_users(rows, batch_size=1000, workers=None, processes=False, progress=None):
+    result = ImportResult()
+    start = time.perf_counter()
+    rows = iter(rows)
+    workers = workers or os.cpu_count() or 1
+
+    roles = {role.name: role for role in Role.objects.exclude(name='admin')}
+    groups = dict(
+        Group.objects.filter(name__in=[name.capitalize() for name in roles]).values_list('name', 'id')
+    )
+    group_by_role = {name: groups.get(name.capitalize()) for name in roles}
+    seen = set()
+
+    def valid_batches():
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                return
+            batch = _validate(chunk, roles, seen, result)
+            if batch:
+                yield batch
+
+    with _executor(workers, processes) as executor:
+        pending = None
+        for batch in valid_batches():
+            # el lote nuevo empieza a hashearse antes de escribir el anterior
+            hashes = executor.map(
+                make_password,
+                [row['password'] for _, row in batch],
+                chunksize=max(1, len(batch) // (workers * 4)),
+            )
+            if pending is not None:
+                _write(*pending, roles, group_by_role, result)
+                _report(progress, result, start)
+            pending = (batch, hashes)
+        if pending is not None:
+            _write(*pending, roles, group_by_role, result)
+            _report(progress, result, start)
+
+    result.errors.sort(key=lambda error: error['line'])
+    result.elapsed = time.perf_counter() - start
+    return result
+
+
+def _validate(chunk, roles, seen, result):
+    batch = []
+    for line, row in chunk:
+        if row is None:
+            result.add_error(line, 'Fila con formato inválido')
+            continue
+
+        data = {name: str(row.get(name) or '').strip() for name in FIELDS}
+        data['email'] = User.objects.normalize_email(data['email'])
+        try:
+            validate_email(data['email'])
+        except ValidationError:
+            result.add_error(line, 'Email inválido')
+            continue
+        if len(data['password']) < PASSWORD_MIN_LENGTH:
+            result.add_error(line, f'La contraseña debe tener al menos {PASSWORD_MIN_LENGTH} caracteres')
+            continue
+        if data['role'] not in roles:
+            result.add_error(line, 'Rol inválido')
+            continue
+        if data['email'].lower() in seen:
+            result.add_error(line, 'Email repetido en el archivo')
+            continue
+        seen.add(data['email'].lower())
+        batch.append((line, data))
+
+    # una consulta por lote para los que ya estan registrados
+    existing = {
+        email.lower()
+        for email in User.objects.filter(email__in=[data['email'] for _, data in batch]).values_list('email', flat=True)
+    }
+    if not existing:
+        return batch
+
+    fresh = []
+    for line, data in batch:
+        if data['email'].lower() in existing:
+            result.add_error(line, 'El email ya está registrado')
+        else:
+            fresh.append((line, data))
+    return fresh
+
+
+def _build_user(data, password, roles):
+    return User(
+        email=data['email'],
+        password=password,
+        first_name=data['first_name'],
+        last_name=data['last_name'],
+        role_id=roles[data['role']].id,
+    )
+
+
+def _write(batch, hashes, roles, group_by_role, result):
+    hashes = list(hashes)
+    try:
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                _build_user(data, password, roles) for (_, data), password in zip(batch, hashes)
+            ])
+            if not connection.features.can_return_rows_from_bulk_insert:
+                ids = dict(User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'id'))
+                for user in users:
+                    user.pk = ids[user.email]
+
+            memberships = [
+                User.groups.through(user_id=user.pk, group_id=group_by_role[data['role']])
+                for user, (_, data) in zip(users, batch)
+                if group_by_role[data['role']] is not None
+            ]
+            User.groups.through.objects.bulk_create(memberships)
+    except IntegrityError:
+        # alguien registro uno de los emails despues de validar el lote
+        _write_rows(batch, hashes, roles, group_by_role, result)
+        return
+    result.created += len(users)
+
+
+def _write_rows(batch, hashes, roles, group_by_role, result):
+    for (line, data), password in zip(batch, hashes):
+        try:
+            with transaction.atomic():
+                user = _build_user(data, password, roles)
+                user.save()
+                if group_by_role[data['role']] is not None:
+                    User.groups.through.objects.create(user_id=user.pk, group_id=group_by_role[data['role']])
+        except IntegrityError:
+            if User.objects.filter(email__iexact=data['email']).exists():
+                result.add_error(line, 'El email ya está registrado')
+            else:
+                result.add_error(line, 'No se pudo guardar el usuario')
+            continue
+        result.created += 1
+
+
+def _report(progress, result, start):
+    if progress is not None:
+        result.elapsed = time.perf_counter() - start
+        progress(result)
@@ -0,0 +1,50 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.importer import import_users, read_rows
+
+
+# Columnas: email, password, first_name, last_name, role (instructor o estudiante).
+# Con "-" lee de la entrada estandar.
+class Command(BaseCommand):
+    help = 'Importa usuarios desde un archivo CSV o NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Por defecto segun la extension del archivo')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None, help='Procesos para hashear contraseñas (por defecto, todos los nucleos)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+        try:
+            stream = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        def progress(result):
+            self.stdout.write(
+                f'{result.created} usuarios creados, {len(result.errors)} filas con error '
+                f'({result.rate:.0f} usuarios/s)'
+            )
+
+        with stream:
+            result = import_users(
+                read_rows(stream, file_format),
+                batch_size=options['batch_size'],
+                workers=options['workers'],
+                processes=True,
+                progress=progress,
+            )
+
+        for error in result.errors[:50]:
+            self.stderr.write(f'linea {error["line"]}: {error["message"]}')
+        if len(result.errors) > 50:
+            self.stderr.write(f'... y {len(result.errors) - 50} errores mas')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} usuarios importados en {result.elapsed:.2f}s ({result.rate:.0f} usuarios/s)'
+        ))
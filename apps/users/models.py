@@ -31,6 +31,10 @@ class CustomUserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    # el login lee user.role.name: se trae en la misma consulta
+    def get_by_natural_key(self, email):
+        return self.select_related('role').get(**{self.model.USERNAME_FIELD: email})
+
     def create_superuser(self, email, password=None, **extra_fields):
         from apps.users.models import Role
 
@@ -57,6 +61,13 @@ class User(AbstractUser):
     
     objects = CustomUserManager()
     
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # directorio de usuarios activos ordenado por id, con y sin filtro de rol
+            models.Index(fields=['id'], condition=models.Q(is_active=True), name='user_active_idx'),
+            models.Index(fields=['role', 'id'], condition=models.Q(is_active=True), name='user_active_role_idx'),
+        ]
+    
     def __str__(self):
         return f'{self.first_name} {self.last_name}'
     
\ No newline at end of file
@@ -0,0 +1,97 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+
+# Busqueda del directorio de usuarios por email, nombre y apellido.
+# Cada termino filtra (AND) y el orden del listado no cambia, asi la busqueda convive
+# con la paginacion keyset. Indices segun el motor:
+#   - PostgreSQL: GIN trigram (pg_trgm) sobre los tres campos en mayusculas, que sirve al LIKE '%term%'
+#   - SQLite: tabla virtual FTS5 sincronizada con triggers, con terminos por prefijo
+# Cualquier otro motor cae a icontains.
+
+FTS_TABLE = 'users_user_fts'
+SEARCH_COLUMNS = ('email', 'first_name', 'last_name')
+
+_TOKEN_RE = re.compile(r'[\w@.+-]+', re.UNICODE)
+
+
+def _document(table):
+    return " || ' ' || ".join(f'UPPER("{table}"."{column}"::text)' for column in SEARCH_COLUMNS)
+
+
+def search_users(queryset, text):
+    terms = _TOKEN_RE.findall(text or '')
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    table = queryset.model._meta.db_table
+    if vendor == 'postgresql':
+        for term in terms:
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            queryset = queryset.filter(RawSQL(
+                f'({_document(table)}) LIKE UPPER(%s)', [f'%{escaped}%'], output_field=BooleanField()))
+        return queryset
+
+    if vendor == 'sqlite':
+        # las palabras de FTS5 no incluyen @ ni .: "ana@mail.com" busca ana, mail y com
+        words = [word for term in terms for word in re.findall(r'\w+', term, re.UNICODE)]
+        if not words:
+            return queryset
+        match = ' '.join('"%s"*' % word for word in words)
+        ids = RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        return queryset.filter(Q(id__in=ids))
+
+    for term in terms:
+        condition = Q()
+        for column in SEARCH_COLUMNS:
+            condition |= Q(**{f'{column}__icontains': term})
+        queryset = queryset.filter(condition)
+    return queryset
+
+
+# Crea los indices de busqueda si no existen. Es idempotente y se ejecuta despues de migrate.
+def install_search_index(connection):
+    from apps.users.models import User
+
+    table = User._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS user_search_trgm_gin ON {table} '
+                f'USING gin (({_document(table)}) gin_trgm_ops)'
+            )
+        elif connection.vendor == 'sqlite':
+            columns = ', '.join(SEARCH_COLUMNS)
+            old_columns = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+            new_columns = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            exists = cursor.fetchone()
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+                f"{columns}, content='{table}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {table} BEGIN '
+                f'INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_columns}); END'
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {table} BEGIN '
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                f"VALUES ('delete', old.id, {old_columns}); END"
+            )
+            cursor.execute(
+                f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON {table} BEGIN '
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) "
+                f"VALUES ('delete', old.id, {old_columns}); "
+                f'INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_columns}); END'
+            )
+            # los usuarios que ya existian entran al indice la primera vez
+            if not exists:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
@@ -45,3 +45,16 @@ class RegisterSerializer(serializers.Serializer):
         
         return user
 
+
+
+
+class UserImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=['csv', 'ndjson'], required=False)
+    
+    
+    def validate(self, attrs):
+        if 'format' not in attrs:
+            name = attrs['file'].name or ''
+            attrs['format'] = 'ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'csv'
+        return attrs
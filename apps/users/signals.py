@@ -0,0 +1,8 @@
+from django.db import connections
+
+from .search import install_search_index
+
+
+# conectado a post_migrate en UsersConfig.ready
+def create_search_index(sender, using, **kwargs):
+    install_search_index(connections[using])
@@ -1,3 +1,93 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from apps.users import importer
+from apps.users.models import Role, User
+
+
+def csv_file(*lines):
+    header = 'email,password,first_name,last_name,role'
+    return SimpleUploadedFile('usuarios.csv', '\n'.join((header,) + lines).encode(), content_type='text/csv')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UserImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student_role = Role.objects.create(name='estudiante')
+        Role.objects.create(name='instructor')
+        cls.student_group = Group.objects.create(name='Estudiante')
+        cls.admin = User.objects.create_user(
+            'admin@example.com', 'password', role=Role.objects.create(name='admin'), is_superuser=True)
+        User.objects.create_user('registrado@example.com', 'password', role=cls.student_role)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_upload_reports_invalid_rows(self):
+        response = self.client.post('/import/', {'file': csv_file(
+            'ana@example.com,password1,Ana,Pérez,estudiante',
+            'no-es-un-email,password1,Luis,Gómez,estudiante',
+            'corta@example.com,corta,Eva,Ruiz,estudiante',
+            'rol@example.com,password1,Juan,Díaz,admin',
+        )}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], [
+            {'line': 3, 'message': 'Email inválido'},
+            {'line': 4, 'message': 'La contraseña debe tener al menos 8 caracteres'},
+            {'line': 5, 'message': 'Rol inválido'},
+        ])
+        user = User.objects.get(email='ana@example.com')
+        self.assertTrue(user.check_password('password1'))
+
+    def test_duplicate_emails_in_file_and_database(self):
+        response = self.client.post('/import/', {'file': csv_file(
+            'ana@example.com,password1,Ana,Pérez,estudiante',
+            'ANA@example.com,password1,Ana,Pérez,estudiante',
+            'registrado@example.com,password1,Luis,Gómez,estudiante',
+        )}, format='multipart')
+
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], [
+            {'line': 3, 'message': 'Email repetido en el archivo'},
+            {'line': 4, 'message': 'El email ya está registrado'},
+        ])
+
+    def test_imported_users_join_their_role_group(self):
+        response = self.client.post('/import/', {'file': csv_file(
+            'ana@example.com,password1,Ana,Pérez,estudiante',
+            'luis@example.com,password1,Luis,Gómez,instructor',
+        )}, format='multipart')
+
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(list(User.objects.get(email='ana@example.com').groups.all()), [self.student_group])
+        # sin grupo "Instructor" el usuario se crea igual, sin grupo
+        self.assertFalse(User.objects.get(email='luis@example.com').groups.exists())
+
+    def test_email_registered_after_validation_is_reported(self):
+        rows = [
+            (2, {'email': 'ana@example.com', 'password': 'password1', 'role': 'estudiante'}),
+            (3, {'email': 'luis@example.com', 'password': 'password1', 'role': 'estudiante'}),
+        ]
+        validate = importer._validate
+
+        # el lote pasa la validacion y alguien registra uno de los emails antes de escribirlo
+        def validate_then_register(*args):
+            batch = validate(*args)
+            User.objects.create_user('luis@example.com', 'password', role=self.student_role)
+            return batch
+
+        with mock.patch.object(importer, '_validate', side_effect=validate_then_register):
+            result = importer.import_users(rows, workers=2)
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.errors, [{'line': 3, 'message': 'El email ya está registrado'}])
+        self.assertEqual(list(User.objects.get(email='ana@example.com').groups.all()), [self.student_group])
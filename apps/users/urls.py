@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterAPIView, ProfileView, ListsUserAPIView
+from .views import RegisterAPIView, ProfileView, ListsUserAPIView, UserImportAPIView
 
 
 
@@ -7,6 +7,7 @@ urlpatterns = [
     path('register/', RegisterAPIView.as_view()),
     path('profile/', ProfileView.as_view()),
     path('list_users/', ListsUserAPIView.as_view()),
+    path('import/', UserImportAPIView.as_view()),
 
 
 ]
\ No newline at end of file
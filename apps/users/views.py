@@ -2,32 +2,198 @@ from django.shortcuts import render
 from apps.users.models import User
 from rest_framework.response import Response
 from rest_framework import status
-from .serializers import RegisterSerializer, GetUserSerializer
+from .serializers import RegisterSerializer, GetUserSerializer, UserImportSerializer
 from rest_framework.permissions import IsAuthenticated, AllowAny, DjangoModelPermissions
 from rest_framework.views import APIView
+from rest_framework.generics import ListAPIView
+from gestion_cursos_back.pagination import KeysetPagination
+from gestion_cursos_back.streaming import stream_list
+from gestion_cursos_back.replicas import ReplicaReadMixin
+from .search import search_users
+from .importer import import_users, open_upload, read_rows
+from rest_framework.parsers import MultiPartParser
+from django.conf import settings
+from itertools import islice
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 
 
-class ListsUserAPIView(APIView):
+class UserPagination(KeysetPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    cursor_ordering = ('id',)
+
+
+
+class ListsUserAPIView(ReplicaReadMixin, ListAPIView):
     
     permission_classes = [IsAuthenticated, DjangoModelPermissions] 
     
+    queryset = User.objects.filter(is_active=True)
+    pagination_class = UserPagination
+    serializer_class = GetUserSerializer
+    
 
     @swagger_auto_schema(
         operation_summary="Listar usuarios",
         operation_description="Retorna la lista de usuarios activos",
-        responses={200: GetUserSerializer(many=True)},
+        manual_parameters=[
+            openapi.Parameter(
+                'role',
+                openapi.IN_QUERY,
+                description="Filtrar por rol (instructor, estudiante, admin)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'search_term',
+                openapi.IN_QUERY,
+                description="Buscar por email, nombre o apellido",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'paginate',
+                openapi.IN_QUERY,
+                description="false para desactivar la paginación",
+                type=openapi.TYPE_BOOLEAN,
+                default=True
+            ),
+            openapi.Parameter(
+                'output',
+                openapi.IN_QUERY,
+                description="csv o ndjson para exportar cuando paginate=false",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'page',
+                openapi.IN_QUERY,
+                description="Número de página",
+                type=openapi.TYPE_INTEGER
+            ),
+            openapi.Parameter(
+                'cursor',
+                openapi.IN_QUERY,
+                description="Cursor de paginación keyset (vacío para la primera página)",
+                type=openapi.TYPE_STRING
+            ),
+            openapi.Parameter(
+                'count',
+                openapi.IN_QUERY,
+                description="true para incluir el total en modo cursor",
+                type=openapi.TYPE_BOOLEAN,
+                default=False
+            ),
+            openapi.Parameter(
+                'page_size',
+                openapi.IN_QUERY,
+                description="Cantidad de registros por página",
+                type=openapi.TYPE_INTEGER
+            ),
+        ],
+        responses={
+            200: GetUserSerializer(many=True),
+            401: "No autenticado",
+            403: "Sin permisos"
+        },
         tags=["Users"]
     )
-    def get(self, request):
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+    
+    
+    def get_queryset(self):
         
-        user = User.objects.filter(is_active=True)
+        queryset = super().get_queryset().select_related('role')
+        
+        role = self.request.query_params.get('role')
+        if role:
+            queryset = queryset.filter(role__name=role)
+        
+        search_term = self.request.query_params.get('search_term')
+        if search_term:
+            queryset = search_users(queryset, search_term)
+        
+        return queryset.order_by('id')
+    
+    
+    def list(self, request, *args, **kwargs):
+        pagination = request.query_params.get('paginate', 'true').lower()
+        
+        if pagination == 'false':
+            return stream_list(self, self.get_queryset())
+        
+        return super().list(request, *args, **kwargs)
+        
+
+
+
+
+
+# Alta masiva desde el panel de administracion (ver importer.py).
+# Los archivos mas grandes que USER_IMPORT_MAX_ROWS se importan con el comando import_users.
+class UserImportAPIView(APIView):
+    
+    permission_classes = [IsAuthenticated, DjangoModelPermissions]
+    
+    queryset = User.objects.all()
+    parser_classes = [MultiPartParser]
+    
+
+    @swagger_auto_schema(
+        operation_summary="Importar usuarios",
+        operation_description="""
+        Crea usuarios desde un archivo CSV o NDJSON con las columnas
+        email, password, first_name, last_name y role (instructor o estudiante).
+        Las filas inválidas o con email ya registrado se informan y no se importan.
+        """,
+        request_body=UserImportSerializer,
+        responses={
+            201: openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'created': openapi.Schema(type=openapi.TYPE_INTEGER),
+                    'errors': openapi.Schema(
+                        type=openapi.TYPE_ARRAY,
+                        items=openapi.Schema(
+                            type=openapi.TYPE_OBJECT,
+                            properties={
+                                'line': openapi.Schema(type=openapi.TYPE_INTEGER),
+                                'message': openapi.Schema(type=openapi.TYPE_STRING),
+                            }
+                        )
+                    ),
+                    'elapsed': openapi.Schema(type=openapi.TYPE_NUMBER),
+                }
+            ),
+            400: "Archivo inválido o demasiado grande",
+            401: "No autenticado",
+            403: "Sin permisos"
+        },
+        tags=["Users"]
+    )
+    def post(self, request):
+        serializer = UserImportSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = GetUserSerializer(user, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        max_rows = getattr(settings, 'USER_IMPORT_MAX_ROWS', 10000)
+        try:
+            rows = list(islice(
+                read_rows(open_upload(serializer.validated_data['file']), serializer.validated_data['format']),
+                max_rows + 1))
+        except (UnicodeDecodeError, ValueError):
+            return Response({'message': 'El archivo no se pudo leer'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > max_rows:
+            return Response(
+                {'message': f'El archivo supera las {max_rows} filas, use el comando import_users'},
+                status=status.HTTP_400_BAD_REQUEST)
         
+        result = import_users(rows, workers=getattr(settings, 'USER_IMPORT_WORKERS', None))
+        return Response({
+            'created': result.created,
+            'errors': result.errors,
+            'elapsed': round(result.elapsed, 3),
+        }, status=status.HTTP_201_CREATED)
 
 
 
@@ -0,0 +1,274 @@
+import json
+import math
+import re
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, get_resolver
+
+from apps.course import cache as catalog_cache
+from apps.lesson_progress.progress import buffer as progress_buffer
+
+
+# Banco de pruebas de los endpoints contra una base ya cargada (ver seed_data).
+# Cada archivo de benchmarks/ describe una peticion (ruta, metodo, usuario, parametros o
+# cuerpo) y su presupuesto: queries por peticion y latencia p95 (y opcionalmente p99).
+# "files" manda el cuerpo como multipart con los archivos indicados y "settings" cambia
+# settings solo durante esa peticion (p. ej. para medir un endpoint desactivado por defecto).
+# "cold_cache" sube la version del catalogo antes de cada peticion: se mide el camino sin
+# cache, con sus queries, en vez de solo los aciertos.
+# Las peticiones pasan por el stack completo (middleware, autenticacion JWT, permisos) con
+# el Client de Django. Todo corre dentro de una transaccion que se revierte al final, y cada
+# peticion en su propio savepoint, asi las escrituras se miden siempre sobre el mismo estado.
+# Los valores de la forma "{nombre}" se reemplazan con los datos de prueba (ver Fixtures).
+
+BUDGET_DIR = Path(settings.BASE_DIR) / 'benchmarks'
+BENCH_PASSWORD = 'bench-password-123'
+# rutas que no son de la API
+EXCLUDED_ROUTES = ('admin/', 'swagger', 'redoc/')
+
+_PLACEHOLDER_RE = re.compile(r'^\{(\w+)\}$')
+
+
+def api_routes():
+    def walk(patterns, prefix=''):
+        for pattern in patterns:
+            route = prefix + str(pattern.pattern)
+            if isinstance(pattern, URLResolver):
+                yield from walk(pattern.url_patterns, route)
+            else:
+                yield route
+
+    return sorted(
+        route for route in set(walk(get_resolver().url_patterns))
+        if not route.startswith(EXCLUDED_ROUTES)
+    )
+
+
+def load_budgets(directory=BUDGET_DIR):
+    budgets = []
+    for path in sorted(Path(directory).glob('*.json')):
+        with open(path, encoding='utf-8') as handle:
+            budget = json.load(handle)
+        budget['name'] = path.stem
+        budget['file'] = path
+        budgets.append(budget)
+    return budgets
+
+
+def save_budget(budget):
+    data = {key: value for key, value in budget.items() if key not in ('name', 'file')}
+    with open(budget['file'], 'w', encoding='utf-8') as handle:
+        json.dump(data, handle, ensure_ascii=False, indent=2)
+        handle.write('\n')
+
+
+def percentile(samples, value):
+    # nearest-rank sobre las muestras ordenadas
+    ordered = sorted(samples)
+    index = max(0, math.ceil(value / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Fixtures(dict):
+
+    # usuarios y objetos de la base cargada que usan las peticiones; se preparan dentro de la
+    # transaccion del benchmark (contraseña conocida, permisos de todos los modelos)
+    @classmethod
+    def prepare(cls):
+        from apps.authentication.tokens import RoleRefreshToken
+        from apps.course.models import Course, CourseStats, Enrollment, Lesson, Review
+        from apps.users.models import User
+
+        stats = (
+            CourseStats.objects.filter(course__status='publicado', course__is_active=True)
+            .select_related('course').order_by('-enrollment_count').first()
+        )
+        if stats is None:
+            raise ValueError('La base no tiene cursos publicados: cargue datos con seed_data')
+        course = stats.course
+
+        enrollment = (
+            Enrollment.objects.filter(course=course, status=Enrollment.STATUS_ACTIVE)
+            .select_related('student').order_by('id').first()
+        )
+        if enrollment is None:
+            raise ValueError('El curso mas popular no tiene inscripciones activas')
+        student = enrollment.student
+        instructor = course.instructor
+        admin = User.objects.filter(is_staff=True).order_by('id').first() or instructor
+
+        # la reseña del estudiante se borra para poder crearla; la de otro se usa para editar
+        Review.objects.filter(student=student, course=course).delete()
+        review = Review.objects.filter(course=course).order_by('id').first()
+
+        open_course = (
+            Course.objects.filter(status='publicado', is_active=True)
+            .exclude(enrollments__student=student).order_by('id').first()
+        )
+        lesson_ids = list(Lesson.objects.filter(course=course).order_by('order', 'id').values_list('id', flat=True))
+
+        users = {'student': student, 'instructor': instructor, 'admin': admin}
+        if review is not None:
+            users['reviewer'] = review.student
+
+        permissions = list(Permission.objects.all())
+        for user in set(users.values()):
+            user.set_password(BENCH_PASSWORD)
+            user.save(update_fields=['password'])
+            user.user_permissions.set(permissions)
+
+        fixtures = cls(
+            course=course.pk,
+            category=course.category_id,
+            lesson=lesson_ids[0] if lesson_ids else None,
+            lesson_ids=lesson_ids,
+            lesson_ids_reversed=lesson_ids[::-1],
+            enrollment=enrollment.pk,
+            review=review.pk if review is not None else None,
+            open_course=open_course.pk if open_course is not None else course.pk,
+            student_id=student.pk,
+            student_role=student.role_id,
+            student_email=student.email,
+            password=BENCH_PASSWORD,
+            refresh=str(RoleRefreshToken.for_user(student)),
+        )
+        fixtures.users = users
+        fixtures.tokens = {
+            name: str(RoleRefreshToken.for_user(user).access_token) for name, user in users.items()
+        }
+        return fixtures
+
+    def resolve(self, value):
+        if isinstance(value, dict):
+            return {key: self.resolve(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        if isinstance(value, str):
+            match = _PLACEHOLDER_RE.match(value)
+            if match:
+                return self[match.group(1)]
+            return value.format(**self)
+        return value
+
+
+class Measurement:
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.latencies = []
+        self.queries = 0
+        self.bytes = 0
+        self.peak_memory = 0
+        self.status = None
+
+    def summary(self):
+        return {
+            'name': self.budget['name'],
+            'route': self.budget['route'],
+            'status': self.status,
+            'p50_ms': round(percentile(self.latencies, 50), 2),
+            'p95_ms': round(percentile(self.latencies, 95), 2),
+            'p99_ms': round(percentile(self.latencies, 99), 2),
+            'queries': self.queries,
+            'bytes': self.bytes,
+            'peak_memory_kb': round(self.peak_memory / 1024, 1),
+        }
+
+    def violations(self, tolerance, query_tolerance):
+        limits = self.budget.get('budget', {})
+        summary = self.summary()
+        problems = []
+        if summary['status'] != self.budget.get('status', 200):
+            problems.append(f'status {summary["status"]} (se esperaba {self.budget.get("status", 200)})')
+        if 'queries' in limits and summary['queries'] > limits['queries'] + query_tolerance:
+            problems.append(f'{summary["queries"]} queries (presupuesto {limits["queries"]})')
+        for key in ('p95_ms', 'p99_ms'):
+            if key in limits and summary[key] > limits[key] * (1 + tolerance):
+                problems.append(f'{key} {summary[key]} (presupuesto {limits[key]})')
+        return problems
+
+
+class Runner:
+
+    def __init__(self, fixtures, iterations=50, warmup=3):
+        self.fixtures = fixtures
+        self.iterations = iterations
+        self.warmup = warmup
+        self.client = Client()
+
+    def measure(self, budget):
+        measurement = Measurement(budget)
+        # las rutas que hashean contraseñas pueden pedir menos iteraciones en su presupuesto
+        iterations = min(self.iterations, budget.get('iterations', self.iterations))
+        warmup = min(self.warmup, budget.get('warmup', self.warmup))
+        for index in range(warmup + iterations):
+            elapsed, queries, status, size = self.request(budget)
+            if index >= warmup:
+                measurement.latencies.append(elapsed * 1000)
+                measurement.queries = max(measurement.queries, queries)
+                measurement.status = status
+                measurement.bytes = size
+
+        # la memoria se mide en una peticion aparte: tracemalloc altera la latencia
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            self.request(budget)
+            measurement.peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return measurement
+
+    def request(self, budget):
+        method = budget.get('method', 'GET').upper()
+        path = self.fixtures.resolve(budget.get('path') or '/' + budget['route'])
+        headers = {}
+        if budget.get('user'):
+            headers['Authorization'] = f'Bearer {self.fixtures.tokens[budget["user"]]}'
+
+        if budget.get('cold_cache'):
+            catalog_cache.incr_version()
+
+        # el log de queries tiene un limite; si se llena, CaptureQueriesContext cuenta mal
+        reset_queries()
+        with transaction.atomic(), override_settings(**budget.get('settings', {})):
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                response = self._send(method, path, budget, headers)
+                if response.streaming:
+                    size = sum(len(chunk) for chunk in response.streaming_content)
+                else:
+                    size = len(response.content)
+                elapsed = time.perf_counter() - start
+            # los latidos que quedaron en el buffer se escriben aca para que se reviertan
+            progress_buffer.flush()
+            transaction.set_rollback(True)
+        return elapsed, len(context.captured_queries), response.status_code, size
+
+    def _send(self, method, path, budget, headers):
+        if method == 'GET':
+            return self.client.get(path, self.fixtures.resolve(budget.get('params', {})), headers=headers)
+
+        if budget.get('files'):
+            data = dict(self.fixtures.resolve(budget.get('data', {})))
+            for field, upload in budget['files'].items():
+                content = self.fixtures.resolve(upload['content']).encode()
+                data[field] = SimpleUploadedFile(upload['name'], content)
+            return self.client.generic(
+                method, path, **self._multipart(data), headers=headers)
+
+        body = json.dumps(self.fixtures.resolve(budget.get('data', {})))
+        return self.client.generic(method, path, body, content_type='application/json', headers=headers)
+
+    def _multipart(self, data):
+        from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+
+        return {'data': encode_multipart(BOUNDARY, data), 'content_type': MULTIPART_CONTENT}
@@ -0,0 +1,60 @@
+import calendar
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+# GET condicional para los listados (ETag / Last-Modified).
+# El validador se calcula con una sola consulta barata sobre el queryset filtrado
+# (ultimo updated_at y numero de filas) o con una version ya conocida, y si el cliente
+# envia If-None-Match / If-Modified-Since coincidentes se responde 304 sin serializar nada.
+
+
+def queryset_validators(request, queryset, *fields):
+    fields = fields or ('updated_at',)
+    summary = queryset.order_by().aggregate(
+        count=Count('pk', distinct=True),
+        **{f'last_{index}': Max(field) for index, field in enumerate(fields)}
+    )
+    timestamps = [summary[f'last_{index}'] for index in range(len(fields)) if summary[f'last_{index}']]
+    last_modified = max(timestamps) if timestamps else None
+    token = f"{summary['count']}:{last_modified.isoformat() if last_modified else ''}"
+    return _etag(request, token), last_modified
+
+
+def version_validators(request, version):
+    return _etag(request, f'v{version}'), None
+
+
+def not_modified(request, etag, last_modified):
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=_timestamp(last_modified),
+    )
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    return response
+
+
+def _etag(request, token):
+    # los parametros forman parte del validador: cada pagina o filtro es un recurso distinto
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+    )
+    digest = hashlib.md5(f'{request.path}|{params!r}|{token}'.encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    return calendar.timegm(value.utctimetuple())
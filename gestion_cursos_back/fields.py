@@ -0,0 +1,65 @@
+from rest_framework.serializers import ListSerializer
+
+
+# Proyecciones de los listados.
+# ?fields=id,title limita los campos de primer nivel de la respuesta y ?expand=lessons
+# cambia un campo resumido por su version completa. Las columnas de texto que no se van a
+# mostrar se declaran en `deferrable_fields` para que la vista las excluya con .defer().
+
+
+def query_list(request, name):
+    value = request.query_params.get(name, '') if request is not None else ''
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class SparseFieldsMixin:
+
+    # campo -> funcion que construye la version completa del campo
+    expandable_fields = {}
+    # campo -> columnas del modelo que solo hacen falta si el campo se muestra completo
+    deferrable_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or not self._is_root():
+            return fields
+
+        for name in query_list(request, 'expand') & self.expandable_fields.keys():
+            if name in fields:
+                fields[name] = self.expandable_fields[name]()
+
+        selected = query_list(request, 'fields')
+        if selected:
+            for name in list(fields):
+                if name not in selected:
+                    del fields[name]
+        return fields
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+    @classmethod
+    def shows(cls, request, name):
+        selected = query_list(request, 'fields')
+        return not selected or name in selected
+
+    @classmethod
+    def expands(cls, request, name):
+        return cls.shows(request, name) and name in query_list(request, 'expand')
+
+    @classmethod
+    def project(cls, queryset, request):
+        deferred = cls.deferred_columns(request)
+        return queryset.defer(*deferred) if deferred else queryset
+
+    @classmethod
+    def deferred_columns(cls, request):
+        deferred = []
+        for name, columns in cls.deferrable_fields.items():
+            if not cls.shows(request, name) or (name in cls.expandable_fields and not cls.expands(request, name)):
+                deferred.extend(columns)
+        return deferred
@@ -0,0 +1,332 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+
+
+# Metricas del servicio en formato de texto de Prometheus, en /metrics.
+# Cada proceso acumula contadores, gauges e histogramas en memoria (con un lock, sin I/O por
+# peticion). Con varios workers (gunicorn, uwsgi) cada proceso vuelca su estado cada
+# METRICS_FLUSH_INTERVAL segundos a METRICS_DIR/<pid>.json y /metrics suma los archivos de
+# todos: asi cualquier worker que atienda el scrape devuelve el total. Los gauges solo
+# cuentan procesos vivos; los contadores de un worker que murio siguen sumando. Nada borra
+# esos archivos: para que los contadores vuelvan a cero al reiniciar el servicio hay que
+# vaciar METRICS_DIR antes de arrancar los workers (p. ej. en el on_starting de gunicorn).
+# Sin METRICS_DIR se exporta solo lo del proceso que responde.
+# Esta desactivado salvo con METRICS_ENABLED; METRICS_TOKEN protege /metrics con un Bearer.
+# El tiempo de la vista (incluye serializar) y el de renderizar la respuesta se separan con
+# los hooks del middleware, sin envolver clases de DRF.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+
+_lock = threading.Lock()
+_metrics = {}
+
+
+class Metric:
+
+    type = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        _metrics[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def samples(self):
+        with _lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+
+class Counter(Metric):
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+
+    type = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        # por clave: conteo de cada bucket (no acumulado), +Inf, suma
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            values[index] += 1
+            values[-1] += value
+
+    def samples(self):
+        with _lock:
+            return [[list(key), list(values)] for key, values in self._values.items()]
+
+
+http_requests = Counter('http_requests_total', 'Peticiones atendidas', ('method', 'route', 'status'))
+http_request_duration = Histogram(
+    'http_request_duration_seconds', 'Duracion de las peticiones', ('method', 'route'))
+http_requests_in_flight = Gauge('http_requests_in_flight', 'Peticiones en curso')
+db_queries = Counter('db_queries_total', 'Queries ejecutadas durante peticiones', ('alias', 'route'))
+db_query_duration = Histogram(
+    'db_query_duration_seconds', 'Duracion de las queries', ('alias',), buckets=DB_BUCKETS)
+cache_requests = Counter('cache_requests_total', 'Lecturas de cache por resultado (hit/miss)', ('cache', 'result'))
+view_duration = Histogram(
+    'view_duration_seconds', 'Duracion de la vista, incluye autenticar, las queries y serializar',
+    ('method', 'route'))
+render_duration = Histogram(
+    'render_duration_seconds', 'Duracion del renderizado de la respuesta', ('method', 'route'))
+
+
+def cache_result(name, hit):
+    cache_requests.inc(cache=name, result='hit' if hit else 'miss')
+
+
+# exportacion
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def exposition(snapshot):
+    lines = []
+    for metric in _metrics.values():
+        samples = snapshot.get(metric.name, {})
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.type}')
+        for key, value in sorted(samples.items()):
+            if metric.type != 'histogram':
+                lines.append(f'{metric.name}{_labels(metric.labels, key)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ('+Inf',), value[:-1]):
+                cumulative += count
+                le = 'le="{}"'.format(bound if bound == '+Inf' else _format_value(float(bound)))
+                lines.append(f'{metric.name}_bucket{_labels(metric.labels, key, le)} {cumulative}')
+            lines.append(f'{metric.name}_sum{_labels(metric.labels, key)} {_format_value(value[-1])}')
+            lines.append(f'{metric.name}_count{_labels(metric.labels, key)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+# agregacion entre procesos
+
+def _local_samples():
+    return {metric.name: metric.samples() for metric in _metrics.values()}
+
+
+def _directory():
+    directory = getattr(settings, 'METRICS_DIR', None)
+    return Path(directory) if directory else None
+
+
+def flush():
+    directory = _directory()
+    if directory is None:
+        return
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{os.getpid()}.json'
+    temporary = directory / f'.{os.getpid()}.json.tmp'
+    with open(temporary, 'w', encoding='utf-8') as handle:
+        json.dump(_local_samples(), handle)
+    os.replace(temporary, path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    # {nombre: {labels: valor}} sumando este proceso y los archivos de los demas
+    sources = [_local_samples()]
+    directory = _directory()
+    if directory is not None and directory.exists():
+        for path in directory.glob('*.json'):
+            if not path.stem.isdigit() or int(path.stem) == os.getpid():
+                continue
+            pid = int(path.stem)
+            try:
+                with open(path, encoding='utf-8') as handle:
+                    data = json.load(handle)
+            except (OSError, ValueError):
+                continue
+            if not _alive(pid):
+                data = {name: samples for name, samples in data.items()
+                        if name in _metrics and _metrics[name].type != 'gauge'}
+            sources.append(data)
+
+    snapshot = {}
+    for data in sources:
+        for name, samples in data.items():
+            metric = _metrics.get(name)
+            if metric is None:
+                continue
+            merged = snapshot.setdefault(name, {})
+            for key, value in samples:
+                key = tuple(key)
+                current = merged.get(key)
+                if current is None:
+                    merged[key] = value
+                elif metric.type == 'histogram':
+                    merged[key] = [a + b for a, b in zip(current, value)]
+                else:
+                    merged[key] = current + value
+    return snapshot
+
+
+def metrics_view(request):
+    if not getattr(settings, 'METRICS_ENABLED', False):
+        raise Http404
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponse(status=401)
+    return HttpResponse(exposition(collect()), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# recoleccion
+
+_installed = False
+_flush_lock = threading.Lock()
+
+
+def install():
+    global _installed
+    if _installed:
+        return
+    atexit.register(flush)
+    _installed = True
+
+
+class _QueryCounter:
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            db_query_duration.observe(time.perf_counter() - start, alias=self.alias)
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        self.flush_interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 1.0)
+        self._flushed_at = 0.0
+
+    def __call__(self, request):
+        counters = [_QueryCounter(alias) for alias in connections]
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        status = 500
+        try:
+            with ExitStack() as stack:
+                for counter in counters:
+                    stack.enter_context(connections[counter.alias].execute_wrapper(counter))
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            finished = time.perf_counter()
+            elapsed = finished - start
+            http_requests_in_flight.dec()
+            # la ruta como patron (course/update/<int:pk>) para no crear una serie por id
+            match = getattr(request, 'resolver_match', None)
+            route = match.route if match is not None else '<unmatched>'
+            http_requests.inc(method=request.method, route=route, status=status)
+            http_request_duration.observe(elapsed, method=request.method, route=route)
+            self._observe_phases(request, route, finished)
+            for counter in counters:
+                if counter.count:
+                    db_queries.inc(counter.count, alias=counter.alias, route=route)
+            self._maybe_flush()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_started = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        # las Response de DRF pasan por aca con la vista terminada y antes de renderizarse
+        request._metrics_view_ended = time.perf_counter()
+        return response
+
+    def _observe_phases(self, request, route, finished):
+        # sin process_template_response (streaming, HttpResponse comun) no hay fases separadas
+        started = getattr(request, '_metrics_view_started', None)
+        ended = getattr(request, '_metrics_view_ended', None)
+        if started is None or ended is None:
+            return
+        view_duration.observe(ended - started, method=request.method, route=route)
+        render_duration.observe(finished - ended, method=request.method, route=route)
+
+    def _maybe_flush(self):
+        now = time.monotonic()
+        if now - self._flushed_at < self.flush_interval or not _flush_lock.acquire(blocking=False):
+            return
+        try:
+            self._flushed_at = now
+            flush()
+        finally:
+            _flush_lock.release()
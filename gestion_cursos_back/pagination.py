@@ -0,0 +1,120 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# Paginacion por numero de pagina con un modo keyset opcional.
+# Con ?cursor= la pagina se pide con WHERE (columnas de orden) > (ultima fila)
+# en lugar de OFFSET/COUNT, asi las paginas profundas cuestan lo mismo que la primera.
+# El total solo se calcula si se pide con ?count=true.
+# Con cursor_by_default el modo keyset es el normal y ?page= queda solo por compatibilidad.
+class KeysetPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Cursor inválido'
+
+    # columnas de orden del listado, siempre terminando en una unica (id)
+    cursor_ordering = ('id',)
+    cursor_by_default = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self._uses_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        queryset = queryset.order_by(*self.cursor_ordering)
+        self.count = queryset.count() if self._wants_count(request) else None
+
+        position = self.decode_cursor(queryset.model, request)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page_rows = rows[:page_size]
+        return self.page_rows
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+
+        payload = {}
+        if self.count is not None:
+            payload['count'] = self.count
+        payload['next'] = self.get_next_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page_rows[-1]))
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        return None
+
+    def encode_cursor(self, obj):
+        values = [
+            obj._meta.get_field(name).value_to_string(obj)
+            for name, _ in self._ordering()
+        ]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, model, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            raw = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            values = json.loads(raw)
+            fields = self._ordering()
+            if not isinstance(values, list) or len(values) != len(fields):
+                raise ValueError
+            return [
+                (name, descending, model._meta.get_field(name).to_python(value))
+                for (name, descending), value in zip(fields, values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, position):
+        # (a, b, c) > (x, y, z)  =>  a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+        condition = Q()
+        for index, (name, descending, value) in enumerate(position):
+            lookup = {name + ('__lt' if descending else '__gt'): value}
+            lookup.update({prev_name: prev_value for prev_name, _, prev_value in position[:index]})
+            condition |= Q(**lookup)
+        return condition
+
+    def _ordering(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.cursor_ordering]
+
+    def _uses_cursor(self, request):
+        if self.cursor_query_param in request.query_params:
+            return True
+        return self.cursor_by_default and self.page_query_param not in request.query_params
+
+    def _wants_count(self, request):
+        return request.query_params.get(self.count_query_param, 'false').lower() == 'true'
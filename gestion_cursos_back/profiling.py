@@ -0,0 +1,194 @@
+import heapq
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+
+# Perfil de cada peticion, solo si REQUEST_PROFILING esta activo (si no, el middleware se
+# descarta al arrancar y no cuesta nada).
+# Mide por separado:
+#   - auth: APIView.initial (autenticacion, permisos y throttling de DRF)
+#   - view: la vista completa, incluye auth, serialize y las queries que haga
+#   - serialize: serializer.data de primer nivel (incluye las queries de querysets perezosos)
+#   - render: desde que la vista devuelve la Response hasta que sale del middleware (JSON)
+#   - db: cantidad y tiempo de las queries, con connection.execute_wrapper en todas las bases
+# y lo devuelve en el header Server-Timing. Las peticiones que superan
+# REQUEST_PROFILING_SLOW_MS se registran (con muestreo) como JSON con sus queries mas lentas.
+# view y render salen de process_view/process_template_response, como en metrics.py. auth y
+# serialize pasan dentro de la vista sin ningun hook de Django ni de DRF, y las vistas heredan
+# de clases genericas distintas: por eso APIView.initial y BaseSerializer.data se envuelven
+# una vez por proceso. Sin perfil activo el envoltorio solo llama al original, y cada
+# envoltorio queda marcado para no volver a envolverlo aunque install se llame de nuevo.
+# En las respuestas por streaming (paginate=false) el cuerpo se genera despues de los headers,
+# asi que lo que pasa durante la transmision no se cuenta.
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+
+    def __init__(self, top_queries):
+        self.phases = defaultdict(float)
+        self.queries = 0
+        self.db_time = 0.0
+        self._top_queries = top_queries
+        self._slowest = []
+        self._active = set()
+        self.view_started = None
+        self.view_ended = None
+
+    def end_view(self):
+        if self.view_started is not None:
+            self.view_ended = time.perf_counter()
+            self.phases['view'] += self.view_ended - self.view_started
+            self.view_started = None
+
+    def end_render(self):
+        if self.view_ended is not None:
+            self.phases['render'] += time.perf_counter() - self.view_ended
+            self.view_ended = None
+
+    @contextmanager
+    def phase(self, name):
+        # las fases anidadas del mismo tipo (serializers dentro de serializers) se miden una vez
+        if name in self._active:
+            yield
+            return
+        self._active.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+            self._active.discard(name)
+
+    def execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            # solo el SQL, sin parametros: los logs no deben llevar datos de usuarios
+            entry = (duration, self.queries, sql)
+            if len(self._slowest) < self._top_queries:
+                heapq.heappush(self._slowest, entry)
+            elif self._slowest and duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def slowest_queries(self):
+        return [
+            {'sql': sql, 'ms': round(duration * 1000, 2)}
+            for duration, _, sql in sorted(self._slowest, reverse=True)
+        ]
+
+    def server_timing(self, total):
+        entries = [
+            f'{name};dur={self.phases[name] * 1000:.1f}'
+            for name in ('auth', 'view', 'serialize', 'render')
+            if name in self.phases
+        ]
+        entries.append(f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"')
+        entries.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(entries)
+
+
+def _timed(name, function):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return function(*args, **kwargs)
+        with profile.phase(name):
+            return function(*args, **kwargs)
+    wrapper.profiled_phase = name
+    return wrapper
+
+
+def _wrap(owner, attribute, name):
+    current = owner.__dict__[attribute]
+    function = current.fget if isinstance(current, property) else current
+    if getattr(function, 'profiled_phase', None) is not None:
+        return
+    wrapped = _timed(name, function)
+    setattr(owner, attribute, property(wrapped) if isinstance(current, property) else wrapped)
+
+
+def install():
+    _wrap(APIView, 'initial', 'auth')
+    _wrap(BaseSerializer, 'data', 'serialize')
+
+
+class ProfilingMiddleware:
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        self.slow = getattr(settings, 'REQUEST_PROFILING_SLOW_MS', 500) / 1000
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 1.0)
+        self.top_queries = getattr(settings, 'REQUEST_PROFILING_TOP_QUERIES', 5)
+
+    def __call__(self, request):
+        profile = RequestProfile(self.top_queries)
+        token = _current.set(profile)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(profile.execute))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        # sin process_template_response (streaming, HttpResponse comun) no hay render separado
+        profile.end_render()
+        profile.end_view()
+        total = time.perf_counter() - start
+
+        response['Server-Timing'] = profile.server_timing(total)
+        if total >= self.slow and random.random() < self.sample_rate:
+            self._log(request, response, profile, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = _current.get()
+        if profile is not None:
+            profile.view_started = time.perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        # las Response de DRF pasan por aca con la vista terminada y antes de renderizarse
+        profile = _current.get()
+        if profile is not None:
+            profile.end_view()
+        return response
+
+    def _log(self, request, response, profile, total):
+        record = {
+            'event': 'slow_request',
+            'method': request.method,
+            'path': request.path,
+            'route': getattr(request.resolver_match, 'route', None),
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'phases_ms': {name: round(value * 1000, 2) for name, value in profile.phases.items()},
+            'queries': profile.queries,
+            'db_ms': round(profile.db_time * 1000, 2),
+            'slowest_queries': profile.slowest_queries(),
+        }
+        logger.warning(json.dumps(record))
@@ -0,0 +1,119 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+
+# Lecturas de los listados en replicas de la base.
+# Las vistas con ReplicaReadMixin leen de una de las bases de DATABASE_REPLICAS (al azar)
+# en GET/HEAD/OPTIONS; todo lo demas (escrituras, vistas de detalle, autenticacion) queda
+# en default. Para que un usuario vea lo que acaba de escribir aunque la replica venga
+# atrasada, ReplicaMiddleware marca en el cache compartido a quien hizo una escritura con
+# exito, y durante DATABASE_REPLICA_STICKY_SECONDS sus listados se leen de default.
+# Sin replicas configuradas el mixin no cambia nada y el middleware se descarta.
+
+WROTE_KEY = 'replica:wrote:{}'
+
+_replica = ContextVar('replica_alias', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def current():
+    return _replica.get()
+
+
+def wrote_recently(user):
+    return bool(user and user.is_authenticated and cache.get(WROTE_KEY.format(user.pk)))
+
+
+def mark_write(user):
+    timeout = getattr(settings, 'DATABASE_REPLICA_STICKY_SECONDS', 10)
+    cache.set(WROTE_KEY.format(user.pk), 1, timeout=timeout)
+
+
+@contextmanager
+def primary():
+    # para lecturas que no pueden venir atrasadas dentro de una vista que lee de replica
+    token = _replica.set(None)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaReadMixin:
+
+    def initial(self, request, *args, **kwargs):
+        # despues de autenticar, para saber quien es y si escribio hace poco
+        super().initial(request, *args, **kwargs)
+        aliases = replicas()
+        if aliases and request.method in SAFE_METHODS and not wrote_recently(request.user):
+            self._replica_token = _replica.set(random.choice(aliases))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        # los objetos relacionados se leen de la misma base que el objeto de origen
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return _replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # todas las bases tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # las replicas reciben el esquema por replicacion
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaMiddleware:
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # DRF deja en request.user al usuario autenticado con el JWT
+        user = getattr(request, 'user', None)
+        if request.method not in SAFE_METHODS and response.status_code < 400 and user is not None and user.is_authenticated:
+            mark_write(user)
+        return response
+
+
+# las marcas de escritura viven en el cache 'default': con LocMemCache cada worker tiene las
+# suyas y quien escribe puede leer de una replica atrasada desde otro proceso. Sin --deploy,
+# con replicas el cache tiene que ser compartido incluso en desarrollo
+@register(Tags.caches)
+def check_replica_cache(app_configs, **kwargs):
+    if replicas() and isinstance(caches['default'], LocMemCache):
+        return [Error(
+            'Las replicas de lectura necesitan un cache compartido entre procesos.',
+            hint='Configure CACHE_URL (redis://, dbcache:// o filecache://) o quite DB_REPLICA_URLS.',
+            id='replicas.E001',
+        )]
+    return []
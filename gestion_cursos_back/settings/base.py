@@ -79,6 +79,10 @@ SWAGGER_SETTINGS = {
 
 
 MIDDLEWARE = [
+    # primero para medir todo lo demas; cada uno se desactiva con su setting
+    'gestion_cursos_back.metrics.MetricsMiddleware',
+    'gestion_cursos_back.profiling.ProfilingMiddleware',
+    'gestion_cursos_back.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -130,7 +134,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -152,6 +156,78 @@ SIMPLE_JWT = {
 }
 
 
+# filas leidas y serializadas por bloque en los listados con paginate=false
+LIST_STREAM_CHUNK_SIZE = 500
+
+# cache compartido: versiones del catalogo y de los usuarios, permisos, lista negra de tokens
+# y marcas de escritura de las replicas. LocMemCache (el valor por defecto) es de cada proceso
+# y solo sirve con un unico worker; con varios usar p. ej. CACHE_URL=redis://host:6379/0 o
+# CACHE_URL=dbcache://gestion_cursos_cache (despues de manage.py createcachetable).
+# Ver apps/course/checks.py
+CACHES = {'default': env.cache_url('CACHE_URL', default='locmemcache://')}
+
+# segundos que vive una pagina del catalogo en cache (ver apps/course/cache.py);
+# las escrituras de cursos y lecciones la invalidan antes cambiando la version
+CATALOG_CACHE_TIMEOUT = 300
+# las estadisticas (inscripciones, reseñas) cambian seguido: invalidan el catalogo a lo sumo
+# una vez cada CATALOG_STATS_MAX_AGE segundos, que es lo maximo que pueden verse atrasadas
+CATALOG_STATS_MAX_AGE = 10
+
+# latidos de progreso (ver apps/lesson_progress/progress.py): cada proceso acumula hasta
+# PROGRESS_FLUSH_WINDOW segundos o PROGRESS_FLUSH_MAX_ROWS pares antes de escribir (un hilo
+# escribe lo que quede al vencer la ventana); 0 escribe en cada peticion
+PROGRESS_FLUSH_WINDOW = env.float('PROGRESS_FLUSH_WINDOW', default=2.0)
+PROGRESS_FLUSH_MAX_ROWS = 5000
+
+# rollup de actividad (ver apps/course/analytics.py): cada ejecucion vuelve a contar desde el
+# dia de la anterior menos estos dias, margen para las transacciones que confirman tarde
+ROLLUP_ACTIVITY_LAG_DAYS = 1
+
+# usuarios autenticados cacheados por proceso (ver apps/authentication/user_cache.py)
+AUTH_USER_CACHE_TTL = 60
+AUTH_USER_CACHE_SIZE = 10000
+
+# permisos resueltos por usuario en el cache compartido (ver apps/authentication/permission_cache.py)
+AUTHENTICATION_BACKENDS = ['apps.authentication.backends.CachedModelBackend']
+AUTH_PERMISSION_CACHE_TIMEOUT = 3600
+
+# importacion de usuarios desde el panel (ver apps/users/importer.py): hilos que hashean las
+# contraseñas durante la peticion; None usa todos los nucleos
+USER_IMPORT_MAX_ROWS = 10000
+USER_IMPORT_WORKERS = None
+
+# lista negra de refresh tokens (ver apps/authentication/blacklist.py): filtro de Bloom de
+# 1 MB por proceso, sincronizado con la tabla cada JWT_BLACKLIST_SYNC_INTERVAL segundos
+# y reconstruido desde cero cada JWT_BLACKLIST_REBUILD_INTERVAL
+JWT_BLACKLIST_BLOOM_BITS = 1 << 23
+JWT_BLACKLIST_BLOOM_HASHES = 7
+JWT_BLACKLIST_LRU_SIZE = 10000
+JWT_BLACKLIST_SYNC_INTERVAL = 5
+JWT_BLACKLIST_REBUILD_INTERVAL = 3600
+
+# perfil por peticion en el header Server-Timing (ver gestion_cursos_back/profiling.py); las
+# peticiones de mas de REQUEST_PROFILING_SLOW_MS se registran con sus queries mas lentas
+REQUEST_PROFILING = env.bool('REQUEST_PROFILING', default=False)
+REQUEST_PROFILING_SLOW_MS = env.int('REQUEST_PROFILING_SLOW_MS', default=500)
+REQUEST_PROFILING_SAMPLE_RATE = 1.0
+REQUEST_PROFILING_TOP_QUERIES = 5
+
+# metricas en /metrics (ver gestion_cursos_back/metrics.py), desactivadas por defecto; con
+# varios workers cada proceso vuelca sus valores a METRICS_DIR, que hay que vaciar antes de
+# arrancar el servicio. METRICS_TOKEN exige 'Authorization: Bearer <token>' al scraper
+METRICS_ENABLED = env.bool('METRICS_ENABLED', default=False)
+METRICS_DIR = env('METRICS_DIR', default=None)
+METRICS_FLUSH_INTERVAL = 1.0
+METRICS_TOKEN = env('METRICS_TOKEN', default=None)
+
+# replicas de lectura para los listados (ver gestion_cursos_back/replicas.py); cada settings
+# agrega sus alias a DATABASES y DATABASE_REPLICAS. Quien escribe lee de default durante
+# DATABASE_REPLICA_STICKY_SECONDS, que tiene que cubrir el atraso de la replicacion
+DATABASE_ROUTERS = ['gestion_cursos_back.replicas.ReplicaRouter']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_STICKY_SECONDS = env.int('DATABASE_REPLICA_STICKY_SECONDS', default=10)
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
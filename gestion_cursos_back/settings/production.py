@@ -13,9 +13,18 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # la base de los tests en archivo y no en memoria: los tests que escriben desde
+        # varios hilos necesitan que SQLite espere el bloqueo en lugar de fallar
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# replicas de lectura; para probar con SQLite, una copia del archivo de default:
+# DB_REPLICA_URLS=sqlite:////ruta/db.replica.sqlite3
+for index, url in enumerate(env.list('DB_REPLICA_URLS', default=[]), start=1):
+    DATABASES[f'replica_{index}'] = {**env.db_url_config(url), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS = DATABASE_REPLICAS + [f'replica_{index}']
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
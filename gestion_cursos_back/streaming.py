@@ -0,0 +1,77 @@
+import csv
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+CSV_CONTENT_TYPE = 'text/csv; charset=utf-8'
+
+
+# csv.writer escribe en un objeto con write(); este devuelve la linea para poder hacer yield
+class _Echo:
+
+    def write(self, value):
+        return value
+
+
+# Respuesta de los listados con paginate=false.
+# Lee la base por bloques con .iterator(chunk_size=...) y serializa bloque a bloque,
+# asi la memoria del worker no crece con el tamaño del resultado.
+# El total se escribe al final del JSON, ya contado mientras se recorria, sin un COUNT aparte.
+# Con ?output=ndjson se emite un objeto por linea y con ?output=csv una fila por objeto
+# (los campos anidados van como JSON dentro de la celda).
+def stream_list(view, queryset):
+    request = view.request
+    chunk_size = getattr(settings, 'LIST_STREAM_CHUNK_SIZE', 500)
+    serializer_class = view.get_serializer_class()
+    context = view.get_serializer_context()
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+    output = request.query_params.get('output', '').lower()
+    # el cuerpo se genera cuando la vista ya termino: la base (replica o default) se fija ahora
+    queryset = queryset.using(queryset.db)
+
+    def chunks():
+        rows = queryset.iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield serializer_class(chunk, many=True, context=context).data
+
+    if output == 'ndjson':
+        def ndjson():
+            for data in chunks():
+                yield ''.join(encoder.encode(item) + '\n' for item in data)
+
+        return StreamingHttpResponse(ndjson(), content_type=NDJSON_CONTENT_TYPE)
+
+    if output == 'csv':
+        writer = csv.writer(_Echo())
+
+        def cell(value):
+            if isinstance(value, (dict, list)):
+                return encoder.encode(value)
+            return '' if value is None else value
+
+        def rows():
+            header = [name for name, field in serializer_class(context=context).fields.items() if not field.write_only]
+            yield writer.writerow(header)
+            for data in chunks():
+                yield ''.join(writer.writerow([cell(item.get(name)) for name in header]) for item in data)
+
+        response = StreamingHttpResponse(rows(), content_type=CSV_CONTENT_TYPE)
+        response['Content-Disposition'] = f'attachment; filename="{queryset.model._meta.model_name}.csv"'
+        return response
+
+    def document():
+        count = 0
+        yield '{"results":['
+        for data in chunks():
+            yield (',' if count else '') + ','.join(encoder.encode(item) for item in data)
+            count += len(data)
+        yield '],"count":%d}' % count
+
+    return StreamingHttpResponse(document(), content_type='application/json')
@@ -20,6 +20,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from gestion_cursos_back.metrics import metrics_view
+
 
 schema_view = get_schema_view(
    openapi.Info(
@@ -42,10 +44,13 @@ urlpatterns = [
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view),
     path('', include('apps.users.urls')),
     path('auth/', include('apps.authentication.urls')),
     path('course/', include('apps.course.urls')),
     path('lesson/', include('apps.lesson.urls')),
     path('enrollment/', include('apps.enrollment.urls')),
+    path('lesson_progress/', include('apps.lesson_progress.urls')),
+    path('review/', include('apps.review.urls')),
 
 ]